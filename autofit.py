@@ -0,0 +1,116 @@
+"""
+Automatic font size and icon scale fitting.
+
+Text width comes from the bundled fonts' metrics (fonts.py) and icon
+extents from labels.scad's placement rules (layout.py), so a label's
+fit is known before anything renders. The configured ``font_size``,
+``fastener_scale`` and ``hardware_scale`` are the largest sizes wanted.
+When the text would run into an icon or off the label, the icons shrink
+first, down to labels.scad's smallest scale, and the text after that.
+"""
+
+import math
+
+from fonts import FontMetrics
+from layout import (
+    fastener_extent,
+    hardware_extent,
+    label_size,
+    text_anchor,
+    text_extent,
+    text_style,
+)
+from scad_schema import config_parameter
+
+# Clear space kept between the text and an icon, and above and below it
+GAP = 1.0
+MARGIN = 0.5
+
+# Icon scales are tried in these steps; font sizes are rounded down to FONT_STEP
+SCALE_STEP = 0.05
+FONT_STEP = 0.1
+
+# Below this the text is unreadable and the label is left as configured
+MIN_FONT_SIZE = 2.0
+
+FIT_KEYS = ("font_size", "fastener_scale", "hardware_scale")
+
+
+def largest_font_size(label_config: dict, text: str, metrics: FontMetrics) -> float:
+    """
+    The largest font size, up to the configured one, at which ``text``
+    stays clear of the label's icons and edges (0 if none does).
+    """
+    size = label_config["font_size"]
+    style = text_style(label_config)
+    anchor = text_anchor(label_config)
+    box = text_extent(text, metrics, style, anchor)
+    if box is None:
+        return size
+
+    label_x, label_y, _ = label_size(label_config)
+    # Text may run to the label's ends, which is where align puts it
+    left, right = 0.0, label_x
+    for icon in (fastener_extent(label_config), hardware_extent(label_config)):
+        if icon is not None:
+            right = min(right, icon[0] - GAP)
+
+    # The ink scales about the anchor, so each limit caps the size linearly
+    x, y, _ = anchor
+    limits = [size]
+    for reach, room in [
+        (box[2] - x, right - x),
+        (x - box[0], x - left),
+        (box[3] - y, label_y - MARGIN - y),
+        (y - box[1], y - MARGIN),
+    ]:
+        if room < 0:
+            return 0.0  # the anchor itself is past the limit
+        if reach > 0:
+            limits.append(size * room / reach)
+    best = min(limits)
+    if best <= 0:
+        return 0.0
+    return round(math.floor(best / FONT_STEP + 1e-9) * FONT_STEP, 2)
+
+
+def fit_label(label_config: dict, text: str, metrics: FontMetrics) -> dict | None:
+    """
+    The sizes to render ``text`` with, as {key: value} for the keys of
+    FIT_KEYS that change; empty when the label fits as configured, None
+    when it can't be made to fit.
+    """
+    smallest = config_parameter("fastener_scale").minimum
+    wanted = {
+        "font_size": label_config["font_size"],
+        "fastener_scale": label_config.get("fastener_scale", 1.0),
+        "hardware_scale": label_config.get("hardware_scale", 1.0),
+    }
+
+    shown = [
+        key
+        for key, extent in [
+            ("fastener_scale", fastener_extent(label_config)),
+            ("hardware_scale", hardware_extent(label_config)),
+        ]
+        if extent is not None
+    ]
+
+    # Shrink the shown icons step by step until the text fits at full size
+    scale = max([wanted[key] for key in shown], default=smallest)
+    while True:
+        candidate = {**label_config}
+        for key in shown:
+            candidate[key] = min(wanted[key], scale)
+        candidate["font_size"] = largest_font_size(candidate, text, metrics)
+        if candidate["font_size"] >= wanted["font_size"] or scale <= smallest:
+            break
+        scale = max(smallest, round(scale - SCALE_STEP, 2))
+
+    if candidate["font_size"] < MIN_FONT_SIZE:
+        return None
+    return {
+        key: candidate[key]
+        for key in FIT_KEYS
+        if key in candidate and candidate[key] != wanted[key]
+    }
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the OpenSCAD binary, for benchmarking the generator itself.
+
+Honours ``-o`` and ``-D`` (including Export_Mode, Glyph, Icon and $fs), and
+batch files with one cullenect_label_generate() per label, and writes a
+synthetic 3MF whose meshes have a configurable vertex count, after
+a configurable delay that stands in for CGAL/manifold time:
+
+    FAKE_OPENSCAD_VERTICES  vertices per mesh object at $fs=0.01 (default 2000)
+    FAKE_OPENSCAD_LATENCY   seconds to sleep per invocation (default 0.05)
+
+PNG outputs get a tiny valid image.
+"""
+
+import math
+import os
+import re
+import struct
+import sys
+import time
+import zipfile
+import zlib
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" '
+    'ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    "</Types>"
+)
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    "</Relationships>"
+)
+
+# (x0, y0, x1, y1, z) of the synthetic base and text sheets, roughly where
+# labels.scad puts a 1U label body and its text
+REGIONS = {
+    "base": (0.0, 0.0, 36.0, 11.0, 1.2),
+    "text": (1.0, 3.0, 20.0, 8.0, 1.2),
+    "lettering": (1.0, 3.0, 20.0, 8.0, 1.2),
+    # Single glyphs and icons, at the origin
+    "glyph": (0.2, -0.1, 2.6, 3.3, 0.2001),
+    "icon": (-4.0, -5.0, 4.0, 5.0, 0.1),
+}
+
+
+def parse_args(argv: list[str]) -> tuple[str, dict, str]:
+    output, defines, source = None, {}, None
+    i = 0
+    while i < len(argv):
+        if argv[i] == "-o":
+            output = argv[i + 1]
+            i += 2
+        elif argv[i] == "-D":
+            name, _, value = argv[i + 1].partition("=")
+            defines[name] = value.strip('"')
+            i += 2
+        else:
+            if not argv[i].startswith("-"):
+                source = argv[i]
+            i += 1
+    return output, defines, source
+
+
+def batch_origins(source: str) -> list[tuple[float, float]]:
+    """The XY origin of every label instantiated by a batch file."""
+    with open(source, encoding="utf-8") as f:
+        return [
+            tuple(float(v) for v in m.groups())
+            for m in re.finditer(
+                r"cullenect_label_generate\(.*origin=\[([-\d.]+), ([-\d.]+), ",
+                f.read(),
+            )
+        ]
+
+
+def grid_mesh(region, vertices: int, origin=(0.0, 0.0)) -> str:
+    """A flat triangulated sheet with about ``vertices`` vertices."""
+    x0, y0, x1, y1, z = region
+    x0, x1 = x0 + origin[0], x1 + origin[0]
+    y0, y1 = y0 + origin[1], y1 + origin[1]
+    cols = max(2, int(math.sqrt(vertices * (x1 - x0) / (y1 - y0))))
+    rows = max(2, vertices // cols)
+    out = ["<mesh><vertices>"]
+    for r in range(rows):
+        y = y0 + (y1 - y0) * r / (rows - 1)
+        for c in range(cols):
+            x = x0 + (x1 - x0) * c / (cols - 1)
+            out.append(f'<vertex x="{x:.6f}" y="{y:.6f}" z="{z}"/>')
+    out.append("</vertices><triangles>")
+    for r in range(rows - 1):
+        for c in range(cols - 1):
+            a = r * cols + c
+            b, d, e = a + 1, a + cols, a + cols + 1
+            out.append(f'<triangle v1="{a}" v2="{b}" v3="{e}"/>')
+            out.append(f'<triangle v1="{a}" v2="{e}" v3="{d}"/>')
+    out.append("</triangles></mesh>")
+    return "".join(out)
+
+
+def write_3mf(path: str, parts: list, vertices: int) -> None:
+    """``parts`` are region names, or (region name, XY origin) pairs."""
+    parts = [(p, (0.0, 0.0)) if isinstance(p, str) else p for p in parts]
+    objects = "".join(
+        f'<object id="{i}" type="model">{grid_mesh(REGIONS[p], vertices, o)}</object>'
+        for i, (p, o) in enumerate(parts, start=1)
+    )
+    items = "".join(f'<item objectid="{i}"/>' for i in range(1, len(parts) + 1))
+    model = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<model unit="millimeter" xml:lang="en-US" '
+        'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+        '<metadata name="Application">OpenSCAD (fake)</metadata>'
+        f"<resources>{objects}</resources><build>{items}</build></model>"
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", CONTENT_TYPES)
+        zf.writestr("_rels/.rels", RELS)
+        zf.writestr("3D/3dmodel.model", model)
+
+
+def write_png(path: str) -> None:
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    ihdr = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", ihdr))
+        f.write(chunk(b"IDAT", zlib.compress(b"\x00\xc0\xc0\xc0")))
+        f.write(chunk(b"IEND", b""))
+
+
+def main() -> int:
+    output, defines, source = parse_args(sys.argv[1:])
+    if output is None:
+        print("fake openscad: no -o given", file=sys.stderr)
+        return 1
+
+    time.sleep(float(os.environ.get("FAKE_OPENSCAD_LATENCY", "0.05")))
+    vertices = int(os.environ.get("FAKE_OPENSCAD_VERTICES", "2000"))
+    # Coarser $fs means fewer fragments per curve
+    fs = float(defines.get("$fs", "0.01"))
+    vertices = max(4, int(vertices * min(1.0, math.sqrt(0.01 / fs))))
+
+    if output.endswith(".png"):
+        write_png(output)
+        return 0
+
+    mode = defines.get("Export_Mode", "all")
+    if defines.get("Glyph"):
+        parts = ["glyph"]
+    elif defines.get("Icon"):
+        parts = ["icon"]
+    else:
+        parts = {"base": ["base"], "text": ["text"], "lettering": ["lettering"]}.get(
+            mode, ["base", "text"]
+        )
+    if defines.get("Batch") == "true":
+        parts = [(p, origin) for origin in batch_origins(source) for p in parts]
+    write_3mf(output, parts, vertices)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of generate_labels.py against a fake OpenSCAD.
+
+Runs the generator over a matrix of label counts, worker counts and mesh
+sizes using bench/fake_openscad.py, so the numbers measure the
+generator's own overhead (scheduling, combine, zip writes) rather than
+CGAL/manifold time. Reports throughput, per-stage time and peak RSS, and
+flags regressions against a stored baseline. First checks that
+``generate_labels.py --help`` runs, since argparse only formats the help
+text when asked for it.
+
+Usage:
+    python bench/run_bench.py                         # default matrix
+    python bench/run_bench.py --labels 50 --workers 1 4 --vertices 20000
+    python bench/run_bench.py --save-baseline         # record a new baseline
+
+Throughput depends on the machine, so no baseline is committed: record
+one with --save-baseline first. Exits 1 on a regression or failure, and
+2 when a scenario had no baseline to compare against.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent.resolve()
+REPO_DIR = BENCH_DIR.parent
+FAKE_OPENSCAD = BENCH_DIR / "fake_openscad.py"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+# Relative slowdown (or RSS growth) tolerated before flagging a regression
+DEFAULT_TOLERANCE = 0.15
+
+
+def make_config(path: Path, label_count: int, output_dir: Path) -> None:
+    config = {
+        "settings": {
+            "openscad_path": str(FAKE_OPENSCAD),
+            "output_dir": str(output_dir),
+            "filaments": {"base": 1, "text": 2},
+        },
+        "defaults": {
+            "fastener_head": "countersunk",
+            "fastener_shaft": "machine",
+            "fastener_threads": "full",
+            "fastener_driver": "hex",
+            "fastener_orientation": "landscape",
+            "fastener_scale": 1.0,
+            "font": "Open Sans",
+            "font_style": "ExtraBold",
+            "font_size": 4.5,
+        },
+        "labels": [
+            {"name": f"M3x{i}", "text": f"M3×{i}"} for i in range(1, label_count + 1)
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False)
+
+
+def drive(stats_file: str, argv: list[str]) -> None:
+    """
+    Run generate_labels.main() in this process with stage timers installed,
+    then write the timings and peak RSS to ``stats_file``.
+    """
+    import resource
+    import zipfile
+
+    sys.path.insert(0, str(REPO_DIR))
+    import generate_labels
+
+    totals = {"render_wait": 0.0, "combine": 0.0, "zip_write": 0.0}
+    lock = threading.Lock()
+
+    def timed(stage, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with lock:
+                    totals[stage] += time.perf_counter() - start
+
+        return wrapper
+
+    generate_labels.run_openscad = timed("render_wait", generate_labels.run_openscad)
+    generate_labels.combine_3mf_files = timed(
+        "combine", generate_labels.combine_3mf_files
+    )
+    # Every archive write (streamed entries and writestr) goes through here
+    zipfile._ZipWriteFile.write = timed("zip_write", zipfile._ZipWriteFile.write)
+    zipfile._ZipWriteFile.close = timed("zip_write", zipfile._ZipWriteFile.close)
+
+    sys.argv = ["generate_labels.py", *argv]
+    start = time.perf_counter()
+    try:
+        generate_labels.main()
+        status = 0
+    except SystemExit as e:
+        status = e.code or 0
+    wall = time.perf_counter() - start
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    with open(stats_file, "w") as f:
+        json.dump({"status": status, "wall": wall, "peak_rss": rss, **totals}, f)
+
+
+def run_scenario(labels: int, workers: int, vertices: int, latency: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        config = tmpdir / "config.json"
+        stats = tmpdir / "stats.json"
+        make_config(config, labels, tmpdir / "out")
+
+        env = {
+            **os.environ,
+            "FAKE_OPENSCAD_VERTICES": str(vertices),
+            "FAKE_OPENSCAD_LATENCY": str(latency),
+        }
+        cmd = [
+            sys.executable,
+            __file__,
+            "--drive",
+            str(stats),
+            "--",
+            "--config",
+            str(config),
+            "--workers",
+            str(workers),
+            "--render-jobs",
+            str(workers),
+            "--no-cache",
+        ]
+        subprocess.run(cmd, env=env, check=False, stdout=subprocess.DEVNULL)
+        with open(stats) as f:
+            result = json.load(f)
+
+    result["throughput"] = labels / result["wall"] if result["wall"] else 0.0
+    return result
+
+
+def smoke_check() -> str | None:
+    """Why ``generate_labels.py --help`` fails, or None if it runs."""
+    proc = subprocess.run(
+        [sys.executable, str(REPO_DIR / "generate_labels.py"), "--help"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        return proc.stderr.strip().splitlines()[-1] if proc.stderr else "no output"
+    return None
+
+
+def scenario_key(labels: int, workers: int, vertices: int) -> str:
+    return f"labels={labels} workers={workers} vertices={vertices}"
+
+
+def compare(result: dict, baseline: dict | None, tolerance: float) -> str:
+    if baseline is None:
+        return "no baseline"
+    problems = []
+    if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+        problems.append(
+            f"throughput {result['throughput']:.1f} < {baseline['throughput']:.1f}"
+        )
+    if result["peak_rss"] > baseline["peak_rss"] * (1 + tolerance):
+        problems.append(
+            f"RSS {result['peak_rss'] / 2**20:.0f} > "
+            f"{baseline['peak_rss'] / 2**20:.0f} MB"
+        )
+    return "REGRESSION: " + ", ".join(problems) if problems else "ok"
+
+
+def main() -> int:
+    if len(sys.argv) > 2 and sys.argv[1] == "--drive":
+        drive(sys.argv[2], sys.argv[4:])
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--labels", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--vertices", type=int, nargs="+", default=[2000, 50000])
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Simulated OpenSCAD time per run in seconds (default: %(default)s)",
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store these results as the new baseline",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    problem = smoke_check()
+    if problem is not None:
+        print(f"generate_labels.py --help failed: {problem}", file=sys.stderr)
+        return 1
+
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    header = (
+        f"{'scenario':<40} {'labels/s':>9} {'render':>8} {'combine':>8} "
+        f"{'zip':>7} {'RSS MB':>7}  status"
+    )
+    print(header)
+    print("-" * len(header))
+
+    results = {}
+    regressions = 0
+    missing = 0
+    for labels, workers, vertices in itertools.product(
+        args.labels, args.workers, args.vertices
+    ):
+        key = scenario_key(labels, workers, vertices)
+        result = run_scenario(labels, workers, vertices, args.latency)
+        results[key] = result
+
+        status = (
+            "FAILED"
+            if result["status"]
+            else compare(result, baseline.get(key), args.tolerance)
+        )
+        regressions += status.startswith(("REGRESSION", "FAILED"))
+        missing += status == "no baseline"
+        print(
+            f"{key:<40} {result['throughput']:>9.1f} {result['render_wait']:>8.2f} "
+            f"{result['combine']:>8.2f} {result['zip_write']:>7.2f} "
+            f"{result['peak_rss'] / 2**20:>7.0f}  {status}"
+        )
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    elif missing:
+        print(
+            f"{missing} scenario(s) not compared: no baseline in {args.baseline}; "
+            "record one with --save-baseline",
+            file=sys.stderr,
+        )
+
+    if regressions:
+        return 1
+    return 2 if missing and not args.save_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
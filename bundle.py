@@ -0,0 +1,111 @@
+"""
+Streaming bundle output: every label in one zip or tar archive.
+
+Instead of one file per label in the output directory, finished 3MFs
+(and optional previews) are appended to a single archive as each label
+completes, followed by a manifest.json once the run is over. Tar
+streams, including to stdout, can be consumed by an upload or print
+queue tool while the batch is still running; zip entries are written
+with data descriptors, so a zip also works on a pipe.
+"""
+
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+BUNDLE_FORMATS = ("zip", "tar", "tar.gz")
+MANIFEST_ENTRY = "manifest.json"
+
+
+def bundle_format(target: str) -> str:
+    """The archive format implied by a bundle path ("-" streams a tar)."""
+    name = target.lower()
+    if name.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if name.endswith(".zip"):
+        return "zip"
+    return "tar"
+
+
+class Bundle:
+    """
+    An archive being streamed to ``fp``. ``add`` may be called from any
+    thread; entries appear in the order they were added.
+    """
+
+    def __init__(self, fp, fmt: str = "tar"):
+        if fmt not in BUNDLE_FORMATS:
+            raise ValueError(f"Unknown bundle format {fmt!r}")
+        self._fp = fp
+        self._lock = threading.Lock()
+        self.entries = []  # (name, size, sha256), for the manifest
+        self._sizes = {}  # name -> (size, sha256), for links
+        if fmt == "zip":
+            # 3MFs and PNGs are compressed already
+            self._zip = zipfile.ZipFile(fp, "w", zipfile.ZIP_STORED)
+            self._tar = None
+        else:
+            self._zip = None
+            self._tar = tarfile.open(
+                fileobj=fp, mode="w|gz" if fmt == "tar.gz" else "w|"
+            )
+
+    @classmethod
+    def open(cls, target: Path, fmt: str | None = None) -> "Bundle":
+        return cls(open(target, "wb"), fmt or bundle_format(str(target)))
+
+    def add(self, name: str, data: bytes) -> None:
+        with self._lock:
+            if self._zip is not None:
+                info = zipfile.ZipInfo(name, time.localtime()[:6])
+                self._zip.writestr(info, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                self._tar.addfile(info, io.BytesIO(data))
+            self._fp.flush()
+            self._sizes[name] = (len(data), hashlib.sha256(data).hexdigest())
+            self.entries.append((name, *self._sizes[name]))
+
+    @property
+    def links(self) -> bool:
+        """Whether entries can link to earlier ones (tar can, zip can't)."""
+        return self._tar is not None
+
+    def link(self, name: str, target: str) -> None:
+        """Add ``name`` as a hard link to the earlier entry ``target``."""
+        with self._lock:
+            size, digest = self._sizes[name] = self._sizes[target]
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.LNKTYPE
+            info.linkname = target
+            info.mtime = int(time.time())
+            self._tar.addfile(info)
+            self._fp.flush()
+            self.entries.append((name, size, digest))
+
+    def close(self, manifest: dict | None = None) -> None:
+        """Append the manifest, with a listing of every entry, and finish."""
+        listing = [
+            {"name": name, "size": size, "sha256": digest}
+            for name, size, digest in self.entries
+        ]
+        self.add(
+            MANIFEST_ENTRY,
+            json.dumps(
+                {**(manifest or {}), "entries": listing},
+                indent=1,
+                ensure_ascii=False,
+            ).encode("utf-8"),
+        )
+        with self._lock:
+            (self._zip or self._tar).close()
+            self._fp.flush()
+            if self._fp.fileno() > 2:  # leave stdout open
+                self._fp.close()
@@ -0,0 +1,218 @@
+"""
+Learned render cost model for ordering and timing label work.
+
+Render times differ a lot between labels: portrait fasteners, partial
+threads, hardware icons such as threaded inserts and long text all make
+OpenSCAD slower. The model learns that from finished runs. Every
+successful stage of a label (an OpenSCAD export mode, or the combine) is
+recorded against the label's features, and persisted next to the render
+cache so later runs start from what earlier ones observed.
+
+A prediction is the running mean of the exact feature combination when
+it has been seen, otherwise a log-linear fit over the individual
+features: log(seconds) = bias + sum of one weight per feature value.
+main() submits labels longest-predicted-first so the slowest ones do not
+start last, and each OpenSCAD run gets a timeout scaled from its
+prediction instead of one fixed limit.
+
+The peak memory of each OpenSCAD run is learned the same way, in MB, as
+the stage "rss:<export mode>"; the runner admits a process once its
+predicted peak fits in the memory budget.
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from runner import DEFAULT_JOB_TIMEOUT
+
+COST_MODEL_NAME = "cost-model.json"
+
+# Bump when the features or the stored format change; older files are ignored
+COST_MODEL_VERSION = 1
+
+# Fraction of the remaining error corrected by each observation
+LEARNING_RATE = 0.5
+
+# Weight of the newest observation in an exact combination's running mean
+SMOOTHING = 0.3
+
+# Adaptive timeout: this multiple of the prediction, but never less than
+# the fixed timeout used before anything is learned
+TIMEOUT_FACTOR = 4.0
+MIN_TIMEOUT = DEFAULT_JOB_TIMEOUT
+
+
+def label_features(label_config: dict, text: str, text2: str) -> dict[str, str]:
+    """The label settings that render time depends on, as strings."""
+    quality = label_config.get("quality")
+    if isinstance(quality, dict):
+        quality = ",".join(f"{k}={v}" for k, v in sorted(quality.items()))
+    length = len(text) + len(text2)
+    return {
+        "head": str(label_config.get("fastener_head", "")),
+        "shaft": str(label_config.get("fastener_shaft", "")),
+        "threads": str(label_config.get("fastener_threads", "")),
+        "driver": str(label_config.get("fastener_driver", "")),
+        "orientation": str(label_config.get("fastener_orientation", "")),
+        "show_fastener": str(label_config.get("show_fastener", True)),
+        "hardware": str(label_config.get("hardware", "none")),
+        "width": str(label_config.get("label_width", "")),
+        "quality": str(quality or "default"),
+        # Glyph count matters roughly, not exactly: 0, 1-4, 5-8, ... 17+
+        "text": str(min(5, math.ceil(length / 4))),
+    }
+
+
+def _combination(features: dict[str, str]) -> str:
+    return "|".join(f"{k}={v}" for k, v in sorted(features.items()))
+
+
+class CostModel:
+    """
+    Per-stage duration model. ``observe`` may be called from any thread;
+    ``register`` maps label names to features so spans can be attributed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.path = None
+        self.adaptive_timeouts = False
+        # stage -> {"bias": float, "weights": {feature value: float},
+        #           "exact": {combination: [mean seconds, count]}}
+        self.stages = {}
+        self._labels = {}
+        self.observations = 0
+
+    def load(self, path: Path) -> None:
+        """Start from the model saved at ``path``, if any."""
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == COST_MODEL_VERSION:
+                self.stages = data.get("stages", {})
+        except (OSError, ValueError):
+            pass  # missing or unreadable: learn from scratch
+
+    def save(self) -> None:
+        """Write the model atomically back to where it was loaded from."""
+        if self.path is None or not self.observations:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with self._lock, os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": COST_MODEL_VERSION, "stages": self.stages},
+                f,
+                indent=1,
+                sort_keys=True,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_name, self.path)
+
+    def register(self, name: str, features: dict[str, str]) -> None:
+        self._labels[name] = features
+
+    def forget(self, name: str) -> None:
+        self._labels.pop(name, None)
+
+    def _fit(self, stage: str, features: dict[str, str]) -> float | None:
+        # Caller holds the lock
+        model = self.stages.get(stage)
+        if model is None:
+            return None
+        weights = model["weights"]
+        return model["bias"] + sum(
+            weights.get(f"{k}={v}", 0.0) for k, v in features.items()
+        )
+
+    def observe(self, stage: str, features: dict[str, str], seconds: float) -> None:
+        """Learn from one successful run of ``stage`` that took ``seconds``."""
+        target = math.log(max(seconds, 1e-3))
+        keys = [f"{k}={v}" for k, v in features.items()]
+        with self._lock:
+            self.observations += 1
+            model = self.stages.get(stage)
+            if model is None:
+                model = self.stages[stage] = {
+                    "bias": target,
+                    "weights": {},
+                    "exact": {},
+                }
+            # Spread the correction over the bias and every active weight
+            step = (
+                LEARNING_RATE * (target - self._fit(stage, features)) / (1 + len(keys))
+            )
+            model["bias"] += step
+            for key in keys:
+                model["weights"][key] = model["weights"].get(key, 0.0) + step
+
+            exact = model["exact"].setdefault(_combination(features), [seconds, 0])
+            if exact[1]:
+                exact[0] += SMOOTHING * (seconds - exact[0])
+            exact[1] += 1
+
+    def predict(self, stage: str, features: dict[str, str]) -> float | None:
+        """Expected seconds for ``stage``, or None if it was never observed."""
+        with self._lock:
+            model = self.stages.get(stage)
+            if model is None:
+                return None
+            exact = model["exact"].get(_combination(features))
+            if exact is not None:
+                return exact[0]
+            return math.exp(self._fit(stage, features))
+
+    def label_cost(self, name: str, stages: list[str]) -> float:
+        """Predicted seconds for a registered label's stages (0 if unknown)."""
+        features = self._labels.get(name)
+        if features is None:
+            return 0.0
+        return sum(self.predict(stage, features) or 0.0 for stage in stages)
+
+    def label_predict(self, name: str | None, stage: str) -> float | None:
+        """predict() for a registered label, or None."""
+        if name not in self._labels:
+            return None
+        return self.predict(stage, self._labels[name])
+
+    def timeout(self, name: str | None, stage: str) -> float | None:
+        """
+        Adaptive timeout for a label's run of ``stage``, or None to use the
+        runner's fixed one (adaptive timeouts off, or nothing to go on).
+        """
+        if not self.adaptive_timeouts:
+            return None
+        predicted = self.label_predict(name, stage)
+        if predicted is None:
+            return None
+        return max(MIN_TIMEOUT, TIMEOUT_FACTOR * predicted)
+
+    def observe_label(self, name: str | None, stage: str, seconds: float) -> None:
+        """Learn from a registered label's stage; others are ignored."""
+        if name in self._labels:
+            self.observe(stage, self._labels[name], seconds)
+
+    def on_span(self, name: str, seconds: float, info: dict) -> None:
+        """
+        Tracer listener: learn from successful label stages, and from the
+        peak memory of every OpenSCAD run, including ones killed for it.
+        """
+        if name == "openscad" and info.get("peak_rss"):
+            self.observe_label(
+                info.get("label"), f"rss:{info['mode']}", info["peak_rss"] / 2**20
+            )
+        if name == "openscad" and info.get("status") == 0:
+            # Only the process itself, not the wait for room to start it
+            seconds = info.get("run_seconds", seconds)
+            self.observe_label(info.get("label"), info["mode"], seconds)
+        elif name == "combine" and info.get("status") == "ok":
+            self.observe_label(info.get("label"), name, seconds)
+
+
+# Shared by the whole run; main() loads and saves it
+COST_MODEL = CostModel()
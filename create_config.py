@@ -10,12 +10,19 @@ import json
 import sys
 from pathlib import Path
 
-FASTENER_HEADS = ["pan", "countersunk", "button", "hex"]
-FASTENER_SHAFTS = ["machine", "wood", "self-tapping"]
-FASTENER_THREADS = ["full", "partial"]
-FASTENER_DRIVERS = ["phillips", "hex", "slot", "torx"]
-HARDWARE_TYPES = ["none", "nut"]
-ORIENTATIONS = ["landscape", "portrait"]
+from quality import QUALITY_PROFILES
+from scad_schema import config_parameter
+
+# Choices come from labels.scad's customizer annotations, so they match
+# what it draws and what generate_labels.py accepts
+FASTENER_HEADS = config_parameter("fastener_head").values
+FASTENER_SHAFTS = config_parameter("fastener_shaft").values
+FASTENER_THREADS = config_parameter("fastener_threads").values
+FASTENER_DRIVERS = config_parameter("fastener_driver").values
+HARDWARE_TYPES = config_parameter("hardware").values
+ORIENTATIONS = config_parameter("fastener_orientation").values
+FONT_STYLES = config_parameter("font_style").values
+FASTENER_SCALE = config_parameter("fastener_scale")
 
 DEFAULT_OPENSCAD_PATH = "/Applications/OpenSCAD.app/Contents/MacOS/OpenSCAD"
 
@@ -104,12 +111,20 @@ def collect_label_overrides() -> dict:
     elif driver:
         print(f"      Unrecognised driver type, skipping.")
 
-    scale = input("    Fastener scale 0.1–1.0 (blank to skip): ").strip()
+    scale = input(
+        f"    Fastener scale {FASTENER_SCALE.minimum}–{FASTENER_SCALE.maximum}"
+        " (blank to skip): "
+    ).strip()
     if scale:
         try:
-            overrides["fastener_scale"] = float(scale)
+            value = float(scale)
         except ValueError:
             print("      Not a number, skipping.")
+        else:
+            if FASTENER_SCALE.check(value) is None:
+                overrides["fastener_scale"] = value
+            else:
+                print("      Out of range, skipping.")
 
     orientation = input("    Orientation landscape/portrait (blank to skip): ").strip()
     if orientation in ORIENTATIONS:
@@ -120,9 +135,12 @@ def collect_label_overrides() -> dict:
     show = input("    Show fastener icon? y/n (blank to skip): ").strip().lower()
     if show == "n":
         overrides["show_fastener"] = False
-        hw = input("    Hardware type none/nut (blank to skip): ").strip()
+        print(f"    Hardware types: {', '.join(HARDWARE_TYPES)}")
+        hw = input("    Hardware type (blank to skip): ").strip()
         if hw in HARDWARE_TYPES:
             overrides["hardware"] = hw
+        elif hw:
+            print("      Unrecognised hardware type, skipping.")
 
     font_size = input("    Font size in mm (blank to skip): ").strip()
     if font_size:
@@ -172,7 +190,13 @@ def main() -> None:
     fastener_orientation = prompt(
         "Icon orientation", default="landscape", choices=ORIENTATIONS
     )
+    font_style = prompt(
+        "Font style", default="ExtraBold", choices=FONT_STYLES
+    )
     font_size = prompt_float("Font size (mm)", default=4.5)
+    quality = prompt(
+        "Mesh quality", default="production", choices=list(QUALITY_PROFILES)
+    )
 
     defaults = {
         "fastener_head": fastener_head,
@@ -182,8 +206,9 @@ def main() -> None:
         "fastener_orientation": fastener_orientation,
         "fastener_scale": 1.0,
         "font": "Open Sans",
-        "font_style": "ExtraBold",
+        "font_style": font_style,
         "font_size": font_size,
+        "quality": quality,
     }
 
     # --- Labels ---
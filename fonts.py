@@ -0,0 +1,380 @@
+"""
+Minimal TrueType metrics reader for laying out label text in Python.
+
+Reads just enough of a .ttf to reproduce OpenSCAD's text() placement:
+the character map, advance widths, pair kerning from the GPOS ``kern``
+feature, glyph bounding boxes and which glyphs have no outline. Outlines
+themselves are never decoded; glyph shapes come from OpenSCAD.
+"""
+
+import bisect
+import struct
+from functools import lru_cache
+from pathlib import Path
+
+# OpenSCAD asks FreeType for a character size of ``size`` points at 100
+# dpi, so one em is size * 100/72 mm
+EM_PER_SIZE = 100 / 72
+
+STYLE_WEIGHTS = {
+    "thin": 100,
+    "extralight": 200,
+    "light": 300,
+    "regular": 400,
+    "medium": 500,
+    "semibold": 600,
+    "bold": 700,
+    "extrabold": 800,
+    "black": 900,
+}
+
+_GPOS_PAIR = 2
+_GPOS_EXTENSION = 9
+
+
+def parse_style(style: str) -> tuple[int, bool]:
+    """Weight class and italic flag of an OpenSCAD style such as 'Bold Italic'."""
+    words = style.lower().split()
+    italic = "italic" in words or "oblique" in words
+    weight = next((STYLE_WEIGHTS[w] for w in words if w in STYLE_WEIGHTS), 400)
+    return weight, italic
+
+
+def _value_size(value_format: int) -> int:
+    return 2 * bin(value_format).count("1")
+
+
+def _x_advance(data: bytes, offset: int, value_format: int) -> int:
+    """XAdvance field of a GPOS ValueRecord (0 if absent)."""
+    if not value_format & 0x4:
+        return 0
+    skip = 2 * bin(value_format & 0x3).count("1")
+    return struct.unpack_from(">h", data, offset + skip)[0]
+
+
+class FontMetrics:
+    """Metrics of one TrueType/OpenType font file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._data = data = self.path.read_bytes()
+        num_tables = struct.unpack_from(">H", data, 4)[0]
+        self._tables = {}
+        for i in range(num_tables):
+            tag, _, offset, length = struct.unpack_from(">4sIII", data, 12 + 16 * i)
+            self._tables[tag.decode("latin-1")] = (offset, length)
+
+        head = self._tables["head"][0]
+        self.units_per_em = struct.unpack_from(">H", data, head + 18)[0]
+        long_loca = struct.unpack_from(">h", data, head + 50)[0] == 1
+        self.num_glyphs = struct.unpack_from(">H", data, self._tables["maxp"][0] + 4)[0]
+
+        num_metrics = struct.unpack_from(">H", data, self._tables["hhea"][0] + 34)[0]
+        hmtx = self._tables["hmtx"][0]
+        self._advances = [
+            struct.unpack_from(">H", data, hmtx + 4 * i)[0] for i in range(num_metrics)
+        ]
+
+        self._loca = None
+        if "loca" in self._tables:
+            loca = self._tables["loca"][0]
+            fmt, scale = (">I", 1) if long_loca else (">H", 2)
+            step = 4 if long_loca else 2
+            self._loca = [
+                struct.unpack_from(fmt, data, loca + step * i)[0] * scale
+                for i in range(self.num_glyphs + 1)
+            ]
+
+        self._cmap = self._read_cmap()
+        self.family, self.subfamily = self._read_names()
+        self.weight, self.italic = 400, False
+        if "OS/2" in self._tables:
+            os2 = self._tables["OS/2"][0]
+            self.weight = struct.unpack_from(">H", data, os2 + 4)[0]
+            self.italic = bool(struct.unpack_from(">H", data, os2 + 62)[0] & 1)
+
+        self._kern_subtables = self._read_kern_lookups()
+        self._kern_memo = {}
+
+    # -- tables ----------------------------------------------------------
+
+    def _read_cmap(self) -> dict[int, int]:
+        data = self._data
+        base = self._tables["cmap"][0]
+        count = struct.unpack_from(">H", data, base + 2)[0]
+        subtables = {}
+        for i in range(count):
+            platform, encoding, offset = struct.unpack_from(
+                ">HHI", data, base + 4 + 8 * i
+            )
+            subtables[(platform, encoding)] = base + offset
+
+        for key in ((3, 10), (0, 4), (3, 1), (0, 3)):
+            if key not in subtables:
+                continue
+            offset = subtables[key]
+            fmt = struct.unpack_from(">H", data, offset)[0]
+            if fmt == 12:
+                return self._read_cmap12(offset)
+            if fmt == 4:
+                return self._read_cmap4(offset)
+        raise ValueError(f"{self.path.name}: no Unicode character map")
+
+    def _read_cmap4(self, offset: int) -> dict[int, int]:
+        data = self._data
+        seg_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+        ends = offset + 14
+        starts = ends + 2 * seg_count + 2
+        deltas = starts + 2 * seg_count
+        range_offsets = deltas + 2 * seg_count
+        cmap = {}
+        for seg in range(seg_count):
+            end = struct.unpack_from(">H", data, ends + 2 * seg)[0]
+            start = struct.unpack_from(">H", data, starts + 2 * seg)[0]
+            delta = struct.unpack_from(">h", data, deltas + 2 * seg)[0]
+            ro_pos = range_offsets + 2 * seg
+            range_offset = struct.unpack_from(">H", data, ro_pos)[0]
+            for code in range(start, min(end, 0xFFFE) + 1):
+                if range_offset == 0:
+                    glyph = (code + delta) & 0xFFFF
+                else:
+                    pos = ro_pos + range_offset + 2 * (code - start)
+                    glyph = struct.unpack_from(">H", data, pos)[0]
+                    if glyph:
+                        glyph = (glyph + delta) & 0xFFFF
+                if glyph:
+                    cmap[code] = glyph
+        return cmap
+
+    def _read_cmap12(self, offset: int) -> dict[int, int]:
+        data = self._data
+        groups = struct.unpack_from(">I", data, offset + 12)[0]
+        cmap = {}
+        for i in range(groups):
+            start, end, glyph = struct.unpack_from(">III", data, offset + 16 + 12 * i)
+            for code in range(start, end + 1):
+                cmap[code] = glyph + code - start
+        return cmap
+
+    def _read_names(self) -> tuple[str, str]:
+        if "name" not in self._tables:
+            return self.path.stem, "Regular"
+        data = self._data
+        base = self._tables["name"][0]
+        count, strings = struct.unpack_from(">HH", data, base + 2)
+        names = {}
+        for i in range(count):
+            platform, _, _, name_id, length, offset = struct.unpack_from(
+                ">6H", data, base + 6 + 12 * i
+            )
+            if name_id not in (1, 2, 16, 17) or platform not in (1, 3):
+                continue
+            raw = data[base + strings + offset : base + strings + offset + length]
+            text = raw.decode("utf-16-be" if platform == 3 else "latin-1", "replace")
+            # Prefer the Windows entries, which are Unicode
+            if platform == 3 or name_id not in names:
+                names[name_id] = text
+        family = names.get(16) or names.get(1) or self.path.stem
+        subfamily = names.get(17) or names.get(2) or "Regular"
+        return family, subfamily
+
+    def _read_kern_lookups(self) -> list[list[int]]:
+        """Offsets of the pair adjustment subtables of each kern lookup."""
+        if "GPOS" not in self._tables:
+            return []
+        data = self._data
+        gpos = self._tables["GPOS"][0]
+        feature_list, lookup_list = struct.unpack_from(">HH", data, gpos + 6)
+        feature_list += gpos
+        lookup_list += gpos
+
+        indices = set()
+        count = struct.unpack_from(">H", data, feature_list)[0]
+        for i in range(count):
+            tag, offset = struct.unpack_from(">4sH", data, feature_list + 2 + 6 * i)
+            if tag != b"kern":
+                continue
+            feature = feature_list + offset
+            n = struct.unpack_from(">H", data, feature + 2)[0]
+            indices.update(struct.unpack_from(f">{n}H", data, feature + 4))
+
+        lookups = []
+        for index in sorted(indices):
+            offset = struct.unpack_from(">H", data, lookup_list + 2 + 2 * index)[0]
+            lookup = lookup_list + offset
+            kind, _, n = struct.unpack_from(">HHH", data, lookup)
+            subtables = []
+            for j in range(n):
+                sub = lookup + struct.unpack_from(">H", data, lookup + 6 + 2 * j)[0]
+                sub_kind = kind
+                if kind == _GPOS_EXTENSION:
+                    _, sub_kind, ext = struct.unpack_from(">HHI", data, sub)
+                    sub += ext
+                if sub_kind == _GPOS_PAIR:
+                    subtables.append(sub)
+            if subtables:
+                lookups.append(subtables)
+        return lookups
+
+    def _coverage(self, offset: int, glyph: int) -> int | None:
+        data = self._data
+        fmt, count = struct.unpack_from(">HH", data, offset)
+        if fmt == 1:
+            glyphs = struct.unpack_from(f">{count}H", data, offset + 4)
+            i = bisect.bisect_left(glyphs, glyph)
+            return i if i < count and glyphs[i] == glyph else None
+        for i in range(count):
+            start, end, index = struct.unpack_from(">HHH", data, offset + 4 + 6 * i)
+            if start <= glyph <= end:
+                return index + glyph - start
+        return None
+
+    def _class(self, offset: int, glyph: int) -> int:
+        data = self._data
+        fmt = struct.unpack_from(">H", data, offset)[0]
+        if fmt == 1:
+            start, count = struct.unpack_from(">HH", data, offset + 2)
+            if start <= glyph < start + count:
+                return struct.unpack_from(">H", data, offset + 6 + 2 * (glyph - start))[
+                    0
+                ]
+            return 0
+        count = struct.unpack_from(">H", data, offset + 2)[0]
+        for i in range(count):
+            start, end, cls = struct.unpack_from(">HHH", data, offset + 4 + 6 * i)
+            if start <= glyph <= end:
+                return cls
+        return 0
+
+    def _pair_value(self, sub: int, left: int, right: int) -> int | None:
+        """Kerning from one PairPos subtable, or None if it does not apply."""
+        data = self._data
+        fmt, coverage, vf1, vf2 = struct.unpack_from(">HHHH", data, sub)
+        index = self._coverage(sub + coverage, left)
+        if index is None:
+            return None
+        record = _value_size(vf1) + _value_size(vf2)
+
+        if fmt == 1:
+            pair_set = sub + struct.unpack_from(">H", data, sub + 10 + 2 * index)[0]
+            count = struct.unpack_from(">H", data, pair_set)[0]
+            for i in range(count):
+                pos = pair_set + 2 + i * (2 + record)
+                if struct.unpack_from(">H", data, pos)[0] == right:
+                    return _x_advance(data, pos + 2, vf1)
+            return None
+
+        class_def1, class_def2, _, class2_count = struct.unpack_from(
+            ">HHHH", data, sub + 8
+        )
+        c1 = self._class(sub + class_def1, left)
+        c2 = self._class(sub + class_def2, right)
+        pos = sub + 16 + (c1 * class2_count + c2) * record
+        return _x_advance(data, pos, vf1)
+
+    # -- queries ---------------------------------------------------------
+
+    def glyph_id(self, char: str) -> int:
+        return self._cmap.get(ord(char), 0)
+
+    def advance(self, glyph: int) -> int:
+        """Advance width in font units."""
+        return self._advances[min(glyph, len(self._advances) - 1)]
+
+    def kerning(self, left: int, right: int) -> int:
+        """Pair adjustment in font units applied after ``left``."""
+        key = (left, right)
+        if key not in self._kern_memo:
+            total = 0
+            for subtables in self._kern_subtables:
+                for sub in subtables:
+                    value = self._pair_value(sub, left, right)
+                    if value is not None:
+                        total += value
+                        break  # first matching subtable wins within a lookup
+            self._kern_memo[key] = total
+        return self._kern_memo[key]
+
+    def is_blank(self, char: str) -> bool:
+        """True for characters with no outline (spaces and the like)."""
+        glyph = self.glyph_id(char)
+        if self._loca is None:
+            return char.isspace()
+        return self._loca[glyph] == self._loca[glyph + 1]
+
+    def glyph_box(self, char: str) -> tuple[int, int, int, int]:
+        """xMin, yMin, xMax, yMax of a glyph's outline in font units."""
+        glyph = self.glyph_id(char)
+        if "glyf" not in self._tables or self.is_blank(char):
+            return 0, 0, 0, 0
+        offset = self._tables["glyf"][0] + self._loca[glyph]
+        return struct.unpack_from(">4h", self._data, offset + 2)
+
+    def ink_bounds(
+        self, text: str, size: float
+    ) -> tuple[float, float, float, float] | None:
+        """
+        (x_min, y_min, x_max, y_max) in mm of the outlines of ``text`` laid
+        out by ``layout``, from the baseline origin; None if all blank.
+        """
+        scale = size * EM_PER_SIZE / self.units_per_em
+        placed, _ = self.layout(text, size)
+        boxes = [
+            (x + box[0] * scale, box[1] * scale, x + box[2] * scale, box[3] * scale)
+            for char, x in placed
+            if not self.is_blank(char)
+            for box in [self.glyph_box(char)]
+        ]
+        if not boxes:
+            return None
+        return (
+            min(b[0] for b in boxes),
+            min(b[1] for b in boxes),
+            max(b[2] for b in boxes),
+            max(b[3] for b in boxes),
+        )
+
+    def layout(self, text: str, size: float) -> tuple[list[tuple[str, float]], float]:
+        """
+        Pen positions for ``text`` at an OpenSCAD text size.
+
+        Returns ([(char, x_mm), ...], total advance in mm), as OpenSCAD's
+        text() would place the glyphs with halign="left".
+        """
+        scale = size * EM_PER_SIZE / self.units_per_em
+        placed = []
+        pen = 0
+        previous = None
+        for char in text:
+            glyph = self.glyph_id(char)
+            if previous is not None:
+                pen += self.kerning(previous, glyph)
+            placed.append((char, pen * scale))
+            pen += self.advance(glyph)
+            previous = glyph
+        return placed, pen * scale
+
+
+@lru_cache(maxsize=None)
+def _load(path: Path) -> FontMetrics:
+    return FontMetrics(path)
+
+
+@lru_cache(maxsize=None)
+def find_font(fonts_dir: Path, family: str, style: str) -> FontMetrics | None:
+    """
+    The bundled font that best matches an OpenSCAD ``family:style``,
+    choosing the nearest weight as fontconfig does, or None.
+    """
+    weight, italic = parse_style(style)
+    candidates = []
+    for path in sorted(Path(fonts_dir).glob("*.[ot]tf")):
+        try:
+            font = _load(path)
+        except (ValueError, KeyError, struct.error):
+            continue
+        if font.family.lower() == family.lower():
+            candidates.append(font)
+    if not candidates:
+        return None
+    return min(candidates, key=lambda f: (f.italic != italic, abs(f.weight - weight)))
@@ -16,28 +16,133 @@ Usage:
     python generate_labels.py --label M2x10   # Generate specific label
     python generate_labels.py --test       # Test with one label
     python generate_labels.py --workers 4  # Specify number of threads
+    python generate_labels.py -j 4 --render-threads 2  # 4 OpenSCADs x 2 cores
+    python generate_labels.py --no-cache   # Ignore cached OpenSCAD renders
+    python generate_labels.py --single-pass  # One OpenSCAD run per label
+    python generate_labels.py --text-backend glyphs  # Compose text from glyphs
+    python generate_labels.py --pack all.3mf # Also pack labels onto plates
+    python generate_labels.py --incremental  # Skip labels that are up to date
+    python generate_labels.py --trace t.json # Chrome trace of every stage
+    python generate_labels.py --timeout 60   # Fixed instead of learned timeouts
+    python generate_labels.py --serve 7341   # Queue renders for remote workers
+    python generate_labels.py --worker host:7341  # Render for a coordinator
+    python generate_labels.py --bundle - | upload  # Stream a tar of all labels
+    python generate_labels.py --labels catalog.csv  # Labels from JSONL/CSV
+    python generate_labels.py --auto-fit     # Size text and icons to fit
 """
 
 import argparse
 import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import io
+import itertools
 import json
 import os
+import platform
 import shutil
-import subprocess
+import signal
 import sys
 import tempfile
+import threading
 import time
 import zipfile
 from pathlib import Path
-from xml.etree import ElementTree as ET
+from typing import BinaryIO
+
+from autofit import fit_label
+from bundle import BUNDLE_FORMATS, Bundle
+from cost_model import COST_MODEL, COST_MODEL_NAME, label_features
+from fonts import find_font
+from icons import IconLibrary, icon_variants, library_root, variant_name
+from label_source import LABEL_SOURCE_SUFFIXES, iter_labels, read_labels
+from layout import place_text, text_anchor, text_style
+from manifest import Manifest, label_fingerprint
+from mesh import Mesh
+from packing import (
+    DEFAULT_PLATE_SIZE,
+    DEFAULT_SPACING,
+    parse_plate_size,
+    write_packed_project,
+)
+from preview import render_png
+from quality import QUALITY_PROFILES, quality_variables, simplify
+from render_cache import (
+    DEFAULT_MAX_BYTES,
+    RenderCache,
+    default_cache_dir,
+    fonts_digest,
+    source_digest,
+)
+from runner import (
+    DEFAULT_JOB_TIMEOUT,
+    MEMORY_BUDGET_FRACTION,
+    RUNNER,
+    DeadlineExceeded,
+    RunCancelled,
+    RunTimeout,
+    memory_budget,
+    usable_cpus,
+)
+from scad_schema import check_label_config
+from scheduler import CpuBudget, DagScheduler, Task
+from tracing import TRACER, current_label, label_stage, span
+from threemf import (
+    MODEL_PATH,
+    PACKAGE_PARTS,
+    THUMBNAIL_PATH,
+    ModelReader,
+    ModelWriter,
+    bambu_model_settings,
+    bambu_plate_config,
+    copy_entries,
+    count_elements,
+    write_package_parts,
+)
+from work_queue import (
+    DEFAULT_HOST,
+    DEFAULT_IN_FLIGHT,
+    WORK_QUEUE,
+    parse_address,
+    work,
+)
 
 # Script directory
 SCRIPT_DIR = Path(__file__).parent.resolve()
-
-# XML namespaces used in 3MF
-NS_3MF = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
-NS_MATERIAL = "http://schemas.microsoft.com/3dmanufacturing/material/2015/02"
-NS_PRODUCTION = "http://schemas.microsoft.com/3dmanufacturing/production/2015/06"
+FONTS_DIR = SCRIPT_DIR / "fonts"
+
+
+# Per-label keys that may override the config defaults
+LABEL_OVERRIDE_KEYS = [
+    "fastener_head",
+    "fastener_shaft",
+    "fastener_threads",
+    "fastener_driver",
+    "fastener_orientation",
+    "fastener_scale",
+    "font_size",
+    "text2",
+    "show_fastener",
+    "hardware",
+    "hardware_scale",
+    "label_width",
+    "offset_xy",
+    "gridfinity",
+    "backward_compatible",
+    "text_align",
+    "text_xy",
+    "auto_fit",
+]
+
+# Config keys (and their labels.scad variables) that shape the label base.
+# The Export_Mode="base" render depends on nothing else but the quality.
+BASE_GEOMETRY_KEYS = {
+    "label_width": "label_width",
+    "offset_xy": "offset_xy",
+    "gridfinity": "gridfinity",
+    "backward_compatible": "backward_compatible",
+}
 
 
 def load_config(config_path: Path) -> dict:
@@ -46,27 +151,83 @@ def load_config(config_path: Path) -> dict:
         return json.load(f)
 
 
-def generate_openscad_3mf(
-    openscad_path: str,
-    scad_file: Path,
-    output_file: Path,
-    text: str,
-    text2: str,
-    export_mode: str,  # "base" or "text"
-    label_config: dict,  # merged defaults + per-label overrides
-) -> bool:
+def merge_label_config(label: dict, config: dict) -> dict:
+    """Merge config defaults with the per-label overrides."""
+    label_config = {**config["defaults"]}
+    for key in LABEL_OVERRIDE_KEYS:
+        if key in label:
+            label_config[key] = label[key]
+    return label_config
+
+
+def validate_labels(labels, config: dict) -> list[str]:
     """
-    Generate 3MF file using OpenSCAD.
+    Check the defaults and every label against labels.scad's schema, and
+    return all the problems found. A label's problems are only those of
+    the keys it sets itself, so a bad default is reported once. Names
+    must be unique: outputs, intermediates and tasks are named after them.
     """
-    # Build OpenSCAD command with variable overrides
-    cmd = [
-        openscad_path,
-        "-o",
-        str(output_file),
-        # Enable experimental features for proper 3MF export
-        "--enable=lazy-union",
-        "--enable=manifold",
-        # Override variables for this specific label
+    defaults = config["defaults"]
+    errors = [
+        f"defaults: {key}: {problem}"
+        for key, problem in check_label_config(defaults).items()
+        if key in defaults
+    ]
+    seen = set()
+    duplicates = set()
+    try:
+        for label in labels:
+            if label["name"] in seen and label["name"] not in duplicates:
+                duplicates.add(label["name"])
+                errors.append(f"{label['name']}: duplicate name")
+            seen.add(label["name"])
+            label_config = merge_label_config(label, config)
+            for key, problem in check_label_config(label_config).items():
+                if key in label or key not in defaults:
+                    errors.append(f"{label['name']}: {key}: {problem}")
+            if not isinstance(label["text"], str):
+                errors.append(f"{label['name']}: text: expected a string")
+    except (ValueError, OSError) as e:
+        # A malformed label source ends the check where it goes wrong
+        errors.append(str(e))
+    return errors
+
+
+def scad_value(value) -> str:
+    """Format a Python value as an OpenSCAD literal."""
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, str):
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        return f'"{escaped}"'
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(scad_value(v) for v in value) + "]"
+    return str(value)
+
+
+def base_geometry_defines(label_config: dict) -> list[str]:
+    """
+    -D overrides for the base-shaping variables set in label_config, and
+    for its quality profile.
+    """
+    args = []
+    for key, variable in BASE_GEOMETRY_KEYS.items():
+        if key in label_config:
+            args += ["-D", f"{variable}={scad_value(label_config[key])}"]
+    return args + quality_defines(label_config)
+
+
+def base_geometry_key(label_config: dict) -> tuple:
+    """Hashable identity of the label base; equal keys render equal bases."""
+    return tuple(
+        json.dumps(label_config.get(key), sort_keys=True)
+        for key in [*BASE_GEOMETRY_KEYS, "quality"]
+    )
+
+
+def openscad_defines(text: str, text2: str, label_config: dict) -> list[str]:
+    """Build the -D variable overrides shared by every export of a label."""
+    return [
         "-D",
         f'Text1="{text}"',
         "-D",
@@ -95,41 +256,638 @@ def generate_openscad_3mf(
         f'Text1_Font_Style="{label_config["font_style"]}"',
         "-D",
         f"Text1_Font_Size={label_config['font_size']}",
+        *text_placement_defines(label_config),
         "-D",
         "label_surface=02",  # Flush mode for multi-color
+        *base_geometry_defines(label_config),
+    ]
+
+
+def text_placement_defines(label_config: dict) -> list[str]:
+    """-D overrides for Text1 alignment and nudge, when configured."""
+    args = []
+    if "text_align" in label_config:
+        args += ["-D", f"Text1_Align={scad_value(label_config['text_align'])}"]
+    if "text_xy" in label_config:
+        args += ["-D", f"Text1_XY={scad_value(label_config['text_xy'])}"]
+    return args
+
+
+def quality_defines(label_config: dict) -> list[str]:
+    """-D overrides for $fs/$fa/$fn from the label's quality profile."""
+    args = []
+    for variable, value in quality_variables(label_config).items():
+        args += ["-D", f"{variable}={scad_value(value)}"]
+    return args
+
+
+def openscad_env() -> dict:
+    """Environment for OpenSCAD with the bundled fonts on the font path."""
+    env = os.environ.copy()
+    fonts_dir = FONTS_DIR
+    if fonts_dir.exists():
+        # Add to existing path or create new
+        if "OPENSCAD_FONT_PATH" in env:
+            env["OPENSCAD_FONT_PATH"] = f"{fonts_dir}:{env['OPENSCAD_FONT_PATH']}"
+        else:
+            env["OPENSCAD_FONT_PATH"] = str(fonts_dir)
+    return env
+
+
+def run_openscad(
+    openscad_path: str,
+    scad_file: Path,
+    output_file: Path,
+    args: list[str],
+    cache: RenderCache | None = None,
+    error_prefix: str = "OpenSCAD",
+    cpus: CpuBudget | None = None,
+    timeout: float | None = None,
+    remote: dict | None = None,
+    usage: dict | None = None,
+) -> tuple[bool, str]:
+    """
+    Run OpenSCAD to produce output_file, serving it from cache when possible.
+    With a CPU budget the process is pinned to its own set of cores.
+    ``timeout`` defaults to the cost model's prediction for the current
+    label, or else the runner's per-job timeout. While serving a work
+    queue, runs that come with a ``remote`` job spec go to the workers.
+    ``usage`` receives a local run's measurements (see ProcessRunner.run).
+    """
+    mode = "preview" if output_file.suffix == ".png" else "all"
+    for arg in args:
+        if arg.startswith("Export_Mode="):
+            mode = arg.partition("=")[2].strip('"')
+    if timeout is None:
+        timeout = COST_MODEL.timeout(current_label.get(), mode)
+
+    with span("openscad", mode=mode) as info:
+        key = None
+        if cache is not None:
+            # The output path is excluded from the key, the format is not
+            key = cache.key(
+                openscad_path,
+                scad_file,
+                [output_file.suffix, *args, scad_file.name],
+                FONTS_DIR,
+            )
+            if cache.fetch(key, output_file):
+                info["status"] = "cache hit"
+                return True, None
+
+        cmd = [openscad_path, "-o", str(output_file), *args, str(scad_file)]
+
+        def on_stderr(line: str) -> None:
+            if line.startswith("WARNING"):
+                info["warnings"] = info.get("warnings", 0) + 1
+
+        try:
+            if remote is not None and WORK_QUEUE.serving:
+                ok, msg, seconds, worker = WORK_QUEUE.run(
+                    remote, output_file, timeout or RUNNER.job_timeout
+                )
+                info["status"] = "remote" if ok else "failed"
+                info["host"] = worker
+                if not ok:
+                    return False, f"{msg} (on {worker})" if worker else msg
+                # The span also covers queueing; learn the worker's own time
+                COST_MODEL.observe_label(current_label.get(), mode, seconds)
+            else:
+                env = openscad_env()
+                # Admitted once its learned peak memory fits the budget
+                expected = COST_MODEL.label_predict(current_label.get(), f"rss:{mode}")
+                usage = {} if usage is None else usage
+                with cpus.acquire() if cpus else contextlib.nullcontext() as cpu_set:
+                    if cpus is not None:
+                        env.update(cpus.env())
+                    returncode, stderr = RUNNER.run(
+                        cmd,
+                        env,
+                        timeout,
+                        cpu_set,
+                        on_stderr,
+                        memory=expected and expected * 2**20,
+                        usage=usage,
+                    )
+
+                info["status"] = returncode
+                # The span also covers admission and CPU waits; learn the
+                # process's own time
+                if "seconds" in usage:
+                    info["run_seconds"] = usage["seconds"]
+                if usage.get("peak_rss"):
+                    info["peak_rss"] = usage["peak_rss"]
+                if returncode == -signal.SIGKILL:
+                    # Not our timeout or cancel, so most likely the OOM killer
+                    peak = usage.get("peak_rss", 0) / 2**20
+                    return False, (
+                        f"{error_prefix} was killed (out of memory? "
+                        f"peak {peak:.0f} MB); lower --memory-budget"
+                    )
+                if returncode != 0:
+                    return False, f"{error_prefix} error: {stderr}"
+
+            if not output_file.exists():
+                return False, "Output file not created"
+
+            if cache is not None:
+                cache.store(key, output_file)
+
+            return True, None
+
+        except RunTimeout as e:
+            info["status"] = "timeout"
+            return False, f"{error_prefix} {e}"
+        except DeadlineExceeded as e:
+            info["status"] = "deadline"
+            return False, f"{error_prefix}: {e}"
+        except RunCancelled as e:
+            info["status"] = "cancelled"
+            return False, str(e)
+        except Exception as e:
+            info["status"] = "error"
+            return False, str(e)
+
+
+def generate_openscad_3mf(
+    openscad_path: str,
+    scad_file: Path,
+    output_file: Path,
+    text: str,
+    text2: str,
+    export_mode: str,  # "base" or "text"
+    label_config: dict,  # merged defaults + per-label overrides
+    cache: RenderCache | None = None,
+    cpus: CpuBudget | None = None,
+    timeout: float | None = None,
+    usage: dict | None = None,
+) -> tuple[bool, str]:
+    """
+    Generate 3MF file using OpenSCAD, or have a worker generate it when
+    serving a work queue.
+    """
+    args = [
+        # Enable experimental features for proper 3MF export
+        "--enable=lazy-union",
+        "--enable=manifold",
+        # Override variables for this specific label
+        *openscad_defines(text, text2, label_config),
         "-D",
         f'Export_Mode="{export_mode}"',  # base or text
-        str(scad_file),
     ]
+    remote = {
+        "label": current_label.get(),
+        "text": text,
+        "text2": text2,
+        "export_mode": export_mode,
+        "label_config": label_config,
+    }
+    return run_openscad(
+        openscad_path,
+        scad_file,
+        output_file,
+        args,
+        cache,
+        cpus=cpus,
+        timeout=timeout,
+        remote=remote,
+        usage=usage,
+    )
 
-    try:
-        # Set font path environment variable
-        env = os.environ.copy()
-        fonts_dir = SCRIPT_DIR / "fonts"
-        if fonts_dir.exists():
-            # Add to existing path or create new
-            if "OPENSCAD_FONT_PATH" in env:
-                env["OPENSCAD_FONT_PATH"] = f"{fonts_dir}:{env['OPENSCAD_FONT_PATH']}"
-            else:
-                env["OPENSCAD_FONT_PATH"] = str(fonts_dir)
 
-        # Reduced timeout for parallel execution
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=180, env=env
-        )
+def generate_base_3mf(
+    openscad_path: str,
+    scad_file: Path,
+    output_file: Path,
+    label_config: dict,
+    cache: RenderCache | None = None,
+    cpus: CpuBudget | None = None,
+) -> tuple[bool, str]:
+    """
+    Generate the label base 3MF. Only base geometry settings are passed,
+    so every label with the same base produces an identical command.
+    """
+    args = [
+        "--enable=lazy-union",
+        "--enable=manifold",
+        *base_geometry_defines(label_config),
+        "-D",
+        "label_surface=02",
+        "-D",
+        'Export_Mode="base"',
+    ]
+    return run_openscad(openscad_path, scad_file, output_file, args, cache, cpus=cpus)
 
-        if result.returncode != 0:
-            return False, f"OpenSCAD error: {result.stderr}"
 
-        if not output_file.exists():
-            return False, "Output file not created"
+class SharedBaseRenderer:
+    """
+    Renders each distinct label base once per run and hands the same 3MF
+    to every label that shares it. Safe to call from worker threads; the
+    first caller for a base renders it while the others wait.
+    """
+
+    def __init__(
+        self,
+        openscad_path: str,
+        scad_file: Path,
+        work_dir: Path,
+        cache: RenderCache | None = None,
+        cpus: CpuBudget | None = None,
+    ):
+        self.openscad_path = openscad_path
+        self.scad_file = scad_file
+        self.work_dir = work_dir
+        self.cache = cache
+        self.cpus = cpus
+        self.renders = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _entry(self, label_config: dict) -> dict:
+        key = base_geometry_key(label_config)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = {
+                    "lock": threading.Lock(),
+                    "path": self.work_dir / f"base_{len(self._entries)}.3mf",
+                    "result": None,
+                }
+            return self._entries[key]
+
+    def path_for(self, label_config: dict) -> Path:
+        """Where the base for this label's geometry is (or will be) written."""
+        return self._entry(label_config)["path"]
+
+    def get(self, label_config: dict) -> tuple[bool, Path | str]:
+        """Return (True, base_3mf) or (False, error message)."""
+        entry = self._entry(label_config)
+
+        with entry["lock"]:
+            if entry["result"] is None:
+                base_3mf = entry["path"]
+                ok, msg = generate_base_3mf(
+                    self.openscad_path,
+                    self.scad_file,
+                    base_3mf,
+                    label_config,
+                    self.cache,
+                    self.cpus,
+                )
+                with self._lock:
+                    self.renders += 1
+                entry["result"] = (True, base_3mf) if ok else (False, msg)
+            return entry["result"]
+
+
+# Distance between label origins in a batch file, along Y
+BATCH_PITCH = 20.0
+
+
+def batch_module_args(text: str, text2: str, label_config: dict) -> str:
+    """cullenect_label_generate() arguments for one label of a batch file."""
+    args = {
+        "showFastener": label_config.get("show_fastener", True),
+        "fastenerHead": label_config["fastener_head"],
+        "fastenerShaft": label_config["fastener_shaft"],
+        "fastenerThreads": label_config["fastener_threads"],
+        "fastenerDriver": label_config["fastener_driver"],
+        "fastenerOrientation": label_config.get("fastener_orientation", "landscape"),
+        "fastenerScale": label_config.get("fastener_scale", 1.0),
+        "hardwareScale": label_config.get("hardware_scale", 1.0),
+        "hardware": label_config.get("hardware", "none"),
+        "text1": text,
+        "text1Font": label_config["font"],
+        "text1FontStyle": label_config["font_style"],
+        "text1FontSize": label_config["font_size"],
+        "text1Align": label_config.get("text_align", "left"),
+        "text1XY": label_config.get("text_xy", [0, 0]),
+        "text2": text2,
+    }
+    return ", ".join(f"{name}={scad_value(value)}" for name, value in args.items())
+
+
+class LabelBatch:
+    """
+    Several labels rendered by one OpenSCAD run, to pay process start-up,
+    parsing labels.scad and font loading once per batch instead of once
+    per label.
+
+    A generated wrapper includes labels.scad (with Batch=true, so it draws
+    nothing itself) and instantiates cullenect_label_generate once per
+    label, BATCH_PITCH apart. Lazy-union keeps every part a separate
+    object; they are split back out per label in emission order and moved
+    back to the origin. Labels in a batch must share their base geometry
+    and quality, which are passed as -D overrides.
+
+    If the batch fails, ``get`` reports it and the label renders alone.
+    """
 
+    def __init__(
+        self,
+        openscad_path: str,
+        scad_file: Path,
+        work_dir: Path,
+        export_mode: str,  # "lettering" or "all"
+        jobs: list["LabelJob"],
+        cache: RenderCache | None = None,
+        cpus: CpuBudget | None = None,
+    ):
+        self.openscad_path = openscad_path
+        self.scad_file = scad_file
+        self.work_dir = work_dir
+        self.export_mode = export_mode
+        self.jobs = jobs
+        self.cache = cache
+        self.cpus = cpus
+        self.task = None
+        self._result = None
+        self._meshes = {}
+
+    def wrapper_source(self) -> str:
+        """The generated .scad that draws every label of the batch."""
+        lines = [
+            f"// {len(self.jobs)} labels batched by generate_labels.py",
+            f"include <{self.scad_file.resolve()}>",
+        ]
+        for i, job in enumerate(self.jobs):
+            args = batch_module_args(job.text, job.text2, job.label_config)
+            lines.append(
+                f"cullenect_label_generate({args}, origin=[0, {i * BATCH_PITCH}, 0]);"
+            )
+        return "\n".join(lines) + "\n"
+
+    def render(self) -> tuple[bool, str]:
+        """Render and split the batch. Always succeeds as a task; see get()."""
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"batch_{self.jobs[0].name}"
+        wrapper = self.work_dir / f"{stem}.scad"
+        batch_3mf = self.work_dir / f"{stem}.3mf"
+        wrapper.write_text(self.wrapper_source(), encoding="utf-8")
+
+        args = [
+            "--enable=lazy-union",
+            "--enable=manifold",
+            *base_geometry_defines(self.jobs[0].label_config),
+            "-D",
+            "label_surface=02",
+            "-D",
+            f"Export_Mode={scad_value(self.export_mode)}",
+            "-D",
+            "Batch=true",
+        ]
+        self._result = (False, "Batch not rendered")
+        try:
+            ok, msg = run_openscad(
+                self.openscad_path,
+                wrapper,
+                batch_3mf,
+                args,
+                self.cache,
+                error_prefix="OpenSCAD batch",
+                cpus=self.cpus,
+                timeout=sum(
+                    COST_MODEL.timeout(job.name, self.export_mode) or RUNNER.job_timeout
+                    for job in self.jobs
+                ),
+            )
+            if ok:
+                try:
+                    ok, msg = self._split(batch_3mf)
+                except (zipfile.BadZipFile, KeyError, ValueError, OSError) as e:
+                    # A truncated or malformed batch; its labels render alone
+                    ok, msg = False, f"Unreadable batch 3MF: {e}"
+            self._result = (ok, msg)
+        finally:
+            batch_3mf.unlink(missing_ok=True)
+            wrapper.unlink(missing_ok=True)
         return True, None
 
-    except subprocess.TimeoutExpired:
-        return False, "OpenSCAD timed out"
-    except Exception as e:
-        return False, str(e)
+    def _split(self, batch_3mf: Path) -> tuple[bool, str]:
+        parts_per_label = 2 if self.export_mode == "all" else 1
+        with (
+            span("split"),
+            zipfile.ZipFile(batch_3mf) as zf,
+            zf.open(MODEL_PATH) as fp,
+        ):
+            meshes = [
+                Mesh.from_chunks(chunks) for _, chunks in ModelReader(fp).objects()
+            ]
+        expected = parts_per_label * len(self.jobs)
+        if len(meshes) != expected:
+            return False, (
+                f"Expected {expected} objects, found {len(meshes)} "
+                "(does this OpenSCAD support --enable=lazy-union?)"
+            )
+        for i, job in enumerate(self.jobs):
+            parts = meshes[i * parts_per_label : (i + 1) * parts_per_label]
+            self._meshes[job.name] = [
+                mesh.translated(0, -i * BATCH_PITCH, 0) for mesh in parts
+            ]
+        return True, None
+
+    @property
+    def failed(self) -> bool:
+        return self._result is not None and not self._result[0]
+
+    def get(self, name: str) -> tuple[bool, list[Mesh] | str]:
+        """A label's parts (lettering, or base and text), once rendered."""
+        ok, msg = self._result or (False, "Batch not rendered")
+        if not ok:
+            return False, msg
+        return True, self._meshes.pop(name)
+
+
+def plan_batches(
+    jobs: list["LabelJob"],
+    batch_size: int,
+    export_mode: str,
+    work_dir: Path,
+    cache: RenderCache | None = None,
+    cpus: CpuBudget | None = None,
+) -> list[LabelBatch]:
+    """
+    Group jobs that render ``export_mode`` through OpenSCAD into batches
+    of up to ``batch_size`` labels sharing base geometry and quality, and
+    attach each job to its batch.
+    """
+    open_batches = {}
+    batches = []
+    for job in jobs:
+        if export_mode == "lettering" and not job.renders_lettering():
+            continue
+        key = base_geometry_key(job.label_config)
+        members = open_batches.setdefault(key, [])
+        members.append(job)
+        if len(members) == batch_size:
+            batches.append(members)
+            del open_batches[key]
+    batches.extend(open_batches.values())
+
+    result = []
+    for members in batches:
+        if len(members) < 2:
+            continue
+        batch = LabelBatch(
+            members[0].openscad_path,
+            members[0].scad_file,
+            work_dir,
+            export_mode,
+            members,
+            cache,
+            cpus,
+        )
+        for job in members:
+            job.batch = batch
+        result.append(batch)
+    return result
+
+
+def generate_glyph_3mf(
+    openscad_path: str,
+    scad_file: Path,
+    output_file: Path,
+    char: str,
+    style: dict,
+    quality: dict | None = None,
+    cache: RenderCache | None = None,
+    cpus: CpuBudget | None = None,
+) -> tuple[bool, str]:
+    """Render one character at the origin, for the glyph text backend."""
+    args = [
+        "--enable=manifold",
+        "-D",
+        f"Glyph={scad_value(char)}",
+        "-D",
+        f"Text1_Font={scad_value(style['font'])}",
+        "-D",
+        f"Text1_Font_Style={scad_value(style['font_style'])}",
+        "-D",
+        f"Text1_Font_Size={style['font_size']}",
+    ]
+    for variable, value in (quality or {}).items():
+        args += ["-D", f"{variable}={scad_value(value)}"]
+    return run_openscad(openscad_path, scad_file, output_file, args, cache, cpus=cpus)
+
+
+class GlyphTextRenderer:
+    """
+    Text backend that renders each distinct glyph once per run and
+    composes every label's lettering from them in Python, laid out with
+    the bundled font's advance widths and kerning. Safe to call from
+    worker threads.
+    """
+
+    def __init__(
+        self,
+        openscad_path: str,
+        scad_file: Path,
+        work_dir: Path,
+        cache: RenderCache | None = None,
+        cpus: CpuBudget | None = None,
+    ):
+        self.openscad_path = openscad_path
+        self.scad_file = scad_file
+        self.work_dir = work_dir
+        self.cache = cache
+        self.cpus = cpus
+        self.glyph_renders = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _once(self, key: tuple, produce) -> tuple[bool, Mesh | str]:
+        # First caller for a key produces it while the others wait
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = {
+                    "lock": threading.Lock(),
+                    "path": self.work_dir / f"part_{len(self._entries)}.3mf",
+                    "result": None,
+                }
+            entry = self._entries[key]
+        with entry["lock"]:
+            if entry["result"] is None:
+                path = entry["path"]
+                ok, msg = produce(path)
+                entry["result"] = (True, Mesh.from_3mf(path)) if ok else (False, msg)
+                path.unlink(missing_ok=True)
+            return entry["result"]
+
+    def glyph(
+        self, char: str, style: dict, quality: dict | None = None
+    ) -> tuple[bool, Mesh | str]:
+        quality = quality or {}
+        key = (
+            "glyph",
+            char,
+            style["font"],
+            style["font_style"],
+            style["font_size"],
+            *sorted(quality.items()),
+        )
+
+        def produce(path):
+            with self._lock:
+                self.glyph_renders += 1
+            return generate_glyph_3mf(
+                self.openscad_path,
+                self.scad_file,
+                path,
+                char,
+                style,
+                quality,
+                self.cache,
+                self.cpus,
+            )
+
+        return self._once(key, produce)
+
+    def supports(self, text: str, text2: str, label_config: dict) -> bool:
+        """Whether every line's font is bundled, so its metrics are known."""
+        for slot, line in ((1, text), (2, text2)):
+            style = text_style(label_config, slot)
+            if (
+                line
+                and find_font(FONTS_DIR, style["font"], style["font_style"]) is None
+            ):
+                return False
+        return True
+
+    def lettering(
+        self, text: str, text2: str, label_config: dict
+    ) -> tuple[bool, Mesh | str]:
+        """Text1 and Text2 composed from glyphs, in label space."""
+        lines = []
+        quality = quality_variables(label_config)
+        for slot, line in ((1, text), (2, text2)):
+            if not line:
+                continue
+            style = text_style(label_config, slot)
+            metrics = find_font(FONTS_DIR, style["font"], style["font_style"])
+            glyphs = {}
+            for char in set(line):
+                if metrics.is_blank(char):
+                    continue
+                ok, mesh = self.glyph(char, style, quality)
+                if not ok:
+                    return False, f"Glyph {char!r}: {mesh}"
+                glyphs[char] = mesh
+            anchor = text_anchor(label_config, slot)
+            lines.append(place_text(line, metrics, style, anchor, glyphs.__getitem__))
+        return True, Mesh.merge(lines)
+
+
+def generate_icon_3mf(
+    openscad_path: str,
+    scad_file: Path,
+    output_file: Path,
+    variant: dict,
+    cpus: CpuBudget | None = None,
+) -> tuple[bool, str]:
+    """Render one icon library variant at the origin."""
+    args = ["--enable=manifold"]
+    for variable, value in variant.items():
+        args += ["-D", f"{variable}={scad_value(value)}"]
+    return run_openscad(openscad_path, scad_file, output_file, args, cpus=cpus)
 
 
 def generate_preview_png(
@@ -139,265 +897,193 @@ def generate_preview_png(
     text: str,
     text2: str,
     label_config: dict,
+    cache: RenderCache | None = None,
+    cpus: CpuBudget | None = None,
 ) -> tuple[bool, str]:
     """Generate a PNG preview using the same label settings."""
-    cmd = [
-        openscad_path,
-        "-o",
-        str(output_file),
+    args = [
         "--autocenter",
         "--viewall",
         "--projection=ortho",
         "--imgsize=1400,420",
-        "-D",
-        f'Text1="{text}"',
-        "-D",
-        f'Text2="{text2}"',
-        "-D",
-        f'Fastener_Head="{label_config["fastener_head"]}"',
-        "-D",
-        f'Fastener_Shaft="{label_config["fastener_shaft"]}"',
-        "-D",
-        f'Fastener_Threads="{label_config["fastener_threads"]}"',
-        "-D",
-        f'Fastener_Driver="{label_config["fastener_driver"]}"',
-        "-D",
-        f'Fastener_Orientation="{label_config.get("fastener_orientation", "landscape")}"',
-        "-D",
-        f"Fastener_Scale={label_config.get('fastener_scale', 1.0)}",
-        "-D",
-        f"Show_Fastener={str(label_config.get('show_fastener', True)).lower()}",
-        "-D",
-        f'Select_Hardware="{label_config.get("hardware", "none")}"',
-        "-D",
-        f"Hardware_Scale={label_config.get('hardware_scale', 1.0)}",
-        "-D",
-        f'Text1_Font="{label_config["font"]}"',
-        "-D",
-        f'Text1_Font_Style="{label_config["font_style"]}"',
-        "-D",
-        f"Text1_Font_Size={label_config['font_size']}",
-        "-D",
-        "label_surface=02",
+        *openscad_defines(text, text2, label_config),
         "-D",
         'Export_Mode="all"',
-        str(scad_file),
     ]
+    ok, msg = run_openscad(
+        openscad_path,
+        scad_file,
+        output_file,
+        args,
+        cache,
+        error_prefix="OpenSCAD preview",
+        cpus=cpus,
+    )
+    if not ok and msg == "Output file not created":
+        msg = "Preview file not created"
+    return ok, msg
 
-    try:
-        env = os.environ.copy()
-        fonts_dir = SCRIPT_DIR / "fonts"
-        if fonts_dir.exists():
-            if "OPENSCAD_FONT_PATH" in env:
-                env["OPENSCAD_FONT_PATH"] = f"{fonts_dir}:{env['OPENSCAD_FONT_PATH']}"
-            else:
-                env["OPENSCAD_FONT_PATH"] = str(fonts_dir)
 
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=180, env=env
-        )
+# Parts of the output package written by the combiner rather than copied
+_GENERATED_ENTRIES = {
+    MODEL_PATH,
+    "Metadata/model_settings.config",
+    "Metadata/plate_1.config",
+}
 
-        if result.returncode != 0:
-            return False, f"OpenSCAD preview error: {result.stderr}"
+# Metadata that stops Bambu Studio warning about a foreign 3MF producer
+BAMBU_METADATA = {
+    "Application": "BambuStudio",
+    "ApplicationVersion": "01.09.00.00",
+}
 
-        if not output_file.exists():
-            return False, "Preview file not created"
+LABEL_MATERIALS = [("Base", "#C0C0C0FF"), ("Text", "#333333FF")]
 
-        return True, None
+# Rasterising runs per triangle in Python, so labels above this size get
+# no thumbnail and stay a raw splice. Sizes are estimated from the model
+# XML, about 70 bytes per triangle, before anything is parsed.
+THUMBNAIL_MAX_TRIANGLES = 200_000
+MODEL_BYTES_PER_TRIANGLE = 70
 
-    except subprocess.TimeoutExpired:
-        return False, "OpenSCAD preview timed out"
-    except Exception as e:
-        return False, str(e)
+
+def add_mesh_stats(stats: dict, mesh: Mesh, prefix: str = "") -> None:
+    """Add a mesh's vertex and triangle counts to a stats dict."""
+    for key, count in (("vertices", mesh.vertex_count), ("triangles", len(mesh))):
+        stats[prefix + key] = stats.get(prefix + key, 0) + count
+
+
+def format_mesh_stats(stats: dict) -> str:
+    """ "1,234 vertices, 2,460 triangles", plus the simplification saving."""
+    text = f"{stats['vertices']:,} vertices, {stats['triangles']:,} triangles"
+    if "input_triangles" in stats:
+        text += f", simplified from {stats['input_triangles']:,}"
+    if stats.get("no_thumbnail"):
+        text += f", {stats['no_thumbnail']:,} label(s) too large for a thumbnail"
+    return text
 
 
 def combine_3mf_files(
     base_3mf: Path,
     text_3mf: Path,
-    output_3mf: Path,
+    output_3mf: Path | BinaryIO,
     label_name: str,
     filament_base: int = 1,
     filament_text: int = 2,
+    simplify_meshes: bool = False,
+    stats: dict | None = None,
+    thumbnail: bool = False,
+    preview_file: Path | BinaryIO | None = None,
 ) -> tuple[bool, str]:
     """
     Combine base and text 3MF files into a single multi-part 3MF.
-    """
-    try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir = Path(tmpdir)
-
-            # Extract base 3MF
-            with zipfile.ZipFile(base_3mf, "r") as zf:
-                zf.extractall(tmpdir)
 
-            # Parse the base model
-            model_path = tmpdir / "3D" / "3dmodel.model"
-            tree = ET.parse(model_path)
-            root = tree.getroot()
+    Works zip-to-zip: untouched package entries are copied straight across
+    and the two <mesh> payloads are spliced in as raw bytes, so peak memory
+    stays bounded regardless of mesh size. With ``simplify_meshes`` each
+    part is instead parsed and written back welded and with coplanar
+    triangles merged.
 
-            # --- METADATA SPOOFING FOR BAMBU STUDIO ---
-            # Update Application metadata to suppress warnings
-            ns = {"ns0": NS_3MF}
+    The output's vertex and triangle counts are added to ``stats``, and
+    with ``simplify_meshes`` also the counts before simplification.
 
-            # Find or create metadata items
-            # Default might have: <metadata name="Application">OpenSCAD ...</metadata>
+    With ``thumbnail`` or ``preview_file`` the parts are also parsed on
+    their way through and rasterised (see preview.py), to embed as
+    Metadata/thumbnail.png and/or to write to ``preview_file``. A label
+    over THUMBNAIL_MAX_TRIANGLES gets no thumbnail unless a preview file
+    is wanted too, and ``stats["no_thumbnail"]`` is set to 1.
 
-            # We want: <metadata name="Application">BambuStudio</metadata>
-
-            # Helper to set metadata
-            def set_metadata(name, value):
-                found = False
-                for meta in root.findall(f"{{{NS_3MF}}}metadata"):
-                    if meta.get("name") == name:
-                        meta.text = value
-                        found = True
-                        break
-                if not found:
-                    meta = ET.Element(f"{{{NS_3MF}}}metadata", name=name)
-                    meta.text = value
-                    # Insert at top
-                    root.insert(0, meta)
-
-            set_metadata("Application", "BambuStudio")
-            set_metadata("ApplicationVersion", "01.09.00.00")
-            # ------------------------------------------
-
-            # Get base mesh
-            base_obj = root.find(".//{%s}object" % NS_3MF)
-            base_mesh = base_obj.find("{%s}mesh" % NS_3MF)
-
-            # Clear existing objects in resources
-            resources = root.find("{%s}resources" % NS_3MF)
-
-            # Remove existing objects (we'll add new ones)
-            for obj in list(resources.findall("{%s}object" % NS_3MF)):
-                resources.remove(obj)
-
-            # Create materials for base and text
-            basematerials = resources.find("{%s}basematerials" % NS_3MF)
-            if basematerials is None:
-                basematerials = ET.SubElement(
-                    resources, f"{{{NS_3MF}}}basematerials", id="1"
+    ``output_3mf`` and ``preview_file`` may also be binary streams.
+    """
+    stats = {} if stats is None else stats
+    meshes = []
+    try:
+        with (
+            span("combine") as info,
+            zipfile.ZipFile(base_3mf, "r") as base_zf,
+            zipfile.ZipFile(text_3mf, "r") as text_zf,
+            zipfile.ZipFile(output_3mf, "w", zipfile.ZIP_DEFLATED) as out_zf,
+        ):
+            if thumbnail and preview_file is None:
+                model_bytes = sum(
+                    zf.getinfo(MODEL_PATH).file_size for zf in (base_zf, text_zf)
+                )
+                if model_bytes > THUMBNAIL_MAX_TRIANGLES * MODEL_BYTES_PER_TRIANGLE:
+                    thumbnail = False
+                    stats["no_thumbnail"] = 1
+            rasterise = thumbnail or preview_file is not None
+            generated = _GENERATED_ENTRIES | (PACKAGE_PARTS if thumbnail else set())
+            with span("zip write"):
+                copy_entries(base_zf, out_zf, skip=lambda n: n in generated)
+                if thumbnail:
+                    write_package_parts(out_zf, thumbnail=True)
+
+            with (
+                base_zf.open(MODEL_PATH) as base_fp,
+                text_zf.open(MODEL_PATH) as text_fp,
+                out_zf.open(MODEL_PATH, "w") as out_fp,
+            ):
+                base_reader = ModelReader(base_fp)
+                text_reader = ModelReader(text_fp)
+                writer = ModelWriter(
+                    out_fp,
+                    namespaces={**text_reader.namespaces, **base_reader.namespaces},
+                    metadata=BAMBU_METADATA,
+                    materials=LABEL_MATERIALS,
+                    unit=base_reader.root_attributes.get("unit", "millimeter"),
                 )
-            else:
-                # Clear existing materials
-                for mat in list(basematerials):
-                    basematerials.remove(mat)
-
-            # Add our materials
-            ET.SubElement(
-                basematerials,
-                f"{{{NS_3MF}}}base",
-                name="Base",
-                displaycolor="#C0C0C0FF",
-            )
-            ET.SubElement(
-                basematerials,
-                f"{{{NS_3MF}}}base",
-                name="Text",
-                displaycolor="#333333FF",
-            )
-
-            # Add base object (ID=2)
-            base_obj_new = ET.SubElement(
-                resources,
-                f"{{{NS_3MF}}}object",
-                id="2",
-                name="Base",
-                type="model",
-                pid="1",
-                pindex="0",
-            )
-            base_obj_new.append(base_mesh)
-
-            # Read text mesh from text_3mf
-            with zipfile.ZipFile(text_3mf, "r") as zf:
-                text_model_content = zf.read("3D/3dmodel.model").decode("utf-8")
-
-            text_root = ET.fromstring(text_model_content)
-            text_obj = text_root.find(".//{%s}object" % NS_3MF)
-            text_mesh = text_obj.find("{%s}mesh" % NS_3MF)
-
-            # Add text object (ID=3)
-            # Ensure text is slightly higher in Z priority if needed (Bambu usually handles this by geometry)
-            text_obj_new = ET.SubElement(
-                resources,
-                f"{{{NS_3MF}}}object",
-                id="3",
-                name="Text",
-                type="model",
-                pid="1",
-                pindex="1",
-            )
-            text_obj_new.append(text_mesh)
-
-            # Update build section to reference both objects
-            build = root.find("{%s}build" % NS_3MF)
-            if build is None:
-                build = ET.SubElement(root, f"{{{NS_3MF}}}build")
-            else:
-                # Clear existing items
-                for item in list(build):
-                    build.remove(item)
-
-            # Add build items for both objects
-            ET.SubElement(build, f"{{{NS_3MF}}}item", objectid="2")
-            ET.SubElement(build, f"{{{NS_3MF}}}item", objectid="3")
-
-            # Register namespaces to avoid ns0: prefixes
-            ET.register_namespace("", NS_3MF)
-            ET.register_namespace("m", NS_MATERIAL)
-            ET.register_namespace("p", NS_PRODUCTION)
-
-            # Write updated model
-            tree.write(model_path, xml_declaration=True, encoding="UTF-8")
-
-            # Create Bambu Studio settings files
-            metadata_dir = tmpdir / "Metadata"
-            metadata_dir.mkdir(exist_ok=True)
-
-            # Model settings with extruder assignments
-            settings_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<config>
-  <object id="2">
-    <metadata key="name" value="Base"/>
-    <metadata key="extruder" value="{filament_base}"/>
-  </object>
-  <object id="3">
-    <metadata key="name" value="Text"/>
-    <metadata key="extruder" value="{filament_text}"/>
-  </object>
-</config>
-'''
-            with open(metadata_dir / "model_settings.config", "w") as f:
-                f.write(settings_content)
-
-            # Plate config
-            plate_content = """<?xml version="1.0" encoding="UTF-8"?>
-<plate>
-  <metadata key="plater_id" value="1"/>
-  <metadata key="locked" value="false"/>
-  <model_instance>
-    <metadata key="object_id" value="2"/>
-    <metadata key="instance_id" value="0"/>
-  </model_instance>
-  <model_instance>
-    <metadata key="object_id" value="3"/>
-    <metadata key="instance_id" value="0"/>
-  </model_instance>
-</plate>
-"""
-            with open(metadata_dir / "plate_1.config", "w") as f:
-                f.write(plate_content)
 
-            # Create final 3MF
-            with zipfile.ZipFile(output_3mf, "w", zipfile.ZIP_DEFLATED) as zf:
-                for file_path in tmpdir.rglob("*"):
-                    if file_path.is_file():
-                        arcname = file_path.relative_to(tmpdir)
-                        zf.write(file_path, arcname)
+                # Base object (ID=2) and text object (ID=3)
+                parts = [(base_reader, 2, "Base", 0), (text_reader, 3, "Text", 1)]
+                for reader, object_id, name, pindex in parts:
+                    _, chunks = next(reader.objects(), (None, None))
+                    if chunks is None:
+                        info["status"] = "failed"
+                        return False, f"No mesh object in {name.lower()} 3MF"
+                    if simplify_meshes:
+                        with span("simplify"):
+                            mesh = Mesh.from_chunks(chunks)
+                            add_mesh_stats(stats, mesh, "input_")
+                            mesh = simplify(mesh)
+                            add_mesh_stats(stats, mesh)
+                        chunks = mesh.xml_chunks()
+                    else:
+                        chunks = count_elements(chunks, stats)
+                        if rasterise:
+                            mesh = Mesh()
+                            chunks = mesh.parse_through(chunks)
+                    if rasterise:
+                        meshes.append((mesh, LABEL_MATERIALS[pindex][1]))
+                    writer.begin_object(object_id, name, pindex)
+                    for chunk in chunks:
+                        writer.write(chunk)
+                    writer.end_object(object_id)
+                writer.close()
+                info["vertices"] = stats["vertices"]
+                info["triangles"] = stats["triangles"]
+
+            if rasterise:
+                with span("preview") as preview_info:
+                    png = render_png(meshes)
+                    if isinstance(preview_file, Path):
+                        preview_file.write_bytes(png)
+                    elif preview_file is not None:
+                        preview_file.write(png)
+                    if thumbnail:
+                        out_zf.writestr(THUMBNAIL_PATH, png)
+                    preview_info["status"] = "ok"
+
+            # Bambu Studio settings: extruder assignments and plate layout
+            with span("zip write"):
+                out_zf.writestr(
+                    "Metadata/model_settings.config",
+                    bambu_model_settings(
+                        [(2, "Base", filament_base), (3, "Text", filament_text)]
+                    ),
+                )
+                out_zf.writestr("Metadata/plate_1.config", bambu_plate_config([2, 3]))
+            info["status"] = "ok"
 
-            return True, None
+        return True, None
 
     except Exception as e:
         import traceback
@@ -406,92 +1092,547 @@ def combine_3mf_files(
         return False, str(e)
 
 
-def process_single_label(
-    label, config, output_dir, preview_dir=None
-) -> tuple[bool, str, str]:
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl that clones a file's extents (Linux btrfs/XFS reflinks)
+FICLONE = 0x40049409
+
+
+def link_output(source: Path, target: Path) -> str:
     """
-    Process a single label. intended for use in thread pool.
-    Returns: (success, name, message)
+    Materialise ``target`` as the same content as ``source``: a reflink
+    where the filesystem supports it, else a hard link, else a copy.
+    Returns which one it made.
     """
-    name = label["name"]
-    text = label["text"]
-    text2 = label.get("text2", config["defaults"].get("text2", ""))
+    target.unlink(missing_ok=True)
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        shutil.copyfile(source, target)
+        return "copy"
 
-    # Merge defaults with per-label overrides
-    label_config = {**config["defaults"]}
-    for key in [
-        "fastener_head",
-        "fastener_shaft",
-        "fastener_threads",
-        "fastener_driver",
-        "fastener_orientation",
-        "fastener_scale",
-        "font_size",
-        "text2",
-        "show_fastener",
-        "hardware",
-        "hardware_scale",
-    ]:
-        if key in label:
-            label_config[key] = label[key]
 
-    openscad_path = config["settings"]["openscad_path"]
-    scad_file = SCRIPT_DIR / "labels.scad"
+def split_3mf_objects(source_3mf: Path, output_3mfs: list[Path]) -> tuple[bool, str]:
+    """
+    Split a multi-object 3MF into one single-object 3MF per output path.
 
+    Objects are taken in resource order, which for a lazy-union export of
+    labels.scad is the order the parts are emitted in (base, then text).
+    Meshes are streamed across without being parsed.
+    """
     try:
-        # Each thread needs its own temp directory
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir = Path(tmpdir)
-            base_3mf = tmpdir / f"{name}_base.3mf"
-            text_3mf = tmpdir / f"{name}_text.3mf"
-            output_3mf = output_dir / f"{name}.3mf"
-
-            # Generate base
-            ok, msg = generate_openscad_3mf(
-                openscad_path, scad_file, base_3mf, text, text2, "base", label_config
+        with (
+            span("split"),
+            zipfile.ZipFile(source_3mf, "r") as zf,
+            zf.open(MODEL_PATH) as fp,
+        ):
+            reader = ModelReader(fp)
+            count = 0
+            for (attrs, chunks), output_3mf in zip(reader.objects(), output_3mfs):
+                with zipfile.ZipFile(output_3mf, "w", zipfile.ZIP_DEFLATED) as out_zf:
+                    copy_entries(zf, out_zf, skip=lambda n: n == MODEL_PATH)
+                    with out_zf.open(MODEL_PATH, "w") as out_fp:
+                        writer = ModelWriter(
+                            out_fp,
+                            namespaces=reader.namespaces,
+                            unit=reader.root_attributes.get("unit", "millimeter"),
+                        )
+                        writer.begin_object(1, attrs.get("name", f"Object {count}"))
+                        for chunk in chunks:
+                            writer.write(chunk)
+                        writer.end_object(1)
+                        writer.close()
+                count += 1
+
+        if count != len(output_3mfs):
+            return False, (
+                f"Expected {len(output_3mfs)} objects, found {count} "
+                "(does this OpenSCAD support --enable=lazy-union?)"
             )
-            if not ok:
-                return False, name, f"Failed base export: {msg}"
+        return True, None
+
+    except Exception as e:
+        return False, str(e)
 
-            # Generate text
-            ok, msg = generate_openscad_3mf(
-                openscad_path, scad_file, text_3mf, text, text2, "text", label_config
+
+class LabelJob:
+    """
+    Settings and intermediate paths for one label, with one method per
+    render stage. Stage methods return (ok, message) so they can run
+    either back to back or as scheduler tasks.
+    """
+
+    def __init__(
+        self,
+        label: dict,
+        config: dict,
+        output_dir: Path,
+        work_dir: Path,
+        preview_dir: Path | None = None,
+        cache: RenderCache | None = None,
+        cpus: CpuBudget | None = None,
+        glyphs: GlyphTextRenderer | None = None,
+        icons: IconLibrary | None = None,
+        preview_backend: str = "mesh",
+        in_memory: bool = False,
+    ):
+        if glyphs is not None and icons is None:
+            raise ValueError("The glyph text backend needs an icon library")
+        self.name = label["name"]
+        self.text = label["text"]
+        self.text2 = label.get("text2", config["defaults"].get("text2", ""))
+
+        # Merge defaults with per-label overrides
+        self.label_config = merge_label_config(label, config)
+        # auto_fit sizes from the font metrics: {} if the label fits as
+        # configured, None if it can't fit or its font isn't bundled
+        self.fit = {}
+        if self.label_config.get("auto_fit"):
+            metrics = find_font(
+                FONTS_DIR, self.label_config["font"], self.label_config["font_style"]
             )
+            self.fit = metrics and fit_label(self.label_config, self.text, metrics)
+            self.label_config.update(self.fit or {})
+        self.features = label_features(self.label_config, self.text, self.text2)
+
+        self.openscad_path = config["settings"]["openscad_path"]
+        self.filaments = config["settings"]["filaments"]
+        self.scad_file = SCRIPT_DIR / "labels.scad"
+        self.cache = cache
+        self.cpus = cpus
+        self.glyphs = glyphs
+        self.icons = icons
+
+        self.work_dir = work_dir / self.name
+        self.base_3mf = self.work_dir / f"{self.name}_base.3mf"
+        self.text_3mf = self.work_dir / f"{self.name}_text.3mf"
+        self.output_3mf = output_dir / f"{self.name}.3mf"
+        self.preview_file = preview_dir / f"{self.name}.png" if preview_dir else None
+        # Mesh previews are rasterised by combine and double as thumbnails
+        self.preview_backend = preview_backend
+        self.mesh_preview = self.preview_file is not None and preview_backend == "mesh"
+        self.thumbnail = self.mesh_preview or self.label_config.get("thumbnail", False)
+        # Vertex and triangle counts of the output, filled in by combine
+        self.mesh_stats = {}
+        # Set by plan_batches when this label renders as part of a batch
+        self.batch = None
+        # In memory, output paths only name the buffers (see output())
+        self.in_memory = in_memory
+        self.buffers = {}
+        if in_memory and self.preview_file is not None and not self.mesh_preview:
+            raise ValueError("In-memory outputs need the mesh preview backend")
+
+    def outputs(self) -> list[Path]:
+        """Files this job writes."""
+        return [self.output_3mf] + ([self.preview_file] if self.preview_file else [])
+
+    def output(self, path: Path | None) -> Path | BinaryIO | None:
+        """Where to write the output ``path``: the file, or its buffer."""
+        if path is None or not self.in_memory:
+            return path
+        return self.buffers.setdefault(path, io.BytesIO())
+
+    def render_key(self) -> str:
+        """
+        Digest of this label's render inputs within one run; labels with
+        equal keys produce identical outputs under different names.
+        """
+        payload = json.dumps(
+            [self.label_config, self.text, self.text2],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def fingerprint(self) -> str:
+        """Digest of every input that determines this job's outputs."""
+        glyphs = self.glyphs is not None and self.glyphs.supports(
+            self.text, self.text2, self.label_config
+        )
+        return label_fingerprint(
+            self.label_config,
+            self.text,
+            self.text2,
+            self.scad_file,
+            FONTS_DIR,
+            self.filaments,
+            {
+                "text_backend": "glyphs" if glyphs else "openscad",
+                "icon_library": self.icons is not None,
+                "thumbnail": self.thumbnail,
+                "preview_backend": self.preview_backend if self.preview_file else None,
+            },
+        )
+
+    @label_stage
+    def render_base(self) -> tuple[bool, str]:
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        ok, msg = generate_base_3mf(
+            self.openscad_path,
+            self.scad_file,
+            self.base_3mf,
+            self.label_config,
+            self.cache,
+            self.cpus,
+        )
+        return ok, None if ok else f"Failed base export: {msg}"
+
+    @label_stage
+    def render_text(self) -> tuple[bool, str]:
+        """
+        The text layer. With an icon library only the lettering is
+        rendered per label and the pre-rendered icons are placed into it.
+        """
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        if self.icons is not None:
+            ok, lettering = self.render_lettering()
+            if not ok:
+                return False, f"Failed text export: {lettering}"
+            ok, icons = self.icons.place(self.label_config)
             if not ok:
-                return False, name, f"Failed text export: {msg}"
+                return False, icons
+            with span("compose text"):
+                text_layer = Mesh.merge([lettering, icons])
+                if not text_layer:
+                    return False, "Failed text export: nothing on the text layer"
+                text_layer.write_3mf(self.text_3mf, "Text")
+            return True, None
 
-            # Combine
-            filaments = config["settings"]["filaments"]
+        ok, msg = generate_openscad_3mf(
+            self.openscad_path,
+            self.scad_file,
+            self.text_3mf,
+            self.text,
+            self.text2,
+            "text",
+            self.label_config,
+            self.cache,
+            self.cpus,
+        )
+        return ok, None if ok else f"Failed text export: {msg}"
+
+    def cost_stages(self, single_pass: bool = False) -> list[str]:
+        """The per-label stages the cost model predicts (shared runs aside)."""
+        if single_pass:
+            stages = ["all"]
+        elif self.icons is None:
+            stages = ["text"]
+        else:
+            stages = ["lettering"] if self.renders_lettering() else []
+        if self.preview_file is not None and not self.mesh_preview:
+            stages.append("preview")
+        return stages + ["combine"]
+
+    def renders_lettering(self) -> bool:
+        """Whether render_text runs an OpenSCAD lettering export (see below)."""
+        if self.icons is None or not (self.text or self.text2):
+            return False
+        return self.glyphs is None or not self.glyphs.supports(
+            self.text, self.text2, self.label_config
+        )
+
+    def render_lettering(self) -> tuple[bool, Mesh | str]:
+        """Text1 and Text2 without icons, from glyphs or from OpenSCAD."""
+        if not (self.text or self.text2):
+            return True, Mesh()
+        if self.glyphs is not None and self.glyphs.supports(
+            self.text, self.text2, self.label_config
+        ):
+            return self.glyphs.lettering(self.text, self.text2, self.label_config)
+        if self.batch is not None:
+            ok, parts = self.batch.get(self.name)
+            if ok:
+                return True, parts[0]
+            # Otherwise render this label on its own
+
+        lettering_3mf = self.work_dir / f"{self.name}_lettering.3mf"
+        ok, msg = generate_openscad_3mf(
+            self.openscad_path,
+            self.scad_file,
+            lettering_3mf,
+            self.text,
+            self.text2,
+            "lettering",
+            self.label_config,
+            self.cache,
+            self.cpus,
+        )
+        return (True, Mesh.from_3mf(lettering_3mf)) if ok else (False, msg)
+
+    @label_stage
+    def render_all(self) -> tuple[bool, str]:
+        """
+        One OpenSCAD run; lazy-union keeps base and text as separate
+        objects which are split apart again here.
+        """
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        if self.batch is not None:
+            ok, parts = self.batch.get(self.name)
+            if ok:
+                base, text = parts
+                base.write_3mf(self.base_3mf, "Base")
+                text.write_3mf(self.text_3mf, "Text")
+                return True, None
+
+        all_3mf = self.work_dir / f"{self.name}_all.3mf"
+        ok, msg = generate_openscad_3mf(
+            self.openscad_path,
+            self.scad_file,
+            all_3mf,
+            self.text,
+            self.text2,
+            "all",
+            self.label_config,
+            self.cache,
+            self.cpus,
+        )
+        if not ok:
+            return False, f"Failed export: {msg}"
+
+        ok, msg = split_3mf_objects(all_3mf, [self.base_3mf, self.text_3mf])
+        return ok, None if ok else f"Failed split: {msg}"
+
+    def unlink_output(self, path: Path | None) -> None:
+        """
+        Remove an old output file before it is rewritten, so a file hard
+        linked to a deduplicated label is never written through.
+        """
+        if path is not None and not self.in_memory:
+            path.unlink(missing_ok=True)
+
+    @label_stage
+    def combine(self) -> tuple[bool, str]:
+        self.unlink_output(self.output_3mf)
+        if self.mesh_preview:
+            self.unlink_output(self.preview_file)
+        try:
             ok, msg = combine_3mf_files(
-                base_3mf,
-                text_3mf,
-                output_3mf,
-                name,
-                filament_base=filaments["base"],
-                filament_text=filaments["text"],
+                self.base_3mf,
+                self.text_3mf,
+                self.output(self.output_3mf),
+                self.name,
+                filament_base=self.filaments["base"],
+                filament_text=self.filaments["text"],
+                simplify_meshes=self.label_config.get("simplify", False),
+                stats=self.mesh_stats,
+                thumbnail=self.thumbnail,
+                preview_file=self.output(
+                    self.preview_file if self.mesh_preview else None
+                ),
             )
-            if not ok:
-                return False, name, f"Failed combination: {msg}"
-
-            if preview_dir is not None:
-                preview_file = preview_dir / f"{name}.png"
-                ok, msg = generate_preview_png(
-                    openscad_path,
-                    scad_file,
-                    preview_file,
-                    text,
-                    text2,
-                    label_config,
-                )
+        finally:
+            # Intermediates are no longer needed (shared bases live elsewhere)
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+        return ok, None if ok else f"Failed combination: {msg}"
+
+    @label_stage
+    def render_preview(self) -> tuple[bool, str]:
+        self.unlink_output(self.preview_file)
+        with span("preview") as info:
+            ok, msg = generate_preview_png(
+                self.openscad_path,
+                self.scad_file,
+                self.preview_file,
+                self.text,
+                self.text2,
+                self.label_config,
+                self.cache,
+                self.cpus,
+            )
+            info["status"] = "ok" if ok else "failed"
+        return ok, None if ok else f"Failed preview: {msg}"
+
+
+def plan_label_tasks(
+    job: LabelJob,
+    base_renderer: SharedBaseRenderer | None = None,
+    base_tasks: dict | None = None,
+    single_pass: bool = False,
+    icon_tasks: dict | None = None,
+) -> list[Task]:
+    """
+    Build the task DAG for one label, in submission order.
+
+    Base renders are shared: ``base_tasks`` maps base geometry keys to the
+    task already planned for that base, so it is rendered once per batch.
+    Likewise ``icon_tasks`` maps icon variant names to their library build.
+    A label in a batch (see plan_batches) waits for the batch's one run.
+    """
+    tasks = []
+    batch_deps = []
+    if job.batch is not None:
+        if job.batch.task is None:
+            job.batch.task = Task(job.batch.render, pool="render", name="batch")
+            tasks.append(job.batch.task)
+        batch_deps.append(job.batch.task)
+
+    if single_pass:
+        render = Task(
+            job.render_all, batch_deps, pool="render", group=job.name, name="all"
+        )
+        tasks.append(render)
+        combine_deps = [render]
+    else:
+        if base_renderer is not None:
+            key = base_geometry_key(job.label_config)
+            base = base_tasks.get(key)
+            if base is None:
+                label_config = job.label_config
+
+                def render_shared_base():
+                    ok, result = base_renderer.get(label_config)
+                    return ok, None if ok else f"Failed base export: {result}"
+
+                base = Task(render_shared_base, pool="render", name="base")
+                base_tasks[key] = base
+                tasks.append(base)
+            job.base_3mf = base_renderer.path_for(job.label_config)
+        else:
+            base = Task(job.render_base, pool="render", group=job.name, name="base")
+            tasks.append(base)
+
+        text_deps = list(batch_deps)
+        if job.icons is not None:
+            icon_tasks = {} if icon_tasks is None else icon_tasks
+            for variant in icon_variants(job.label_config):
+                name = variant_name(variant)
+                if name not in icon_tasks:
+                    icon_tasks[name] = Task(
+                        functools.partial(job.icons.build, variant),
+                        pool="render",
+                        name="icon",
+                    )
+                    tasks.append(icon_tasks[name])
+                text_deps.append(icon_tasks[name])
+
+        text = Task(
+            job.render_text, text_deps, pool="render", group=job.name, name="text"
+        )
+        tasks.append(text)
+        combine_deps = [base, text]
+
+    tasks.append(
+        Task(job.combine, combine_deps, pool="cpu", group=job.name, name="combine")
+    )
+    if job.preview_file is not None and not job.mesh_preview:
+        tasks.append(
+            Task(job.render_preview, pool="render", group=job.name, name="preview")
+        )
+    return tasks
+
+
+def process_single_label(
+    label,
+    config,
+    output_dir,
+    preview_dir=None,
+    cache=None,
+    base_renderer=None,
+    single_pass=False,
+) -> tuple[bool, str, str]:
+    """
+    Process a single label, running its stages back to back.
+    Returns: (success, name, message)
+    """
+    name = label["name"]
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            job = LabelJob(label, config, output_dir, Path(tmpdir), preview_dir, cache)
+            for task in plan_label_tasks(job, base_renderer, {}, single_pass):
+                ok, msg = task.fn()
                 if not ok:
-                    return False, name, f"Failed preview: {msg}"
+                    return False, name, msg
 
-        return True, name, f"Generated {name}.3mf"
+        return True, name, f"Generated {name}.3mf ({format_mesh_stats(job.mesh_stats)})"
 
     except Exception as e:
         return False, name, f"Exception: {str(e)}"
 
 
+def worker_identity() -> dict:
+    """Digests a worker's labels.scad and fonts must share with its coordinator."""
+    return {
+        "scad": source_digest(SCRIPT_DIR / "labels.scad"),
+        "fonts": fonts_digest(FONTS_DIR),
+    }
+
+
+def run_worker(
+    address: tuple[str, int],
+    slots: int,
+    openscad_path: str,
+    cache: RenderCache | None = None,
+    cpus: CpuBudget | None = None,
+) -> int:
+    """
+    Render jobs for the coordinator at ``address`` from ``slots`` parallel
+    connections until it is done. Returns the number of jobs rendered
+    successfully. Jobs always run this host's ``openscad_path``, never
+    one sent over the queue.
+    """
+    identity = worker_identity()
+
+    def render(
+        spec: dict, output_file: Path, timeout: float
+    ) -> tuple[bool, str, float | None]:
+        start = time.perf_counter()
+        usage = {}
+        ok, msg = generate_openscad_3mf(
+            openscad_path,
+            SCRIPT_DIR / "labels.scad",
+            output_file,
+            spec["text"],
+            spec["text2"],
+            spec["export_mode"],
+            spec["label_config"],
+            cache,
+            cpus,
+            timeout,
+            usage,
+        )
+        what = f"{spec['label']} ({spec['export_mode']})"
+        if ok:
+            print(f"✓ Rendered {what} in {time.perf_counter() - start:.1f}s")
+        else:
+            print(f"✗ {what}: {msg}")
+        # OpenSCAD's own time, without waiting for room on this host
+        return ok, msg, usage.get("seconds")
+
+    with concurrent.futures.ThreadPoolExecutor(slots) as pool:
+        futures = [
+            pool.submit(
+                work,
+                address,
+                identity,
+                render,
+                f"{platform.node()}:{os.getpid()}/{slot}",
+            )
+            for slot in range(slots)
+        ]
+        return sum(future.result() for future in futures)
+
+
+def print_stage_summary() -> None:
+    """Print p50/p95/max per traced stage."""
+    stats = TRACER.summary()
+    if not stats:
+        return
+    print(f"{'stage':<12} {'count':>6} {'p50':>8} {'p95':>8} {'max':>8}")
+    for name, count, p50, p95, worst in stats:
+        print(f"{name:<12} {count:>6} {p50:>7.2f}s {p95:>7.2f}s {worst:>7.2f}s")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate 3MF label files with pre-assigned colors"
@@ -510,15 +1651,42 @@ def main():
         "-w",
         type=int,
         default=os.cpu_count() or 4,
-        help="Number of parallel workers",
+        help="Number of Python-side workers (combine and other non-OpenSCAD stages)",
+    )
+    parser.add_argument(
+        "--render-jobs",
+        "-j",
+        type=int,
+        help="Maximum concurrent OpenSCAD processes "
+        "(default: CPU count / --render-threads)",
+    )
+    parser.add_argument(
+        "--render-threads",
+        type=int,
+        default=1,
+        help="CPU cores each OpenSCAD process may use (default: %(default)s)",
     )
     parser.add_argument(
         "--config",
         "-c",
         type=Path,
-        required=True,
         help="Path to config JSON file (create one with: python create_config.py)",
     )
+    parser.add_argument(
+        "--labels",
+        type=Path,
+        metavar="FILE",
+        help="Read labels from this JSONL, CSV or JSON file instead of the "
+        "config's labels (which may also name such a file)",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=256,
+        metavar="N",
+        help="Labels planned and in flight at once; more are read as these "
+        "finish (default: %(default)s)",
+    )
     parser.add_argument(
         "--output", "-o", type=Path, help="Output directory (default: from config)"
     )
@@ -527,8 +1695,204 @@ def main():
         type=Path,
         help="Optional directory for PNG previews",
     )
+    parser.add_argument(
+        "--preview-backend",
+        choices=["mesh", "openscad"],
+        default="mesh",
+        help="Rasterise previews from the generated meshes, or render them "
+        "with OpenSCAD (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--thumbnails",
+        action="store_true",
+        help="Embed a top-down thumbnail in every 3MF (implied by mesh "
+        "previews). Rasterising parses every mesh in Python, so it slows "
+        f"combining; labels over {THUMBNAIL_MAX_TRIANGLES:,} triangles get none",
+    )
+    parser.add_argument(
+        "--bundle",
+        type=Path,
+        metavar="FILE",
+        help="Stream every finished label into one archive instead of the "
+        "output directory; '-' writes a tar to stdout",
+    )
+    parser.add_argument(
+        "--bundle-format",
+        choices=BUNDLE_FORMATS,
+        help="Archive format for --bundle (default: from the file name, tar "
+        "for stdout)",
+    )
+    parser.add_argument(
+        "--bundle-previews",
+        action="store_true",
+        help="Also add a mesh preview of every label to the --bundle",
+    )
+    parser.add_argument(
+        "--pack",
+        type=Path,
+        metavar="FILE",
+        help="Also pack all generated labels onto build plates in one 3MF project",
+    )
+    parser.add_argument(
+        "--plate-size",
+        type=parse_plate_size,
+        default=DEFAULT_PLATE_SIZE,
+        metavar="WxD",
+        help="Build plate size in mm for --pack (default: 256x256)",
+    )
+    parser.add_argument(
+        "--pack-spacing",
+        type=float,
+        default=DEFAULT_SPACING,
+        help="Gap between packed labels in mm (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="Render base and text in one OpenSCAD run (needs lazy-union support)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Render up to N labels per OpenSCAD run; larger batches amortise "
+        "start-up, smaller ones finish sooner (default: %(default)s, no batching)",
+    )
+    parser.add_argument(
+        "--text-backend",
+        choices=["openscad", "glyphs"],
+        default="openscad",
+        help="How to render label text: a full OpenSCAD text() run per label, "
+        "or cached per-glyph meshes laid out in Python (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--quality",
+        choices=list(QUALITY_PROFILES),
+        help="Tessellation profile for every label, overriding the config's "
+        "quality setting (default: labels.scad's own $fs/$fa)",
+    )
+    parser.add_argument(
+        "--simplify",
+        action="store_true",
+        help="Weld duplicate vertices and merge coplanar triangles in each "
+        "combined label",
+    )
+    parser.add_argument(
+        "--auto-fit",
+        action="store_true",
+        help="Shrink icons, then text, where a label's text would run into "
+        "its icons",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Kill an OpenSCAD run after this long (default: a multiple of "
+        f"the learned render time, or {DEFAULT_JOB_TIMEOUT:g} before any)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        metavar="MB",
+        help="Start an OpenSCAD run only while the runs' expected peak memory "
+        "fits in this many MB (default: "
+        f"{MEMORY_BUDGET_FRACTION * 100:.0f}%% of available memory; "
+        "0 for no limit)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Stop starting OpenSCAD runs, and kill running ones, once the "
+        "whole run has taken this long",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Abort the whole run at the first failed label",
+    )
+    parser.add_argument(
+        "--serve",
+        type=parse_address,
+        metavar="[HOST:]PORT",
+        help="Coordinate: queue each label's OpenSCAD exports for --worker "
+        f"processes to render (binds {DEFAULT_HOST} unless HOST is given)",
+    )
+    parser.add_argument(
+        "--worker",
+        type=parse_address,
+        metavar="[HOST:]PORT",
+        help="Render jobs for the coordinator at this address instead of "
+        "reading a config; -j sets how many at once",
+    )
+    parser.add_argument(
+        "--openscad",
+        metavar="PATH",
+        help="OpenSCAD binary for --worker (default: openscad on PATH)",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Render every label, even ones identical to another but for the name",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only regenerate labels whose inputs changed since the last run",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="With --incremental, delete outputs of labels removed from the config",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="FILE",
+        help="Write a Chrome trace-event JSON of every stage (open in Perfetto)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=default_cache_dir(),
+        help="Directory for cached OpenSCAD renders (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // 1024**2,
+        help="Maximum render cache size in MB (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-run OpenSCAD instead of reusing cached renders",
+    )
 
     args = parser.parse_args()
+    if args.worker:
+        sys.exit(worker_main(args))
+    if args.config is None:
+        parser.error("the following arguments are required: --config/-c")
+    if args.single_pass and args.text_backend == "glyphs":
+        parser.error("--single-pass renders text in OpenSCAD; drop --text-backend")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.window < 1:
+        parser.error("--window must be at least 1")
+    if args.bundle:
+        for flag, value in [
+            ("--preview-dir", args.preview_dir),
+            ("--pack", args.pack),
+            ("--incremental", args.incremental),
+        ]:
+            if value:
+                parser.error(f"{flag} needs output files; drop it or --bundle")
+        if args.bundle_previews and args.preview_backend != "mesh":
+            parser.error("--bundle-previews needs --preview-backend mesh")
+    elif args.bundle_format or args.bundle_previews:
+        parser.error("--bundle-format and --bundle-previews need --bundle")
 
     # Load configuration
     if not args.config.exists():
@@ -536,27 +1900,75 @@ def main():
         print("Create one with: python create_config.py", file=sys.stderr)
         sys.exit(1)
     config = load_config(args.config)
+    if args.quality:
+        config["defaults"]["quality"] = args.quality
+    if args.simplify:
+        config["defaults"]["simplify"] = True
+    if args.thumbnails:
+        config["defaults"]["thumbnail"] = True
+    if args.auto_fit:
+        config["defaults"]["auto_fit"] = True
+    try:
+        quality_variables(config["defaults"])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # Determine which labels to generate; label files are read lazily
+    source = args.labels or config["labels"]
+    if isinstance(source, str):
+        source = args.config.parent / source
+    if isinstance(source, Path):
+        if source.suffix.lower() not in LABEL_SOURCE_SUFFIXES:
+            print(f"Error: unsupported label file {source}", file=sys.stderr)
+            sys.exit(1)
+        if not source.exists():
+            print(f"Error: label file not found: {source}", file=sys.stderr)
+            sys.exit(1)
+
+    def selected_labels():
+        labels = iter_labels(
+            read_labels(source) if isinstance(source, Path) else source
+        )
+        if args.test:
+            labels = itertools.islice(labels, 1)
+        elif args.label:
+            labels = (label for label in labels if label["name"] == args.label)
+        yield from labels
+
+    # Check every label before anything renders; a label file is streamed
+    # through once for this and again for the run
+    errors = validate_labels(selected_labels(), config)
+    if errors:
+        print(f"Error: {len(errors)} problem(s) in the labels:", file=sys.stderr)
+        for error in errors:
+            print(f"  {error}", file=sys.stderr)
+        sys.exit(1)
 
     # Determine output directory
     output_dir = args.output or SCRIPT_DIR / config["settings"]["output_dir"]
-    output_dir.mkdir(exist_ok=True)
-
     preview_dir = None
-    if args.preview_dir:
-        preview_dir = args.preview_dir
-        preview_dir.mkdir(parents=True, exist_ok=True)
-
-    # Determine which labels to generate
-    labels = config["labels"]
-
+    bundle = None
+    if args.bundle:
+        # Output paths become entry names inside the archive
+        output_dir = Path()
+        if args.bundle_previews:
+            preview_dir = Path("previews")
+        if str(args.bundle) == "-":
+            stream = sys.stdout.buffer
+            sys.stdout = sys.stderr  # keep progress out of the archive
+            bundle = Bundle(stream, args.bundle_format or "tar")
+        else:
+            bundle = Bundle.open(args.bundle, args.bundle_format)
+    else:
+        output_dir.mkdir(exist_ok=True)
+        if args.preview_dir:
+            preview_dir = args.preview_dir
+            preview_dir.mkdir(parents=True, exist_ok=True)
+
+    labels = selected_labels()
     if args.test:
-        labels = labels[:1]
         print("Test mode: generating first label only")
-    elif args.label:
-        labels = [l for l in labels if l["name"] == args.label]
-        if not labels:
-            print(f"Error: label '{args.label}' not found in config", file=sys.stderr)
-            sys.exit(1)
 
     # Check OpenSCAD exists
     openscad_path = config["settings"]["openscad_path"]
@@ -564,39 +1976,431 @@ def main():
         print(f"Error: OpenSCAD not found at {openscad_path}", file=sys.stderr)
         sys.exit(1)
 
+    cache = None
+    if not args.no_cache:
+        cache = RenderCache(args.cache_dir, max_bytes=args.cache_size * 1024**2)
+
+    # Serving, most render slots only wait for workers
+    render_jobs = args.render_jobs or (
+        DEFAULT_IN_FLIGHT
+        if args.serve
+        else max(1, (os.cpu_count() or 4) // max(1, args.render_threads))
+    )
+    cpus = CpuBudget(render_jobs, max(1, args.render_threads))
+
     # Generate labels in parallel
     print(
-        f"Generating {len(labels)} label(s) to {output_dir}/ using {args.workers} workers"
+        f"Generating labels to {args.bundle if bundle else f'{output_dir}/'} using "
+        f"{render_jobs} OpenSCAD job(s) x {args.render_threads} thread(s) "
+        f"and {args.workers} workers"
     )
     print("-" * 60)
 
     start_time = time.time()
+    total = 0
     success_count = 0
+    skipped = 0
+    fitted = 0
+    top_peak = (0, None)  # highest label peak RSS, and its label
+    generated = []
+    seen = set()  # every label name, for --prune
+
+    manifest = Manifest(output_dir) if args.incremental else None
+    jobs = {}
+    fingerprints = {}
+    mesh_totals = {}
+    bundled = {}
+    failures = {}
+    # Deduplication: render key -> name of the label rendering it, and
+    # once done -> (name, outputs, error, mesh stats); waiting duplicates
+    dedup = not args.no_dedup
+    primaries = {}
+    finished = {}
+    followers = {}
+    renders_saved = 0
+    reuse_kinds = set()
+
+    if args.trace:
+        TRACER.open(args.trace)
+
+    # Render times learned by earlier runs order the work and set timeouts;
+    # --no-cache uses them but writes nothing to the cache directory
+    COST_MODEL.load(args.cache_dir / COST_MODEL_NAME)
+    COST_MODEL.adaptive_timeouts = args.timeout is None
+    TRACER.add_listener(COST_MODEL.on_span)
+
+    # Peak RSS over each label's local OpenSCAD runs, for its report line
+    label_peaks = {}
+    peaks_lock = threading.Lock()
+
+    def record_peak(name: str, seconds: float, info: dict) -> None:
+        if name == "openscad" and info.get("peak_rss") and info.get("label"):
+            with peaks_lock:
+                label = info["label"]
+                label_peaks[label] = max(label_peaks.get(label, 0), info["peak_rss"])
+
+    TRACER.add_listener(record_peak)
+
+    RUNNER.job_timeout = args.timeout or DEFAULT_JOB_TIMEOUT
+    RUNNER.set_deadline(args.deadline)
+    # Admit OpenSCAD runs by their learned peak memory and, unless -j says
+    # how many to run, by the cores they are measured to keep busy
+    RUNNER.memory_budget = memory_budget(args.memory_budget)
+    RUNNER.cpu_limit = None if args.render_jobs else usable_cpus()
+    if args.serve:
+        host, port = WORK_QUEUE.serve(*args.serve, worker_identity())
+        print(f"Serving render jobs on {host}:{port}; start workers with:")
+        print(f"  python generate_labels.py --worker {host}:{port}")
+    scheduler = DagScheduler({"render": render_jobs, "cpu": args.workers})
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+
+        # Bases depend only on label geometry, render each one once
+        base_renderer = SharedBaseRenderer(
+            openscad_path, SCRIPT_DIR / "labels.scad", work_dir / "bases", cache, cpus
+        )
+        (work_dir / "bases").mkdir()
+        base_tasks = {}
+
+        # Fastener and hardware icons are rendered once into a library kept
+        # next to the render cache, or just for this run with --no-cache
+        scad_file = SCRIPT_DIR / "labels.scad"
+        icons = IconLibrary(
+            library_root(
+                work_dir / "icons" if cache is None else args.cache_dir / "icons",
+                openscad_path,
+                scad_file,
+            ),
+            lambda variant, path: generate_icon_3mf(
+                openscad_path, scad_file, path, variant, cpus
+            ),
+        )
+        icon_tasks = {}
+
+        glyphs = None
+        if args.text_backend == "glyphs":
+            glyphs = GlyphTextRenderer(
+                openscad_path,
+                SCRIPT_DIR / "labels.scad",
+                work_dir / "parts",
+                cache,
+                cpus,
+            )
+            (work_dir / "parts").mkdir()
+
+        batches = []
+        label_feed = iter(labels)
+
+        def report(job, error, primary=None, data=None) -> dict | None:
+            """
+            Record a finished label. A duplicate's outputs are materialised
+            from its ``primary``'s (see ``finished``), or from ``data``, the
+            primary's output bytes in bundle mode, which this returns.
+            """
+            nonlocal success_count, renders_saved, top_peak
+            with peaks_lock:
+                peak = label_peaks.pop(job.name, None)
+            if peak is not None and peak > top_peak[0]:
+                top_peak = (peak, job.name)
+            if error is not None:
+                print(f"✗ {error}")
+                failures[job.name] = error
+                return None
+            if primary is None:
+                stats = job.mesh_stats
+                usage = f", peak {peak / 2**20:.0f} MB" if peak else ""
+                print(f"✓ Generated {job.name}.3mf ({format_mesh_stats(stats)}{usage})")
+                if bundle is not None:
+                    data = {
+                        path: job.buffers.pop(path).getvalue() for path in job.outputs()
+                    }
+                    for path, content in data.items():
+                        bundle.add(path.as_posix(), content)
+            else:
+                primary_name, primary_outputs, _, stats = primary
+                pairs = list(zip(primary_outputs, job.outputs()))
+                if bundle is None:
+                    kinds = {link_output(src, dst) for src, dst in pairs}
+                elif bundle.links:
+                    for src, dst in pairs:
+                        bundle.link(dst.as_posix(), src.as_posix())
+                    kinds = {"link"}
+                else:
+                    for src, dst in pairs:
+                        bundle.add(dst.as_posix(), data[src])
+                    kinds = {"copy"}
+                reuse_kinds.update(kinds)
+                renders_saved += 1
+                print(
+                    f"✓ Reused {primary_name}.3mf for {job.name}.3mf "
+                    f"({', '.join(sorted(kinds))})"
+                )
+            for key, count in stats.items():
+                mesh_totals[key] = mesh_totals.get(key, 0) + count
+            success_count += 1
+            generated.append(job.name)
+            if manifest is not None:
+                manifest.record(job.name, fingerprints.pop(job.name), job.outputs())
+            if bundle is not None:
+                bundled[job.name] = {"file": job.output_3mf.as_posix(), "mesh": stats}
+            return data
+
+        def refill() -> bool:
+            """
+            Read, plan and submit labels until the window is full.
+            Returns True once the label source is exhausted.
+            """
+            nonlocal total, success_count, skipped, fitted
+            want = args.window - len(jobs)
+            chunk = []
+            taken = 0
+            for label in itertools.islice(label_feed, want):
+                taken += 1
+                total += 1
+                if args.prune:
+                    seen.add(label["name"])
+                job = LabelJob(
+                    label,
+                    config,
+                    output_dir,
+                    work_dir,
+                    preview_dir,
+                    cache,
+                    cpus,
+                    glyphs,
+                    icons,
+                    args.preview_backend,
+                    in_memory=bundle is not None,
+                )
+                if job.fit is None:
+                    print(f"! {job.name}: can't auto-fit, rendering as configured")
+                elif job.fit:
+                    fitted += 1
+                if manifest is not None:
+                    fingerprint = job.fingerprint()
+                    if manifest.is_current(job.name, fingerprint, job.outputs()):
+                        success_count += 1
+                        skipped += 1
+                        generated.append(job.name)
+                        continue
+                    fingerprints[job.name] = fingerprint
+                if dedup:
+                    # Identical to a label already seen: reuse its render
+                    job.dedup_key = key = job.render_key()
+                    done = finished.get(key)
+                    if done is not None and (
+                        bundle is None or bundle.links or done[2] is not None
+                    ):
+                        report(job, done[2], done)
+                        continue
+                    if key in primaries:
+                        followers.setdefault(primaries[key], []).append(job)
+                        jobs[job.name] = job
+                        continue
+                    primaries[key] = job.name
+                jobs[job.name] = job
+                COST_MODEL.register(job.name, job.features)
+                chunk.append(job)
+
+            # Longest predicted first, so slow labels don't stretch the makespan
+            chunk.sort(
+                key=lambda job: -COST_MODEL.label_cost(
+                    job.name, job.cost_stages(args.single_pass)
+                )
+            )
+
+            # Labels that need the same kind of OpenSCAD run share one per batch
+            if args.batch_size > 1:
+                batches.extend(
+                    plan_batches(
+                        chunk,
+                        args.batch_size,
+                        "all" if args.single_pass else "lettering",
+                        work_dir / "batches",
+                        cache,
+                        cpus,
+                    )
+                )
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
-        # Submit all tasks
-        future_to_label = {
-            executor.submit(
-                process_single_label, label, config, output_dir, preview_dir
-            ): label
-            for label in labels
-        }
-
-        # Process results as they complete
-        for future in concurrent.futures.as_completed(future_to_label):
-            success, name, message = future.result()
-            symbol = "✓" if success else "✗"
-            print(f"{symbol} {message}")
-            if success:
-                success_count += 1
+            # Each label is a small DAG: base + text -> combine, plus preview
+            for job in chunk:
+                for task in plan_label_tasks(
+                    job,
+                    None if args.single_pass else base_renderer,
+                    base_tasks,
+                    args.single_pass,
+                    icon_tasks,
+                ):
+                    scheduler.submit(task)
+            return taken < want
+
+        # Report labels as their last stage completes, topping the window
+        # up once half of it has finished
+        aborted = None
+        drained = False
+        try:
+            while True:
+                if not drained:
+                    drained = refill()
+                for name, error in scheduler.results():
+                    job = jobs.pop(name)
+                    COST_MODEL.forget(name)
+                    data = report(job, error)
+                    if dedup:
+                        key = job.dedup_key
+                        del primaries[key]
+                        finished[key] = (name, job.outputs(), error, job.mesh_stats)
+                        for follower in followers.pop(name, []):
+                            del jobs[follower.name]
+                            report(follower, error, finished[key], data)
+                    if error is not None and args.fail_fast:
+                        aborted = "the first failure (--fail-fast)"
+                        break
+                    if not drained and len(jobs) <= args.window // 2:
+                        drained = refill()
+                if aborted or drained:
+                    break
+        except (ValueError, OSError) as e:
+            # A malformed label source is only found as it is read
+            print(f"Error: {e}", file=sys.stderr)
+            aborted = "a label source error"
+        except KeyboardInterrupt:
+            aborted = "interrupt"
+        finally:
+            if aborted:
+                # Kill in-flight OpenSCAD runs; queued stages are dropped
+                killed = RUNNER.cancel_all()
+                print(
+                    f"Aborted on {aborted}: stopped {killed} running OpenSCAD "
+                    "process(es)"
+                )
+            scheduler.shutdown()
+            WORK_QUEUE.close()
+            RUNNER.close()
+            if bundle is not None:
+                # Still a valid archive, of what finished, after an abort
+                bundle.close({"labels": bundled, "failed": failures})
+            if not args.no_cache:
+                COST_MODEL.save()
+            if manifest is not None:
+                if args.prune and drained and not (args.test or args.label):
+                    for path in manifest.prune(seen):
+                        print(f"- Removed {path}")
+                manifest.save()
 
     duration = time.time() - start_time
     print("-" * 60)
-    print(f"Complete: {success_count}/{len(labels)} labels in {duration:.1f}s")
+    print(f"Complete: {success_count}/{total} labels in {duration:.1f}s")
+    if bundle is not None:
+        print(f"Bundle: {len(bundle.entries)} entries written to {args.bundle}")
+    if manifest is not None:
+        print(f"Up to date: {skipped} label(s) skipped")
+    if fitted:
+        print(f"Auto-fit: {fitted} label(s) resized to fit their text")
+    if renders_saved:
+        print(
+            f"Deduplicated: {renders_saved} label(s) reused an identical "
+            f"label's render ({', '.join(sorted(reuse_kinds))})"
+        )
+    if not args.single_pass:
+        print(f"Base renders: {base_renderer.renders} shared by {total} label(s)")
+    if batches:
+        batched = sum(len(batch.jobs) for batch in batches)
+        failed = sum(batch.failed for batch in batches)
+        print(
+            f"Batched runs: {len(batches)} for {batched} label(s)"
+            + (f", {failed} failed and fell back to single runs" if failed else "")
+        )
+    if args.serve:
+        print(
+            f"Remote renders: {WORK_QUEUE.remote_renders} by "
+            f"{len(WORK_QUEUE.workers)} worker(s), {WORK_QUEUE.retries} retried"
+        )
+    if icon_tasks:
+        print(f"Icon renders: {icons.renders} for {len(icon_tasks)} variant(s)")
+    if glyphs is not None:
+        print(f"Glyph renders: {glyphs.glyph_renders}")
+    if mesh_totals:
+        print(f"Mesh size: {format_mesh_stats(mesh_totals)}")
+    if cache is not None and cache.hits + cache.misses:
+        print(f"Render cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+    if top_peak[1] is not None:
+        budget = RUNNER.memory_budget
+        print(
+            f"Memory: peak {top_peak[0] / 2**20:.0f} MB ({top_peak[1]}), "
+            f"{RUNNER.peak_total / 2**20:.0f} MB at once"
+            + (f" of a {budget / 2**20:.0f} MB budget" if budget else "")
+            + f"; {RUNNER.admission_waits} run(s) waited for room"
+        )
+    if COST_MODEL.observations:
+        print(f"Cost model: learned from {COST_MODEL.observations} stage run(s)")
+
+    if args.pack and generated:
+        packed = [(name, output_dir / f"{name}.3mf") for name in generated]
+        with span("pack"):
+            plates = write_packed_project(
+                packed,
+                args.pack,
+                LABEL_MATERIALS,
+                BAMBU_METADATA,
+                plate_size=args.plate_size,
+                spacing=args.pack_spacing,
+            )
+        print(f"Packed {len(packed)} label(s) onto {plates} plate(s) in {args.pack}")
+
+    print_stage_summary()
+    if args.trace:
+        TRACER.close()
+        print(f"Trace written to {args.trace}")
 
-    if success_count < len(labels):
+    if args.label and not total:
+        print(f"Error: label '{args.label}' not found in config", file=sys.stderr)
+        sys.exit(1)
+    if aborted == "interrupt":
+        sys.exit(130)
+    if aborted or success_count < total:
         sys.exit(1)
 
 
+def worker_main(args) -> int:
+    """--worker: render for a coordinator until it finishes; exit status."""
+    slots = args.render_jobs or max(
+        1, (os.cpu_count() or 4) // max(1, args.render_threads)
+    )
+    cache = None
+    if not args.no_cache:
+        cache = RenderCache(args.cache_dir, max_bytes=args.cache_size * 1024**2)
+    openscad_path = args.openscad or shutil.which("openscad")
+    if not openscad_path or not Path(openscad_path).exists():
+        where = f"at {openscad_path}" if openscad_path else "on PATH"
+        print(
+            f"Error: OpenSCAD not found {where}; pass --openscad PATH",
+            file=sys.stderr,
+        )
+        return 1
+    RUNNER.memory_budget = memory_budget(args.memory_budget)
+    RUNNER.cpu_limit = None if args.render_jobs else usable_cpus()
+    host, port = args.worker
+    print(f"Rendering for {host}:{port} with {slots} slot(s)")
+    try:
+        rendered = run_worker(
+            args.worker,
+            slots,
+            openscad_path,
+            cache,
+            CpuBudget(slots, max(1, args.render_threads)),
+        )
+    except (ConnectionError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        RUNNER.cancel_all()
+        return 130
+    finally:
+        RUNNER.close()
+    print(f"Coordinator done: rendered {rendered} job(s)")
+    return 0
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,144 @@
+"""
+Versioned library of pre-rendered fastener and hardware icons.
+
+Icons come from a small finite space (head x driver x shaft x threads,
+plus the hardware types), yet a text-layer render recomputes their
+booleans for every label. The library renders each variant once, at the
+origin and unscaled, through labels.scad's Icon mode and keeps it on
+disk in a directory versioned by labels.scad and the OpenSCAD build.
+Labels then place their icons in Python (see layout.py).
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable
+
+from layout import (
+    fastener_transform,
+    hardware_transform,
+    portrait_shaft_scale,
+    show_fastener,
+)
+from mesh import Mesh
+from quality import quality_variables
+from render_cache import binary_identity, source_digest
+
+# Bump when variant rendering changes so stale libraries are never reused
+ICON_LIBRARY_VERSION = "1"
+
+
+def library_root(base_dir: Path, openscad_path: str, scad_file: Path) -> Path:
+    """Library directory for this labels.scad and OpenSCAD build."""
+    h = hashlib.sha256()
+    for part in (binary_identity(openscad_path), source_digest(scad_file)):
+        h.update(part.encode())
+        h.update(b"\0")
+    return Path(base_dir) / f"v{ICON_LIBRARY_VERSION}-{h.hexdigest()[:16]}"
+
+
+def icon_variants(label_config: dict) -> list[dict]:
+    """
+    The icon variants a label uses, each as the labels.scad variables
+    that select it, at the label's quality.
+    """
+    variants = []
+    if show_fastener(label_config):
+        variants.append(
+            {
+                "Icon": "fastener",
+                "Fastener_Head": label_config["fastener_head"],
+                "Fastener_Shaft": label_config["fastener_shaft"],
+                "Fastener_Threads": label_config["fastener_threads"],
+                "Fastener_Driver": label_config["fastener_driver"],
+                "Icon_Shaft_Scale": round(portrait_shaft_scale(label_config), 6),
+            }
+        )
+    if label_config.get("hardware", "none") != "none":
+        variants.append(
+            {"Icon": "hardware", "Select_Hardware": label_config["hardware"]}
+        )
+    quality = quality_variables(label_config)
+    return [{**variant, **quality} for variant in variants]
+
+
+def variant_name(variant: dict) -> str:
+    """File-name-safe identity of a variant."""
+    name = "-".join(str(value) for value in variant.values())
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+class IconLibrary:
+    """
+    Renders icon variants on demand, at most once each, and places them.
+    Safe to call from worker threads.
+
+    ``render(variant, output_file)`` runs OpenSCAD with the variant's
+    variables and returns (ok, message).
+    """
+
+    def __init__(self, root: Path, render: Callable[[dict, Path], tuple[bool, str]]):
+        self.root = Path(root)
+        self.render = render
+        self.renders = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _entry(self, variant: dict) -> dict:
+        name = variant_name(variant)
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = {
+                    "lock": threading.Lock(),
+                    "path": self.root / f"{name}.3mf",
+                    "mesh": None,
+                }
+            return self._entries[name]
+
+    def build(self, variant: dict) -> tuple[bool, str]:
+        """Make sure a variant is in the library, rendering it if needed."""
+        entry = self._entry(variant)
+        with entry["lock"]:
+            if entry["path"].exists():
+                return True, None
+            self.root.mkdir(parents=True, exist_ok=True)
+            # Render to a temp name so an interrupted run leaves no bad entry
+            fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".3mf")
+            os.close(fd)
+            try:
+                ok, msg = self.render(variant, Path(tmp_name))
+                with self._lock:
+                    self.renders += 1
+                if ok:
+                    os.replace(tmp_name, entry["path"])
+            finally:
+                Path(tmp_name).unlink(missing_ok=True)
+        return ok, None if ok else f"Failed icon {variant_name(variant)}: {msg}"
+
+    def get(self, variant: dict) -> tuple[bool, Mesh | str]:
+        """The variant's mesh at the origin, or (False, error message)."""
+        ok, msg = self.build(variant)
+        if not ok:
+            return False, msg
+        entry = self._entry(variant)
+        with entry["lock"]:
+            if entry["mesh"] is None:
+                entry["mesh"] = Mesh.from_3mf(entry["path"])
+            return True, entry["mesh"]
+
+    def place(self, label_config: dict) -> tuple[bool, Mesh | str]:
+        """All of a label's icons, positioned in the flush text layer."""
+        placed = []
+        for variant in icon_variants(label_config):
+            ok, mesh = self.get(variant)
+            if not ok:
+                return False, mesh
+            if variant["Icon"] == "fastener":
+                matrix = fastener_transform(label_config)
+            else:
+                matrix = hardware_transform(label_config)
+            placed.append(mesh.transformed(matrix))
+        return True, Mesh.merge(placed)
@@ -0,0 +1,162 @@
+"""
+In-memory library API: render labels to 3MF bytes.
+
+For services that embed the generator instead of running the CLI::
+
+    from label_api import render_batch, render_label
+
+    data = render_label({"name": "M3x10", "text": "M3×10"})
+    for name, data in render_batch(specs, config, jobs=4):
+        upload(name, data)
+
+A spec is a label as in a config's ``labels`` list; ``config`` supplies
+``settings`` and ``defaults`` as in a config file, and both may be
+omitted: the defaults fall back to labels.scad's own and OpenSCAD is
+looked up on PATH. Nothing is written to the config's ``output_dir``.
+OpenSCAD still needs files to write its exports to, so those go to a
+scratch directory, on tmpfs (/dev/shm) where there is one, which is
+removed when the batch is done; the combined 3MFs are only ever built
+in memory.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from generate_labels import (
+    SCRIPT_DIR,
+    LabelJob,
+    SharedBaseRenderer,
+    plan_label_tasks,
+    validate_labels,
+)
+from label_source import iter_labels
+from quality import quality_variables
+from render_cache import RenderCache
+from scad_schema import REQUIRED_KEYS, config_parameter
+from scheduler import CpuBudget, DagScheduler
+from runner import usable_cpus
+
+TMPFS_SCRATCH = Path("/dev/shm")
+
+
+class LabelRenderError(Exception):
+    """Labels failed to render; ``failures`` maps each name to its error."""
+
+    def __init__(self, failures: dict[str, str]):
+        self.failures = failures
+        super().__init__(
+            "; ".join(f"{name}: {error}" for name, error in failures.items())
+        )
+
+
+def scratch_dir() -> Path | None:
+    """Where intermediates go: tmpfs where usable, else the temp directory."""
+    if TMPFS_SCRATCH.is_dir() and os.access(TMPFS_SCRATCH, os.W_OK):
+        return TMPFS_SCRATCH
+    return None
+
+
+def complete_config(config: dict | None = None) -> dict:
+    """
+    ``config`` with its gaps filled: labels.scad's defaults for the label
+    settings, filament slots 1 and 2, and OpenSCAD from PATH.
+    """
+    config = config or {}
+    settings = {"filaments": {"base": 1, "text": 2}, **config.get("settings", {})}
+    settings.setdefault("openscad_path", shutil.which("openscad"))
+    if not settings["openscad_path"] or not Path(settings["openscad_path"]).exists():
+        raise FileNotFoundError(
+            f"OpenSCAD not found at {settings['openscad_path']}; "
+            "set settings.openscad_path"
+        )
+    defaults = {key: config_parameter(key).default for key in REQUIRED_KEYS}
+    defaults.update(config.get("defaults", {}))
+    quality_variables(defaults)  # raises ValueError for an unknown profile
+    return {**config, "settings": settings, "defaults": defaults}
+
+
+def render_batch(
+    specs: Iterable[dict],
+    config: dict | None = None,
+    jobs: int | None = None,
+    single_pass: bool = False,
+    cache_dir: Path | None = None,
+    scratch: Path | None = None,
+) -> Iterator[tuple[str, bytes]]:
+    """
+    Render labels and yield (name, 3MF bytes) as each one finishes.
+
+    ``jobs`` OpenSCAD processes run at once (default: one per core).
+    Bases are shared between labels as in a CLI run, and ``cache_dir``
+    enables the on-disk render cache. Every spec is checked before
+    anything renders; problems raise ValueError, listing all of them.
+    Labels that fail to render raise LabelRenderError once the others
+    have been yielded.
+    """
+    config = complete_config(config)
+    labels = list(iter_labels(dict(spec) for spec in specs))
+    errors = validate_labels(labels, config)
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    jobs = jobs or usable_cpus()
+    openscad_path = config["settings"]["openscad_path"]
+    scad_file = SCRIPT_DIR / "labels.scad"
+    cache = RenderCache(cache_dir) if cache_dir is not None else None
+    cpus = CpuBudget(jobs, 1)
+    scheduler = DagScheduler({"render": jobs, "cpu": jobs})
+    failures = {}
+    with tempfile.TemporaryDirectory(
+        prefix="gridfinity-labels-", dir=scratch or scratch_dir()
+    ) as work_dir:
+        work_dir = Path(work_dir)
+        base_renderer = None
+        if not single_pass:
+            (work_dir / "bases").mkdir()
+            base_renderer = SharedBaseRenderer(
+                openscad_path, scad_file, work_dir / "bases", cache, cpus
+            )
+        base_tasks = {}
+        pending = {}
+        try:
+            for label in labels:
+                # Output paths only name the in-memory buffers
+                job = LabelJob(
+                    label,
+                    config,
+                    Path(),
+                    work_dir,
+                    cache=cache,
+                    cpus=cpus,
+                    in_memory=True,
+                )
+                pending[job.name] = job
+                for task in plan_label_tasks(
+                    job, base_renderer, base_tasks, single_pass
+                ):
+                    scheduler.submit(task)
+
+            for name, error in scheduler.results():
+                job = pending.pop(name)
+                if error is not None:
+                    failures[name] = error
+                    continue
+                yield name, job.buffers.pop(job.output_3mf).getvalue()
+        finally:
+            # Let in-flight renders finish before their directory goes
+            scheduler.shutdown()
+
+    if failures:
+        raise LabelRenderError(failures)
+
+
+def render_label(spec: dict, config: dict | None = None, **options) -> bytes:
+    """
+    Render one label and return its 3MF bytes; ``options`` are those of
+    render_batch. Raises LabelRenderError if it fails.
+    """
+    for _, data in render_batch([spec], config, **options):
+        return data
@@ -0,0 +1,132 @@
+"""
+Label sources for large catalogs, read lazily.
+
+Besides the ``labels`` list of a JSON config, labels can come from a
+JSONL file (one label object per line) or a CSV file (one label per
+row, columns named like the label keys). Either is read one label at a
+time, so a catalog of tens of thousands of labels never sits in memory.
+
+Any label's name may hold range templates, ``{first..last}`` or
+``{first..last:step}``, and comma lists such as ``{M3,M4}``; the label
+expands to one label per combination. Its other text fields refer to
+the chosen values as ``{0}``, ``{1}``, ... in template order::
+
+    {"name": "M3x{4..50:2}", "text": "M3×{0}"}
+"""
+
+import csv
+import itertools
+import json
+import re
+from pathlib import Path
+from typing import Iterable, Iterator
+
+LABEL_SOURCE_SUFFIXES = (".json", ".jsonl", ".csv")
+
+# Fields that stay strings even when a CSV cell looks like a number
+TEXT_FIELDS = ("name", "text", "text2")
+
+_TEMPLATE_RE = re.compile(r"\{(?:(-?\d+)\.\.(-?\d+)(?::(\d+))?|([^{}]*,[^{}]*))\}")
+_REFERENCE_RE = re.compile(r"\{(\d+)\}")
+
+
+def template_values(match: re.Match) -> list[str]:
+    """The values one ``{...}`` template stands for."""
+    if match.group(4) is not None:
+        return [value.strip() for value in match.group(4).split(",")]
+    first, last = int(match.group(1)), int(match.group(2))
+    step = int(match.group(3) or 1)
+    if step == 0:
+        raise ValueError(f"Zero step in range {match.group(0)}")
+    stop = last + 1 if last >= first else last - 1
+    return [
+        str(value) for value in range(first, stop, step if last >= first else -step)
+    ]
+
+
+def expand_label(label: dict) -> Iterator[dict]:
+    """One label per combination of the templates in its name."""
+    name = label.get("name", "")
+    matches = list(_TEMPLATE_RE.finditer(name))
+    if not matches:
+        yield label
+        return
+
+    choices = [template_values(m) for m in matches]
+    for values in itertools.product(*choices):
+        parts, end = [], 0
+        for match, value in zip(matches, values):
+            parts += [name[end : match.start()], value]
+            end = match.end()
+        expanded = dict(label, name="".join(parts) + name[end:])
+        for key in TEXT_FIELDS[1:]:
+            if isinstance(label.get(key), str):
+                expanded[key] = _REFERENCE_RE.sub(
+                    lambda m: (
+                        values[int(m.group(1))]
+                        if int(m.group(1)) < len(values)
+                        else m.group(0)
+                    ),
+                    label[key],
+                )
+        yield expanded
+
+
+def _csv_value(key: str, cell: str):
+    if key in TEXT_FIELDS:
+        return cell
+    try:
+        return json.loads(cell)  # numbers, booleans, [x, y] lists
+    except ValueError:
+        return cell
+
+
+def read_jsonl(path: Path) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                label = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: {e}") from None
+            if not isinstance(label, dict):
+                raise ValueError(f"{path}:{number}: expected a JSON object")
+            yield label
+
+
+def read_csv(path: Path) -> Iterator[dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield {
+                key: _csv_value(key, cell)
+                for key, cell in row.items()
+                if key and (cell or key in TEXT_FIELDS)
+            }
+
+
+def read_labels(path: Path) -> Iterator[dict]:
+    """Labels from a JSONL, CSV or JSON (list or config) file."""
+    suffix = path.suffix.lower()
+    if suffix == ".jsonl":
+        return read_jsonl(path)
+    if suffix == ".csv":
+        return read_csv(path)
+    if suffix == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return iter(data["labels"] if isinstance(data, dict) else data)
+    raise ValueError(
+        f"Unsupported label source {path.name}; "
+        f"use one of {', '.join(LABEL_SOURCE_SUFFIXES)}"
+    )
+
+
+def iter_labels(labels: Iterable[dict]) -> Iterator[dict]:
+    """Expand templates and check each label has a name."""
+    for number, label in enumerate(labels, 1):
+        if not label.get("name"):
+            raise ValueError(f"Label {number} has no name")
+        label.setdefault("text", "")
+        yield from expand_label(label)
@@ -0,0 +1,236 @@
+"""
+Python mirror of the placement rules in labels.scad.
+
+Stages that position parts themselves, rather than letting OpenSCAD do
+it, need the label size and anchor points labels.scad computes. Keep
+these in step with its [Hidden] section and the Text1_pos/Text2_pos
+calculations.
+"""
+
+from typing import Callable
+
+from fonts import FontMetrics
+from mesh import Mesh
+
+GRIDFINITY_X = 42
+LAYER = 0.2  # text and icon layer height
+FUDGE = 0.0001
+
+# The flush text layer is sunk this far into the base
+TEXT_DROP = LAYER - FUDGE
+
+# Fastener and hardware icon sizes
+DRIVER_X = 6
+HEAD_Y = DRIVER_X * 1.666666666666667
+SHAFT_X = HEAD_Y * 0.856
+HARD_X = HEAD_Y
+
+# How far each hardware icon reaches left of hardware_pos, where it is
+# not HARD_X / 2: t-nuts are wide and crimp barrels stick out. Every icon
+# reaches HARD_X / 2 to the right and up and down.
+HARDWARE_REACH = {
+    "tnut_1": HARD_X * 0.956,
+    "tnut_2": HARD_X * 0.956,
+    "crimp_ring_open": 9.4,
+    "crimp_ring_closed": 10.6,
+    "crimp_fork_open": 9.1,
+    "crimp_fork_closed": 10.3,
+    "crimp_spade_open": 9.4,
+    "crimp_spade_closed": 10.6,
+    "crimp_receptacle_open": 9.8,
+    "crimp_receptacle_closed": 11.0,
+}
+
+# labelXmm/labelYmm/labelZmm, used when gridfinity = false
+LABEL_MM = (36.0, 11.0, 1.2)
+
+# Text2 is not styled from the config; these are labels.scad's defaults
+TEXT2_DEFAULTS = {
+    "font": "Open Sans",
+    "font_style": "Regular",
+    "font_size": 6,
+    "align": "right",
+    "xy": (0, 0),
+}
+
+
+def label_size(label_config: dict) -> tuple[float, float, float]:
+    """labelX, labelY, labelZ for a label's geometry settings."""
+    offset_x, offset_y = label_config.get("offset_xy", (0, 0))
+    if not label_config.get("gridfinity", True):
+        return LABEL_MM
+    width = label_config.get("label_width", 1)
+    return width * GRIDFINITY_X - 6 + offset_x, 11 + offset_y, 1.2
+
+
+def text_style(label_config: dict, slot: int = 1) -> dict:
+    """Font, style, size, alignment and XY nudge of Text1 or Text2."""
+    if slot == 2:
+        return dict(TEXT2_DEFAULTS)
+    return {
+        "font": label_config["font"],
+        "font_style": label_config["font_style"],
+        "font_size": label_config["font_size"],
+        "align": label_config.get("text_align", "left"),
+        "xy": tuple(label_config.get("text_xy", (0, 0))),
+    }
+
+
+def text_anchor(label_config: dict, slot: int = 1) -> tuple[float, float, float]:
+    """Point text() is placed at, i.e. Text1_pos or Text2_pos."""
+    label_x, label_y, label_z = label_size(label_config)
+    style = text_style(label_config, slot)
+    nudge_x, nudge_y = style["xy"]
+    # Text1 adds offset_xy.x to the center/right anchors, Text2 does not
+    offset_x = label_config.get("offset_xy", (0, 0))[0] if slot == 1 else 0
+
+    if style["align"] == "center":
+        x = offset_x + label_x / 2 + nudge_x
+    elif style["align"] == "right":
+        x = label_x + nudge_x + offset_x
+    elif style["align"] == "left":
+        x = nudge_x
+    else:
+        x = 0
+    return x, label_y / 2 + nudge_y, label_z
+
+
+def show_fastener(label_config: dict) -> bool:
+    """Whether the fastener icon produces any geometry."""
+    return label_config.get("show_fastener", True) and any(
+        label_config.get(key, "none") != "none"
+        for key in ("fastener_head", "fastener_shaft")
+    )
+
+
+def portrait_shaft_scale(label_config: dict) -> float:
+    """Shaft shortening that keeps a portrait fastener within the label."""
+    if label_config.get("fastener_orientation", "landscape") != "portrait":
+        return 1.0
+    _, label_y, _ = label_size(label_config)
+    available = label_y - HEAD_Y - 1  # 1mm margin
+    return min(1.0, max(0.5, available / SHAFT_X))
+
+
+def fastener_transform(label_config: dict) -> tuple:
+    """
+    Matrix placing a fastener icon rendered at the origin: fastener_scale,
+    then the portrait rotation, then fastener_pos, sunk into the flush
+    text layer.
+    """
+    label_x, label_y, label_z = label_size(label_config)
+    scale = label_config.get("fastener_scale", 1.0)
+    z = label_z + LAYER / 2 - TEXT_DROP
+    if label_config.get("fastener_orientation", "landscape") == "portrait":
+        # rotate([0, 0, -90]) maps (x, y) to (y, -x)
+        x, y = label_x - HEAD_Y / 2 + 2, HEAD_Y / 2 - 1
+        return ((0, scale, 0, x), (-scale, 0, 0, y), (0, 0, 1, z))
+    x, y = label_x - DRIVER_X / 2, label_y / 2
+    return ((scale, 0, 0, x), (0, scale, 0, y), (0, 0, 1, z))
+
+
+def hardware_transform(label_config: dict) -> tuple:
+    """Matrix placing a hardware icon rendered at the origin at hardware_pos."""
+    label_x, label_y, label_z = label_size(label_config)
+    scale = label_config.get("hardware_scale", 1.0)
+    margin_right = (label_y - HARD_X) / 2
+    x = label_x - HARD_X / 2 - margin_right
+    z = label_z + LAYER / 2 - TEXT_DROP
+    return ((scale, 0, 0, x), (0, scale, 0, label_y / 2), (0, 0, 1, z))
+
+
+def _box_through(matrix: tuple, box: tuple) -> tuple[float, float, float, float]:
+    """XY bounding box of an origin-space box after a placement matrix."""
+    x_lo, y_lo, x_hi, y_hi = box
+    row_x, row_y = matrix[0], matrix[1]
+    points = [
+        (row_x[0] * x + row_x[1] * y + row_x[3], row_y[0] * x + row_y[1] * y + row_y[3])
+        for x in (x_lo, x_hi)
+        for y in (y_lo, y_hi)
+    ]
+    xs, ys = zip(*points)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def fastener_extent(label_config: dict) -> tuple | None:
+    """
+    (x_min, y_min, x_max, y_max) the fastener icon covers on the label,
+    or None when it draws nothing. Heads span DRIVER_X by HEAD_Y; the
+    shaft runs SHAFT_X further left of the head, shortened in portrait.
+    """
+    if not show_fastener(label_config):
+        return None
+    has_head = label_config.get("fastener_head", "none") != "none"
+    has_shaft = label_config.get("fastener_shaft", "none") != "none"
+    left = -DRIVER_X / 2
+    if has_shaft:
+        left = -(DRIVER_X / 2 + SHAFT_X) * portrait_shaft_scale(label_config)
+    right = DRIVER_X / 2 if has_head else -DRIVER_X / 2
+    box = (left, -HEAD_Y / 2, right, HEAD_Y / 2)
+    return _box_through(fastener_transform(label_config), box)
+
+
+def hardware_extent(label_config: dict) -> tuple | None:
+    """(x_min, y_min, x_max, y_max) the hardware icon covers, or None."""
+    hardware = label_config.get("hardware", "none")
+    if hardware == "none":
+        return None
+    reach = HARDWARE_REACH.get(hardware, HARD_X / 2)
+    box = (-reach, -HARD_X / 2, HARD_X / 2, HARD_X / 2)
+    return _box_through(hardware_transform(label_config), box)
+
+
+def text_extent(
+    text: str, metrics: FontMetrics, style: dict, anchor: tuple[float, float, float]
+) -> tuple | None:
+    """
+    (x_min, y_min, x_max, y_max) of the text's ink on the label, placed
+    as place_text() and text() place it, or None for blank text.
+    """
+    bounds = metrics.ink_bounds(text, style["font_size"])
+    if bounds is None:
+        return None
+    _, advance = metrics.layout(text, style["font_size"])
+    x_lo, y_lo, x_hi, y_hi = bounds
+    shift_x = {"center": -advance / 2, "right": -advance}.get(style["align"], 0)
+    shift_y = -(max(y_hi, 0) + min(y_lo, 0)) / 2
+    x, y, _ = anchor
+    return (
+        x + shift_x + x_lo,
+        y + shift_y + y_lo,
+        x + shift_x + x_hi,
+        y + shift_y + y_hi,
+    )
+
+
+def place_text(
+    text: str,
+    metrics: FontMetrics,
+    style: dict,
+    anchor: tuple[float, float, float],
+    glyph_mesh: Callable[[str], Mesh],
+) -> Mesh:
+    """
+    Assemble a text line from per-glyph meshes the way text() lays it out.
+
+    ``glyph_mesh(char)`` returns the glyph extruded from z=0 with its origin
+    on the baseline. Glyphs are spaced by advance width and kerning; halign
+    shifts by the total advance and valign="center" centres the glyph
+    bounds on the anchor, as OpenSCAD does. The result is in label space,
+    already dropped into the flush text layer.
+    """
+    placed, advance = metrics.layout(text, style["font_size"])
+    parts = [
+        glyph_mesh(char).translated(x, 0, 0)
+        for char, x in placed
+        if not metrics.is_blank(char)
+    ]
+    line = Mesh.merge(parts)
+
+    shift_x = {"center": -advance / 2, "right": -advance}.get(style["align"], 0)
+    lo, hi = line.bounds()
+    # text() measures ascent and descent from the baseline, never past it
+    shift_y = -(max(hi[1], 0) + min(lo[1], 0)) / 2
+
+    x, y, z = anchor
+    return line.translated(x + shift_x, y + shift_y, z - TEXT_DROP)
@@ -0,0 +1,112 @@
+"""
+Output manifest for incremental builds.
+
+The manifest lives in the output directory and records, per label, a
+fingerprint of everything that determines its output files plus the
+files that were written. A later ``--incremental`` run regenerates only
+labels whose fingerprint changed or whose outputs went missing.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from render_cache import fonts_digest, source_digest
+
+MANIFEST_NAME = ".labels-manifest.json"
+
+# Bump when the generator's output format changes so every label rebuilds
+MANIFEST_VERSION = 1
+
+
+def label_fingerprint(
+    label_config: dict,
+    text: str,
+    text2: str,
+    scad_file: Path,
+    fonts_dir: Path,
+    filaments: dict,
+    options: dict | None = None,
+) -> str:
+    """
+    SHA-256 over the effective render inputs of one label. ``options``
+    holds the run-wide switches that change its outputs without being
+    part of its settings, such as the text backend.
+    """
+    payload = json.dumps(
+        {
+            "version": MANIFEST_VERSION,
+            "label_config": label_config,
+            "text": text,
+            "text2": text2,
+            "scad": source_digest(scad_file),
+            "fonts": fonts_digest(fonts_dir),
+            "filaments": filaments,
+            "options": options or {},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """Per-label fingerprints and output files for one output directory."""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = output_dir
+        self.path = output_dir / MANIFEST_NAME
+        self.labels = {}
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.labels = data.get("labels", {})
+            except (OSError, ValueError):
+                pass  # unreadable manifest: rebuild everything
+
+    def is_current(self, name: str, fingerprint: str, outputs: list[Path]) -> bool:
+        """True when the label was built from the same inputs and still exists."""
+        entry = self.labels.get(name)
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return False
+        recorded = set(entry.get("outputs", []))
+        return all(
+            str(path.resolve()) in recorded and path.exists() for path in outputs
+        )
+
+    def record(self, name: str, fingerprint: str, outputs: list[Path]) -> None:
+        self.labels[name] = {
+            "fingerprint": fingerprint,
+            "outputs": [str(path.resolve()) for path in outputs],
+        }
+
+    def prune(self, keep: set[str]) -> list[Path]:
+        """
+        Delete outputs of labels not in ``keep`` and forget them.
+        Only files this manifest recorded are ever removed.
+        """
+        removed = []
+        for name in [n for n in self.labels if n not in keep]:
+            for output in self.labels.pop(name).get("outputs", []):
+                path = Path(output)
+                if path.suffix in (".3mf", ".png") and path.exists():
+                    path.unlink()
+                    removed.append(path)
+        return removed
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        fd, tmp_name = tempfile.mkstemp(dir=self.output_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "labels": self.labels},
+                f,
+                indent=1,
+                sort_keys=True,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_name, self.path)
@@ -0,0 +1,168 @@
+"""
+In-memory triangle meshes for parts composed in Python.
+
+Label meshes that go straight from OpenSCAD into the output are streamed
+(see threemf.py). Small parts that are reused and repositioned, such as
+glyphs and icons, are parsed once into a Mesh and then transformed and
+merged.
+
+A Mesh keeps its vertices in one flat ``array('d')`` (x0, y0, z0, x1,
+...) and its triangles in one flat ``array('I')`` of vertex indices: 8
+bytes per coordinate and 4 per index instead of a Python object per
+element. Transforms run column-wise through map() over array slices and
+XML is formatted a batch at a time, so no Python code runs per vertex.
+"""
+
+import operator
+import re
+import zipfile
+from array import array
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from threemf import (
+    MODEL_PATH,
+    ModelReader,
+    ModelWriter,
+    tag_blocks,
+    write_package_parts,
+)
+
+_VERTEX_RE = re.compile(
+    rb'<(?:[\w.-]+:)?vertex\s+x="([^"]+)"\s+y="([^"]+)"\s+z="([^"]+)"'
+)
+_TRIANGLE_RE = re.compile(
+    rb'<(?:[\w.-]+:)?triangle\s+v1="(\d+)"\s+v2="(\d+)"\s+v3="(\d+)"'
+)
+
+_VERTEX_XML = '     <vertex x="%.9g" y="%.9g" z="%.9g"/>\n'
+_TRIANGLE_XML = '     <triangle v1="%d" v2="%d" v3="%d"/>\n'
+
+# Vertices/triangles formatted per chunk handed to the writer
+_WRITE_BATCH = 4096
+
+
+def _column(terms: list[tuple[float, array]], offset: float, count: int) -> array:
+    """sum(coef * column) + offset, evaluated a whole column at a time."""
+    result = None
+    for coef, column in terms:
+        if coef == 0:
+            continue
+        part = column if coef == 1 else map(float(coef).__mul__, column)
+        result = part if result is None else map(operator.add, result, part)
+    if result is None:
+        return array("d", [float(offset)]) * count
+    if offset:
+        result = map(float(offset).__add__, result)
+    return result if isinstance(result, array) else array("d", result)
+
+
+class Mesh:
+    """Flat vertex coordinate and triangle index buffers."""
+
+    def __init__(self, vertices: array | None = None, triangles: array | None = None):
+        self.vertices = vertices if vertices is not None else array("d")
+        self.triangles = triangles if triangles is not None else array("I")
+
+    def __len__(self):
+        """Number of triangles."""
+        return len(self.triangles) // 3
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices) // 3
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[bytes]) -> "Mesh":
+        """Parse the <mesh> element chunks produced by ModelReader."""
+        mesh = cls()
+        for block in tag_blocks(chunks):
+            mesh._parse_block(block)
+        return mesh
+
+    def parse_through(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass <mesh> chunks through (regrouped by tag_blocks), adding their
+        vertices and triangles to this mesh on the way.
+        """
+        for block in tag_blocks(chunks):
+            self._parse_block(block)
+            yield block
+
+    def _parse_block(self, block: bytes) -> None:
+        self.vertices.extend(map(float, chain.from_iterable(_VERTEX_RE.findall(block))))
+        self.triangles.extend(
+            map(int, chain.from_iterable(_TRIANGLE_RE.findall(block)))
+        )
+
+    @classmethod
+    def from_3mf(cls, path: Path) -> "Mesh":
+        """Every mesh object in a 3MF, merged into one mesh."""
+        with zipfile.ZipFile(path) as zf, zf.open(MODEL_PATH) as fp:
+            return cls.merge(cls.from_chunks(c) for _, c in ModelReader(fp).objects())
+
+    @classmethod
+    def merge(cls, meshes: Iterable["Mesh"]) -> "Mesh":
+        """Concatenate meshes into one, renumbering triangle indices."""
+        merged = cls()
+        for mesh in meshes:
+            base = merged.vertex_count
+            merged.vertices.extend(mesh.vertices)
+            if base:
+                merged.triangles.extend(map(base.__add__, mesh.triangles))
+            else:
+                merged.triangles.extend(mesh.triangles)
+        return merged
+
+    def columns(self) -> tuple[array, array, array]:
+        """The x, y and z coordinates as three arrays."""
+        return self.vertices[0::3], self.vertices[1::3], self.vertices[2::3]
+
+    def transformed(self, matrix) -> "Mesh":
+        """Apply a 3x4 affine matrix given as three (a, b, c, t) rows."""
+        columns = self.columns()
+        count = self.vertex_count
+        vertices = array("d", bytes(8 * 3 * count))
+        for axis, (*coefs, offset) in enumerate(matrix):
+            vertices[axis::3] = _column(list(zip(coefs, columns)), offset, count)
+        # Triangles are shared, never mutated in place
+        return Mesh(vertices, self.triangles)
+
+    def translated(self, dx: float, dy: float, dz: float) -> "Mesh":
+        return self.transformed(((1, 0, 0, dx), (0, 1, 0, dy), (0, 0, 1, dz)))
+
+    def scaled(self, sx: float, sy: float, sz: float) -> "Mesh":
+        return self.transformed(((sx, 0, 0, 0), (0, sy, 0, 0), (0, 0, sz, 0)))
+
+    def bounds(self) -> tuple[list[float], list[float]]:
+        """([min_x, min_y, min_z], [max_x, max_y, max_z])."""
+        if not self.vertices:
+            return [0.0] * 3, [0.0] * 3
+        columns = self.columns()
+        return [min(c) for c in columns], [max(c) for c in columns]
+
+    def xml_chunks(self) -> Iterator[bytes]:
+        """The mesh as a 3MF <mesh> element, in chunks for ModelWriter.write."""
+        yield b"   <mesh>\n    <vertices>\n"
+        step = 3 * _WRITE_BATCH
+        for i in range(0, len(self.vertices), step):
+            batch = self.vertices[i : i + step]
+            yield (_VERTEX_XML * (len(batch) // 3) % tuple(batch)).encode("ascii")
+        yield b"    </vertices>\n    <triangles>\n"
+        for i in range(0, len(self.triangles), step):
+            batch = self.triangles[i : i + step]
+            yield (_TRIANGLE_XML * (len(batch) // 3) % tuple(batch)).encode("ascii")
+        yield b"    </triangles>\n   </mesh>"
+
+    def write_3mf(self, path: Path, name: str = "Mesh") -> None:
+        """Write the mesh as a single-object 3MF."""
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            write_package_parts(zf)
+            with zf.open(MODEL_PATH, "w") as fp:
+                writer = ModelWriter(fp)
+                writer.begin_object(1, name)
+                for chunk in self.xml_chunks():
+                    writer.write(chunk)
+                writer.end_object(1)
+                writer.close()
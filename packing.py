@@ -0,0 +1,203 @@
+"""
+Pack many generated labels onto build plates in one Bambu project 3MF.
+
+Labels are placed with a first-fit decreasing-height shelf packer, which
+is close to optimal for the near-identical rectangles a label batch is
+made of. Each label keeps its Base and Text objects and extruder slots
+from the combined 3MF; placement is expressed as build-item transforms.
+"""
+
+import math
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from threemf import (
+    MODEL_PATH,
+    PACKAGE_PARTS,
+    ModelReader,
+    ModelWriter,
+    bambu_model_settings,
+    bambu_plate_config,
+    copy_entries,
+    mesh_bounds,
+    write_package_parts,
+)
+
+DEFAULT_PLATE_SIZE = (256.0, 256.0)  # Bambu X1/P1 bed in mm
+DEFAULT_SPACING = 2.0
+
+# Bambu Studio lays plates out in a grid with a fifth of a plate between them
+PLATE_GAP_RATIO = 1 / 5
+
+
+def parse_plate_size(value: str) -> tuple[float, float]:
+    """Parse a 'WIDTHxDEPTH' plate size in mm, e.g. '256x256'."""
+    width, _, depth = value.lower().partition("x")
+    return float(width), float(depth or width)
+
+
+def pack_rectangles(
+    sizes: list[tuple[float, float]],
+    plate_size: tuple[float, float] = DEFAULT_PLATE_SIZE,
+    spacing: float = DEFAULT_SPACING,
+) -> list[tuple[int, float, float]]:
+    """
+    Place rectangles on as few plates as possible.
+
+    Returns (plate_index, x, y) per input rectangle, in input order, where
+    (x, y) is the rectangle's lower-left corner on its plate.
+    """
+    plate_w, plate_h = plate_size
+    for w, h in sizes:
+        if w + 2 * spacing > plate_w or h + 2 * spacing > plate_h:
+            raise ValueError(f"{w:.1f}x{h:.1f} mm item does not fit on a plate")
+
+    # Tallest first so each shelf is sized by its first item
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+
+    placements = [None] * len(sizes)
+    plates = []  # per plate: list of shelves [y, height, next_x]
+    for i in order:
+        w, h = sizes[i]
+        placed = False
+        for plate_index, shelves in enumerate(plates):
+            for shelf in shelves:
+                y, shelf_h, next_x = shelf
+                if h <= shelf_h and next_x + w + spacing <= plate_w:
+                    placements[i] = (plate_index, next_x, y)
+                    shelf[2] = next_x + w + spacing
+                    placed = True
+                    break
+            if placed:
+                break
+            # Open a new shelf on this plate if there is height left
+            top = shelves[-1][0] + shelves[-1][1] + spacing if shelves else spacing
+            if top + h + spacing <= plate_h:
+                shelves.append([top, h, spacing + w + spacing])
+                placements[i] = (plate_index, spacing, top)
+                placed = True
+                break
+        if not placed:
+            plates.append([[spacing, h, spacing + w + spacing]])
+            placements[i] = (len(plates) - 1, spacing, spacing)
+    return placements
+
+
+def plate_origin(
+    plate_index: int, plate_count: int, plate_size: tuple[float, float]
+) -> tuple[float, float]:
+    """World position of a plate's corner in Bambu Studio's plate grid."""
+    cols = math.ceil(math.sqrt(plate_count))
+    row, col = divmod(plate_index, cols)
+    stride_x = plate_size[0] * (1 + PLATE_GAP_RATIO)
+    stride_y = plate_size[1] * (1 + PLATE_GAP_RATIO)
+    return col * stride_x, -row * stride_y
+
+
+def _read_extruders(zf: zipfile.ZipFile) -> dict:
+    """Object id -> extruder slot from a combined label's model settings."""
+    try:
+        root = ET.fromstring(zf.read("Metadata/model_settings.config"))
+    except KeyError:
+        return {}
+    extruders = {}
+    for obj in root.iter("object"):
+        for meta in obj.iter("metadata"):
+            if meta.get("key") == "extruder":
+                extruders[obj.get("id")] = int(meta.get("value"))
+    return extruders
+
+
+def _label_bounds(label_3mf: Path) -> tuple[list[float], list[float]]:
+    lo, hi = [float("inf")] * 3, [float("-inf")] * 3
+    with zipfile.ZipFile(label_3mf) as zf, zf.open(MODEL_PATH) as fp:
+        for _, chunks in ModelReader(fp).objects():
+            obj_lo, obj_hi = mesh_bounds(chunks)
+            lo = [min(a, b) for a, b in zip(lo, obj_lo)]
+            hi = [max(a, b) for a, b in zip(hi, obj_hi)]
+    return lo, hi
+
+
+def write_packed_project(
+    labels: list[tuple[str, Path]],
+    output_3mf: Path,
+    materials: list[tuple[str, str]],
+    metadata: dict,
+    plate_size: tuple[float, float] = DEFAULT_PLATE_SIZE,
+    spacing: float = DEFAULT_SPACING,
+) -> int:
+    """
+    Write one multi-plate 3MF containing every (name, combined 3MF) label.
+
+    Returns the number of plates used.
+    """
+    bounds = [_label_bounds(path) for _, path in labels]
+    sizes = [(hi[0] - lo[0], hi[1] - lo[1]) for lo, hi in bounds]
+    placements = pack_rectangles(sizes, plate_size, spacing)
+    plate_count = max((p[0] for p in placements), default=-1) + 1
+
+    settings = []
+    plate_objects = [[] for _ in range(plate_count)]
+    next_id = 2  # id 1 is the shared basematerials group
+
+    with zipfile.ZipFile(output_3mf, "w", zipfile.ZIP_DEFLATED) as out_zf:
+        with out_zf.open(MODEL_PATH, "w") as out_fp:
+            writer = ModelWriter(out_fp, metadata=metadata, materials=materials)
+
+            for (name, path), (lo, _), (plate, x, y) in zip(labels, bounds, placements):
+                origin_x, origin_y = plate_origin(plate, plate_count, plate_size)
+                # Move the label's lower-left corner to its slot, resting on the bed
+                tx = origin_x + x - lo[0]
+                ty = origin_y + y - lo[1]
+                tz = 0.0 - lo[2]
+                transform = f"1 0 0 0 1 0 0 0 1 {tx:.4f} {ty:.4f} {tz:.4f}"
+
+                with zipfile.ZipFile(path) as zf, zf.open(MODEL_PATH) as fp:
+                    extruders = _read_extruders(zf)
+                    for attrs, chunks in ModelReader(fp).objects():
+                        part = attrs.get("name", "Part")
+                        pindex = attrs.get("pindex")
+                        writer.begin_object(
+                            next_id,
+                            f"{name} {part}",
+                            int(pindex) if pindex is not None else None,
+                        )
+                        for chunk in chunks:
+                            writer.write(chunk)
+                        writer.end_object(next_id, transform)
+
+                        settings.append(
+                            (
+                                next_id,
+                                f"{name} {part}",
+                                extruders.get(attrs.get("id"), 1),
+                            )
+                        )
+                        plate_objects[plate].append(next_id)
+                        next_id += 1
+            writer.close()
+
+        # Label thumbnails are not carried over, so neither are package parts
+        # that may refer to them
+        write_package_parts(out_zf)
+        if labels:
+            with zipfile.ZipFile(labels[0][1]) as zf:
+                copy_entries(
+                    zf,
+                    out_zf,
+                    skip=lambda n: n == MODEL_PATH
+                    or n in PACKAGE_PARTS
+                    or n.startswith("Metadata/"),
+                )
+
+        out_zf.writestr(
+            "Metadata/model_settings.config", bambu_model_settings(settings)
+        )
+        for plate, object_ids in enumerate(plate_objects, start=1):
+            out_zf.writestr(
+                f"Metadata/plate_{plate}.config",
+                bambu_plate_config(object_ids, plate_id=plate),
+            )
+
+    return plate_count
@@ -0,0 +1,132 @@
+"""
+PNG previews rasterised from label meshes, without OpenSCAD.
+
+The combined 3MF already holds the exact geometry, so a preview only
+needs a top-down orthographic view of it. Triangles facing the viewer
+are flat-shaded in their part's display colour and drawn back to front
+(a painter's algorithm: for a view straight down onto a label this
+resolves occlusion like a z-buffer would), filling each pixel row with
+one slice assignment so the per-pixel work stays in C.
+"""
+
+import math
+import struct
+import zlib
+
+from mesh import Mesh
+
+PREVIEW_WIDTH = 1400
+PREVIEW_MARGIN = 0.04  # of the image width, on every side
+
+# Light from the top left, slightly behind the viewer
+_LIGHT = (-0.3, 0.3, 0.9)
+_AMBIENT = 0.4
+
+
+def parse_colour(colour: str) -> tuple[int, int, int, int]:
+    """RGBA from "#RRGGBB" or "#RRGGBBAA"."""
+    value = colour.lstrip("#")
+    if len(value) == 6:
+        value += "FF"
+    return tuple(int(value[i : i + 2], 16) for i in range(0, 8, 2))
+
+
+def _shade(rgba: tuple, normal: tuple) -> bytes:
+    length = math.sqrt(sum(c * c for c in _LIGHT))
+    lambert = max(0.0, sum(n * l for n, l in zip(normal, _LIGHT)) / length)
+    factor = _AMBIENT + (1 - _AMBIENT) * lambert
+    r, g, b, a = rgba
+    return bytes((round(r * factor), round(g * factor), round(b * factor), a))
+
+
+def encode_png(width: int, height: int, rgba: bytes) -> bytes:
+    """An 8-bit RGBA PNG of unfiltered rows."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    stride = width * 4
+    raw = b"".join(
+        b"\x00" + rgba[row : row + stride] for row in range(0, len(rgba), stride)
+    )
+    return b"".join(
+        (
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+            chunk(b"IDAT", zlib.compress(raw, 6)),
+            chunk(b"IEND", b""),
+        )
+    )
+
+
+def render_png(parts: list[tuple[Mesh, str]], width: int = PREVIEW_WIDTH) -> bytes:
+    """
+    Top-down orthographic preview of (mesh, colour) parts as PNG bytes.
+    The height follows the parts' aspect ratio; the background is
+    transparent.
+    """
+    lo, hi = Mesh.merge(mesh for mesh, _ in parts).bounds()
+    span_x = max(hi[0] - lo[0], 1e-6)
+    span_y = max(hi[1] - lo[1], 1e-6)
+    margin = width * PREVIEW_MARGIN
+    scale = (width - 2 * margin) / span_x
+    height = max(1, math.ceil(span_y * scale + 2 * margin))
+    pixels = bytearray(width * height * 4)
+    stride = width * 4
+
+    # (depth, colour, three projected points) of every upward-facing triangle
+    faces = []
+    for mesh, colour in parts:
+        rgba = parse_colour(colour)
+        xs = [(x - lo[0]) * scale + margin for x in mesh.vertices[0::3]]
+        ys = [(hi[1] - y) * scale + margin for y in mesh.vertices[1::3]]
+        zs = mesh.vertices[2::3]
+        t = mesh.triangles
+        for i in range(0, len(t), 3):
+            a, b, c = t[i], t[i + 1], t[i + 2]
+            # Image y points down, so an upward (+z) face winds clockwise here
+            ux, uy = xs[b] - xs[a], ys[b] - ys[a]
+            vx, vy = xs[c] - xs[a], ys[c] - ys[a]
+            area = uy * vx - ux * vy
+            if area <= 0:
+                continue
+            # Normal from the mesh coordinates, for shading
+            p = mesh.vertices
+            e1 = (p[3 * b] - p[3 * a], p[3 * b + 1] - p[3 * a + 1], zs[b] - zs[a])
+            e2 = (p[3 * c] - p[3 * a], p[3 * c + 1] - p[3 * a + 1], zs[c] - zs[a])
+            n = (
+                e1[1] * e2[2] - e1[2] * e2[1],
+                e1[2] * e2[0] - e1[0] * e2[2],
+                e1[0] * e2[1] - e1[1] * e2[0],
+            )
+            length = math.sqrt(n[0] * n[0] + n[1] * n[1] + n[2] * n[2]) or 1.0
+            shade = _shade(rgba, (n[0] / length, n[1] / length, n[2] / length))
+            depth = zs[a] + zs[b] + zs[c]
+            points = ((xs[a], ys[a]), (xs[b], ys[b]), (xs[c], ys[c]))
+            faces.append((depth, shade, points))
+
+    faces.sort(key=lambda face: face[0])
+    for _, shade, points in faces:
+        (x0, y0), (x1, y1), (x2, y2) = sorted(points, key=lambda p: p[1])
+        if y2 == y0:
+            continue
+        # Rows whose pixel centres fall inside the triangle
+        first = max(0, math.ceil(y0 - 0.5))
+        last = min(height, math.ceil(y2 - 0.5))
+        for row in range(first, last):
+            yc = row + 0.5
+            xa = x0 + (x2 - x0) * (yc - y0) / (y2 - y0)
+            if yc < y1:
+                xb = x0 + (x1 - x0) * (yc - y0) / (y1 - y0)
+            else:
+                xb = x1 + (x2 - x1) * (yc - y1) / (y2 - y1) if y2 != y1 else x1
+            if xa > xb:
+                xa, xb = xb, xa
+            start = max(0, math.ceil(xa - 0.5))
+            end = min(width, math.ceil(xb - 0.5))
+            if end > start:
+                offset = row * stride
+                pixels[offset + 4 * start : offset + 4 * end] = shade * (end - start)
+
+    return encode_png(width, height, bytes(pixels))
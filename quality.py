@@ -0,0 +1,246 @@
+"""
+Tessellation quality profiles and a mesh simplification post-pass.
+
+labels.scad's own ``$fs = 0.01`` / ``$fa = 1`` produce very dense meshes
+for glyph curves and round icon details, which slows OpenSCAD, the
+combiner and the slicer alike. A profile trades that density for speed
+by overriding ``$fs``/``$fa``/``$fn`` on every render.
+
+Independently of the profile, ``simplify()`` shrinks a finished mesh
+without changing its shape: it welds duplicate vertices, then merges
+coplanar triangles by collapsing vertices that lie inside a flat region
+or along a straight edge of one.
+"""
+
+import math
+from collections import deque
+
+from mesh import Mesh
+
+# Special-variable overrides per profile. "production" restates the
+# labels.scad defaults, so it renders exactly what no profile renders.
+QUALITY_PROFILES = {
+    "draft": {"$fs": 0.25, "$fa": 12},
+    "standard": {"$fs": 0.05, "$fa": 4},
+    "production": {"$fs": 0.01, "$fa": 1},
+}
+SPECIAL_VARIABLES = ("$fs", "$fa", "$fn")
+
+# Vertices closer than this (mm) are welded
+WELD_TOLERANCE = 1e-6
+
+# Faces whose normals differ by less than this (radians) count as coplanar
+ANGLE_TOLERANCE = 1e-5
+
+
+def quality_variables(label_config: dict) -> dict:
+    """
+    The special-variable overrides for a label's ``quality`` setting:
+    a profile name, or a dict of explicit ``$fs``/``$fa``/``$fn`` values.
+    No setting means labels.scad's own values.
+    """
+    quality = label_config.get("quality")
+    if quality is None:
+        return {}
+    if isinstance(quality, dict):
+        unknown = set(quality) - set(SPECIAL_VARIABLES)
+        if unknown:
+            raise ValueError(
+                f"Unknown quality variable(s) {', '.join(sorted(unknown))}; "
+                f"use {', '.join(SPECIAL_VARIABLES)}"
+            )
+        return {name: quality[name] for name in SPECIAL_VARIABLES if name in quality}
+    if quality not in QUALITY_PROFILES:
+        raise ValueError(
+            f"Unknown quality profile {quality!r}; "
+            f"choose from {', '.join(QUALITY_PROFILES)}"
+        )
+    return dict(QUALITY_PROFILES[quality])
+
+
+def weld(mesh: Mesh, tolerance: float = WELD_TOLERANCE) -> Mesh:
+    """
+    Merge vertices within ``tolerance`` of each other, drop the triangles
+    that collapse as a result and any vertex no triangle uses.
+    """
+    scale = 1 / tolerance
+    remap = []
+    index = {}
+    vertices = mesh.vertices
+    for i in range(0, len(vertices), 3):
+        key = (
+            round(vertices[i] * scale),
+            round(vertices[i + 1] * scale),
+            round(vertices[i + 2] * scale),
+        )
+        remap.append(index.setdefault(key, len(index)))
+
+    kept = Mesh()
+    used = {}
+    triangles = mesh.triangles
+    for i in range(0, len(triangles), 3):
+        a, b, c = remap[triangles[i]], remap[triangles[i + 1]], remap[triangles[i + 2]]
+        if a == b or b == c or a == c:
+            continue
+        for v, old in ((a, triangles[i]), (b, triangles[i + 1]), (c, triangles[i + 2])):
+            if v not in used:
+                used[v] = len(used)
+                kept.vertices.extend(vertices[3 * old : 3 * old + 3])
+            kept.triangles.append(used[v])
+    return kept
+
+
+def _sub(p, q):
+    return p[0] - q[0], p[1] - q[1], p[2] - q[2]
+
+
+def _cross(p, q):
+    return (
+        p[1] * q[2] - p[2] * q[1],
+        p[2] * q[0] - p[0] * q[2],
+        p[0] * q[1] - p[1] * q[0],
+    )
+
+
+def _unit(p):
+    length = math.sqrt(p[0] * p[0] + p[1] * p[1] + p[2] * p[2])
+    if length == 0:
+        return None
+    return p[0] / length, p[1] / length, p[2] / length
+
+
+def _dot(p, q):
+    return p[0] * q[0] + p[1] * q[1] + p[2] * q[2]
+
+
+class _Decimator:
+    """
+    Vertex-collapse decimation that only removes vertices whose removal
+    cannot change the surface: those whose faces are all coplanar, and
+    those on a straight crease or open edge between two flat regions.
+    A collapse is rejected if it would flip or flatten any triangle or
+    make the mesh non-manifold.
+    """
+
+    def __init__(self, mesh: Mesh, angle_tolerance: float):
+        self.cos_tolerance = math.cos(angle_tolerance)
+        self.sin_tolerance = math.sin(angle_tolerance)
+        v = mesh.vertices
+        self.points = [tuple(v[i : i + 3]) for i in range(0, len(v), 3)]
+        t = mesh.triangles
+        self.faces = [list(t[i : i + 3]) for i in range(0, len(t), 3)]
+        self.normals = [self._normal(face) for face in self.faces]
+        self.vertex_faces = [set() for _ in self.points]
+        for f, face in enumerate(self.faces):
+            for v in face:
+                self.vertex_faces[v].add(f)
+
+    def _normal(self, face):
+        a, b, c = (self.points[v] for v in face)
+        return _unit(_cross(_sub(b, a), _sub(c, a)))
+
+    def _parallel(self, n, m) -> bool:
+        return n is not None and m is not None and _dot(n, m) >= self.cos_tolerance
+
+    def _neighbours(self, v) -> set:
+        return {u for f in self.vertex_faces[v] for u in self.faces[f]} - {v}
+
+    def _candidates(self, v) -> list:
+        """Vertices v may collapse onto without changing the surface."""
+        edge_faces = {}
+        for f in self.vertex_faces[v]:
+            if self.normals[f] is None:
+                return []
+            for u in self.faces[f]:
+                if u != v:
+                    edge_faces.setdefault(u, []).append(f)
+
+        features = []
+        for u, faces in edge_faces.items():
+            if len(faces) > 2:
+                return []  # non-manifold
+            if len(faces) == 1 or not self._parallel(
+                self.normals[faces[0]], self.normals[faces[1]]
+            ):
+                features.append(u)
+
+        if not features:
+            return sorted(edge_faces)
+        if len(features) != 2:
+            return []
+        # On a crease or open edge: only along it, and only if it is straight
+        p = self.points[v]
+        d1 = _unit(_sub(self.points[features[0]], p))
+        d2 = _unit(_sub(self.points[features[1]], p))
+        if d1 is None or d2 is None or _dot(d1, d2) > -self.cos_tolerance:
+            return []
+        return features
+
+    def _collapse(self, v, u) -> bool:
+        """Move v onto u if the result is still a valid, unflipped surface."""
+        shared = [f for f in self.vertex_faces[v] if u in self.faces[f]]
+        # Link condition: v and u may only share the vertices opposite their edge
+        opposite = {w for f in shared for w in self.faces[f]} - {u, v}
+        if self._neighbours(v) & self._neighbours(u) != opposite:
+            return False
+
+        moved = {}
+        for f in self.vertex_faces[v]:
+            if f in shared:
+                continue
+            face = [u if w == v else w for w in self.faces[f]]
+            normal = self._normal(face)
+            if not self._parallel(normal, self.normals[f]):
+                return False
+            moved[f] = (face, normal)
+
+        for f in shared:
+            for w in self.faces[f]:
+                if w != v:
+                    self.vertex_faces[w].discard(f)
+            self.faces[f] = None
+        for f, (face, normal) in moved.items():
+            self.faces[f] = face
+            self.normals[f] = normal
+            self.vertex_faces[u].add(f)
+        self.vertex_faces[v] = set()
+        return True
+
+    def run(self) -> Mesh:
+        queue = deque(range(len(self.points)))
+        queued = [True] * len(self.points)
+        while queue:
+            v = queue.popleft()
+            queued[v] = False
+            if not self.vertex_faces[v]:
+                continue
+            for u in self._candidates(v):
+                if self._collapse(v, u):
+                    # The neighbourhood of u changed; revisit it
+                    for w in self._neighbours(u) | {u}:
+                        if not queued[w]:
+                            queued[w] = True
+                            queue.append(w)
+                    break
+
+        result = Mesh()
+        used = {}
+        for face in self.faces:
+            if face is None:
+                continue
+            for v in face:
+                if v not in used:
+                    used[v] = len(used)
+                    result.vertices.extend(self.points[v])
+                result.triangles.append(used[v])
+        return result
+
+
+def merge_coplanar(mesh: Mesh, angle_tolerance: float = ANGLE_TOLERANCE) -> Mesh:
+    """Merge coplanar triangles into fewer, larger ones of the same shape."""
+    return _Decimator(mesh, angle_tolerance).run()
+
+
+def simplify(mesh: Mesh) -> Mesh:
+    """Weld duplicate vertices, then merge coplanar triangles."""
+    return merge_coplanar(weld(mesh))
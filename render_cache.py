@@ -0,0 +1,194 @@
+"""
+Content-addressed on-disk cache for OpenSCAD render artifacts.
+
+An entry is keyed by a SHA-256 over everything that can change what
+OpenSCAD writes: the OpenSCAD binary, the .scad source (plus anything it
+include<>s or use<>s), the bundled fonts, the fonts on OPENSCAD_FONT_PATH
+and the command-line arguments.
+Hits are served by copying the stored artifact to the requested output
+path. The cache is capped in size and evicts least-recently-used entries.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 2 * 1024**3  # 2 GiB
+
+# Bump when the key derivation changes so stale entries are never reused
+CACHE_VERSION = "2"
+
+_INCLUDE_RE = re.compile(rb"^\s*(?:include|use)\s*<([^>]+)>", re.MULTILINE)
+
+
+def default_cache_dir() -> Path:
+    """Per-user cache location (honours XDG_CACHE_HOME)."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "gridfinity-labels"
+
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_digest(scad_file: Path, seen: set | None = None) -> str:
+    """Hash a .scad file together with every file it includes or uses."""
+    seen = seen if seen is not None else set()
+    scad_file = scad_file.resolve()
+    if scad_file in seen or not scad_file.exists():
+        return ""
+    seen.add(scad_file)
+
+    data = scad_file.read_bytes()
+    h = hashlib.sha256(data)
+    for ref in _INCLUDE_RE.findall(data):
+        dep = scad_file.parent / ref.decode("utf-8", "replace")
+        h.update(source_digest(dep, seen).encode())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def fonts_digest(fonts_dir: Path) -> str:
+    """Hash every file under the fonts directory."""
+    h = hashlib.sha256()
+    if fonts_dir.is_dir():
+        for path in sorted(fonts_dir.rglob("*")):
+            if path.is_file():
+                h.update(str(path.relative_to(fonts_dir)).encode())
+                h.update(_hash_file(path).encode())
+    return h.hexdigest()
+
+
+def binary_identity(openscad_path: str) -> str:
+    """Identify the OpenSCAD build without spawning it."""
+    path = Path(openscad_path).resolve()
+    st = path.stat()
+    return f"{path}:{st.st_size}:{st.st_mtime_ns}"
+
+
+@lru_cache(maxsize=None)
+def font_path_identity(font_path: str) -> str:
+    """
+    Identify the fonts on an OPENSCAD_FONT_PATH value by name, size and
+    mtime, like binary_identity, without reading them.
+    """
+    parts = [font_path]
+    for directory in filter(None, font_path.split(os.pathsep)):
+        directory = Path(directory)
+        if directory.is_dir():
+            for path in sorted(directory.rglob("*")):
+                if path.is_file():
+                    st = path.stat()
+                    parts.append(f"{path}:{st.st_size}:{st.st_mtime_ns}")
+    return "\n".join(parts)
+
+
+class RenderCache:
+    """Size-capped LRU cache of rendered files, safe to share between threads."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None  # path -> (size, atime), loaded lazily
+
+    def key(
+        self, openscad_path: str, scad_file: Path, args: list[str], fonts_dir: Path
+    ) -> str:
+        """Derive the cache key for one OpenSCAD invocation.
+
+        ``args`` must not contain the output path, only the flags and
+        ``-D`` overrides that affect the result.
+        """
+        h = hashlib.sha256()
+        for part in (
+            CACHE_VERSION,
+            binary_identity(openscad_path),
+            source_digest(scad_file),
+            fonts_digest(fonts_dir),
+            # Other fonts OpenSCAD can pick up, set by the user
+            font_path_identity(os.environ.get("OPENSCAD_FONT_PATH", "")),
+            *args,
+        ):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _entry_path(self, key: str, suffix: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{suffix}"
+
+    def fetch(self, key: str, output_file: Path) -> bool:
+        """Copy a cached artifact to ``output_file``. Returns False on a miss."""
+        entry = self._entry_path(key, output_file.suffix)
+        try:
+            shutil.copyfile(entry, output_file)
+            os.utime(entry)  # mark as recently used
+            mtime = os.stat(entry).st_mtime
+        except FileNotFoundError:
+            # Missing, or evicted by another process while being read
+            with self._lock:
+                self.misses += 1
+            return False
+
+        with self._lock:
+            self.hits += 1
+            if self._index is not None and entry in self._index:
+                self._index[entry] = (self._index[entry][0], mtime)
+        return True
+
+    def store(self, key: str, output_file: Path) -> None:
+        """Add a freshly rendered artifact, evicting old entries if needed."""
+        entry = self._entry_path(key, output_file.suffix)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        # Copy to a temp name first so readers never see a partial file
+        fd, tmp_name = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(output_file, tmp_name)
+            os.replace(tmp_name, entry)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        st = entry.stat()
+        with self._lock:
+            index = self._load_index()
+            index[entry] = (st.st_size, st.st_mtime)
+            self._evict(index)
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            self._index = {}
+            if self.cache_dir.exists():
+                for path in self.cache_dir.glob("??/*"):
+                    if path.suffix == ".tmp":
+                        continue
+                    try:
+                        st = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    self._index[path] = (st.st_size, st.st_mtime)
+        return self._index
+
+    def _evict(self, index: dict) -> None:
+        total = sum(size for size, _ in index.values())
+        if total <= self.max_bytes:
+            return
+        for path, (size, _) in sorted(index.items(), key=lambda kv: kv[1][1]):
+            path.unlink(missing_ok=True)
+            del index[path]
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,356 @@
+"""
+asyncio-driven runner for OpenSCAD processes.
+
+Worker threads keep their blocking call style, but the processes
+themselves are owned by one event loop thread: it spawns them with
+create_subprocess_exec, streams their stderr line by line (keeping only a
+bounded tail for error messages), enforces a per-job timeout and a
+deadline for the whole run, and can kill every process at once on Ctrl-C
+or --fail-fast so none are left orphaned.
+
+The loop also samples each child's resident memory and CPU time from
+/proc. A process is only started while the memory the running children
+are expected to peak at, plus its own expected peak, stays within the
+memory budget, and while they leave a core free; otherwise it waits for
+one to finish. Where /proc is missing, every process starts at once.
+"""
+
+import asyncio
+import collections
+import os
+import signal
+import threading
+import time
+from typing import Callable
+
+from scheduler import pin_process
+
+DEFAULT_JOB_TIMEOUT = 180.0
+
+# Lines of stderr kept for the error message of a failed run
+STDERR_TAIL_LINES = 50
+
+# How often running processes' memory and CPU time are sampled
+SAMPLE_INTERVAL = 0.25
+
+# Default memory budget: this fraction of the memory available at start
+MEMORY_BUDGET_FRACTION = 0.8
+
+# Weight of the newest peak in the runner's own running mean
+PEAK_SMOOTHING = 0.3
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def available_memory() -> int | None:
+    """MemAvailable in bytes, or None without /proc/meminfo."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def sample_process(pid: int) -> tuple[int, int, float] | None:
+    """
+    (current RSS, peak RSS, CPU seconds) of a live process from /proc,
+    or None once it is gone or where /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the parenthesised command name; utime and stime
+            # are the 14th and 15th fields of the whole line
+            stat = f.read().rpartition(")")[2].split()
+        rss = int(fields["VmRSS"].split()[0]) * 1024
+        peak = int(fields.get("VmHWM", fields["VmRSS"]).split()[0]) * 1024
+        return rss, max(rss, peak), (int(stat[11]) + int(stat[12])) / _CLOCK_TICKS
+    except (OSError, KeyError, ValueError, IndexError):
+        return None
+
+
+def memory_budget(megabytes: float | None) -> int | None:
+    """
+    Bytes the OpenSCAD children may use together: ``megabytes`` if given
+    (0 for no limit), else MEMORY_BUDGET_FRACTION of what is available.
+    """
+    if megabytes is not None:
+        return int(megabytes * 2**20) or None
+    available = available_memory()
+    return None if available is None else int(available * MEMORY_BUDGET_FRACTION)
+
+
+def usable_cpus() -> int:
+    """Cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        return os.cpu_count() or 1
+
+
+class _Child:
+    """A process admitted by the runner, as last sampled."""
+
+    def __init__(self, expected: float):
+        self.expected = expected  # predicted peak RSS, bytes
+        self.rss = 0
+        self.peak = 0
+        self.cpu = 0.0
+        self.cores = 1.0  # cores in use; assume one until sampled
+
+
+class RunTimeout(Exception):
+    """The process exceeded its per-job timeout and was killed."""
+
+
+class DeadlineExceeded(Exception):
+    """The run-wide deadline passed; the process was killed or not started."""
+
+
+class RunCancelled(Exception):
+    """The runner was cancelled; the process was killed or not started."""
+
+
+class ProcessRunner:
+    """
+    Runs processes on a private event loop, started on first use.
+    ``run`` may be called from any thread and blocks until the process
+    exits.
+    """
+
+    def __init__(self, job_timeout: float = DEFAULT_JOB_TIMEOUT):
+        self.job_timeout = job_timeout
+        self.deadline = None  # time.monotonic() value, or None
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._running = set()  # asyncio tasks, touched on the loop thread only
+        self._cancelled = False
+        # Admission control: bytes the children may use together (None:
+        # no limit) and cores they may keep busy (None: no limit)
+        self.memory_budget = None
+        self.cpu_limit = None
+        self._children = set()  # _Child, touched on the loop thread only
+        self._typical_peak = None  # running mean of peaks, for unknown runs
+        self.admission_waits = 0
+        self.peak_total = 0  # highest combined RSS of the children seen
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel_all() was called (until close())."""
+        return self._cancelled
+
+    def set_deadline(self, seconds: float | None) -> None:
+        """Give the whole run ``seconds`` from now (None for no deadline)."""
+        self.deadline = None if seconds is None else time.monotonic() + seconds
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="process-runner", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(
+        self,
+        cmd: list[str],
+        env: dict | None = None,
+        timeout: float | None = None,
+        cpus: set | None = None,
+        on_stderr: Callable[[str], None] | None = None,
+        memory: float | None = None,
+        usage: dict | None = None,
+    ) -> tuple[int, str]:
+        """
+        Run ``cmd`` to completion and return (exit status, stderr tail).
+        ``on_stderr`` sees every stderr line as it arrives, on the loop
+        thread. ``memory`` is the process's expected peak RSS in bytes,
+        for admission; ``usage`` receives its measured ``peak_rss``,
+        ``cpu_seconds`` and ``seconds``, the time from the process's start
+        to its exit, without any wait for admission. Raises RunTimeout,
+        DeadlineExceeded or RunCancelled.
+        """
+        if self._cancelled:
+            raise RunCancelled("Cancelled")
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(
+                cmd, env, timeout or self.job_timeout, cpus, on_stderr, memory, usage
+            ),
+            loop,
+        )
+        return future.result()
+
+    def _admits(self, child: _Child) -> bool:
+        # Loop thread only. One process may always run, however large.
+        if not self._children:
+            return True
+        if self.cpu_limit is not None:
+            if sum(c.cores for c in self._children) + child.cores > self.cpu_limit:
+                return False
+        if self.memory_budget is not None:
+            expected = child.expected
+            if not expected:
+                # Nothing learned yet: assume the largest running process,
+                # once every running one has been sampled
+                if any(not c.rss for c in self._children):
+                    return False
+                expected = max(c.peak for c in self._children)
+            projected = sum(max(c.rss, c.expected) for c in self._children)
+            if projected + expected > self.memory_budget:
+                return False
+        return True
+
+    async def _admit(self, child: _Child) -> None:
+        """Wait until ``child`` fits beside the running processes."""
+        if not self._admits(child):
+            self.admission_waits += 1
+            while not self._admits(child):
+                if self.deadline is not None and time.monotonic() > self.deadline:
+                    raise DeadlineExceeded("Run deadline exceeded")
+                await asyncio.sleep(SAMPLE_INTERVAL)
+        self._children.add(child)
+
+    async def _sample(self, pid: int, child: _Child) -> None:
+        """Keep ``child`` up to date with its process until cancelled."""
+        last = time.monotonic()
+        while True:
+            sample = sample_process(pid)
+            if sample is None:
+                return
+            now = time.monotonic()
+            rss, peak, cpu = sample
+            if now > last and child.peak:
+                child.cores = max(0.0, (cpu - child.cpu) / (now - last))
+            child.rss, child.peak, child.cpu, last = rss, peak, cpu, now
+            self.peak_total = max(self.peak_total, sum(c.rss for c in self._children))
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    async def _run(
+        self, cmd, env, timeout, cpus, on_stderr, memory, usage
+    ) -> tuple[int, str]:
+        if self._cancelled:
+            raise RunCancelled("Cancelled")
+        task = asyncio.current_task()
+        self._running.add(task)
+        proc = None
+        sampler = None
+        started = None
+        child = _Child(memory if memory is not None else self._typical_peak or 0)
+        try:
+            await self._admit(child)
+            # The timeouts start once the process does
+            budget, limit = timeout, RunTimeout
+            if self.deadline is not None:
+                remaining = self.deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded("Run deadline exceeded")
+                if remaining < budget:
+                    budget, limit = remaining, DeadlineExceeded
+
+            started = time.monotonic()
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                env=env,
+                # Own process group, so a kill reaches anything it spawns
+                start_new_session=True,
+                limit=1 << 20,  # longest stderr line
+            )
+            pin_process(proc.pid, cpus)
+            sampler = asyncio.ensure_future(self._sample(proc.pid, child))
+            tail = await asyncio.wait_for(self._drain(proc, on_stderr), budget)
+            return proc.returncode, tail
+        except asyncio.TimeoutError:
+            raise limit(
+                "Run deadline exceeded"
+                if limit is DeadlineExceeded
+                else f"timed out after {timeout:g}s"
+            ) from None
+        except asyncio.CancelledError:
+            raise RunCancelled("Cancelled") from None
+        finally:
+            self._running.discard(task)
+            self._children.discard(child)
+            if sampler is not None:
+                sampler.cancel()
+            if proc is not None and proc.returncode is None:
+                _kill(proc)
+                await proc.wait()
+            if child.peak:
+                self._typical_peak = (
+                    child.peak
+                    if self._typical_peak is None
+                    else self._typical_peak
+                    + PEAK_SMOOTHING * (child.peak - self._typical_peak)
+                )
+            if usage is not None:
+                usage["peak_rss"] = child.peak
+                usage["cpu_seconds"] = child.cpu
+                if started is not None:
+                    usage["seconds"] = time.monotonic() - started
+
+    @staticmethod
+    async def _drain(proc, on_stderr) -> str:
+        tail = collections.deque(maxlen=STDERR_TAIL_LINES)
+        async for raw in proc.stderr:
+            line = raw.decode("utf-8", "replace").rstrip("\n")
+            tail.append(line)
+            if on_stderr is not None:
+                on_stderr(line)
+        await proc.wait()
+        return "\n".join(tail)
+
+    def cancel_all(self) -> int:
+        """
+        Kill every running process and refuse new ones. Returns how many
+        were running, once they are all gone. Call from any thread but the
+        loop's, including on Ctrl-C.
+        """
+        self._cancelled = True
+        if self._loop is None:
+            return 0
+
+        async def cancel():
+            running = list(self._running)
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.wait(running)
+            return len(running)
+
+        return asyncio.run_coroutine_threadsafe(cancel(), self._loop).result()
+
+    def close(self) -> None:
+        """Kill anything still running and stop the loop thread."""
+        if self._loop is None:
+            return
+        self.cancel_all()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._cancelled = False
+
+
+def _kill(proc) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, AttributeError):
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+
+# Shared by every OpenSCAD call in the process; main() sets its limits
+RUNNER = ProcessRunner()
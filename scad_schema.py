@@ -0,0 +1,205 @@
+"""
+Label settings schema, read from labels.scad's customizer annotations.
+
+labels.scad describes its parameters for OpenSCAD's customizer: a
+trailing ``// [a:A, b:B]`` comment lists the allowed values (with
+display names), ``// [min:step:max]`` a slider range and ``// .1`` a
+step. Parsing those comments gives one schema for both the generator,
+which checks every label before it runs OpenSCAD, and create_config.py,
+whose choice lists would otherwise drift from what labels.scad draws.
+-D overrides are never checked by OpenSCAD: an unknown head or style
+just renders the wrong icon or falls back to another font.
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+SCAD_FILE = Path(__file__).parent.resolve() / "labels.scad"
+
+# Config keys and the labels.scad variables they set
+CONFIG_VARIABLES = {
+    "fastener_head": "Fastener_Head",
+    "fastener_shaft": "Fastener_Shaft",
+    "fastener_threads": "Fastener_Threads",
+    "fastener_driver": "Fastener_Driver",
+    "fastener_orientation": "Fastener_Orientation",
+    "fastener_scale": "Fastener_Scale",
+    "show_fastener": "Show_Fastener",
+    "hardware": "Select_Hardware",
+    "hardware_scale": "Hardware_Scale",
+    "font": "Text1_Font",
+    "font_style": "Text1_Font_Style",
+    "font_size": "Text1_Font_Size",
+    "text_align": "Text1_Align",
+    "text_xy": "Text1_XY",
+    "text2": "Text2",
+    "label_width": "label_width",
+    "offset_xy": "offset_xy",
+    "gridfinity": "gridfinity",
+    "backward_compatible": "backward_compatible",
+}
+
+# Keys every label needs, from the defaults or its own overrides
+REQUIRED_KEYS = (
+    "fastener_head",
+    "fastener_shaft",
+    "fastener_threads",
+    "fastener_driver",
+    "font",
+    "font_style",
+    "font_size",
+)
+
+# Choice lists that only suggest values: OpenSCAD takes any installed font
+SUGGESTED_ONLY = {"Text1_Font", "Text2_Font"}
+
+_ASSIGNMENT_RE = re.compile(
+    r"^([A-Za-z_$][\w$]*)\s*=\s*(.*?)\s*;\s*(?://\s*(.*?))?\s*$"
+)
+_SECTION_RE = re.compile(r"^/\*\s*\[(.+?)\]\s*\*/")
+_NUMBER_RE = re.compile(r"^-?(\d+\.?\d*|\.\d+)$")
+
+
+def _number(text: str) -> int | float:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _literal(text: str):
+    """An OpenSCAD literal as a Python value, or None for an expression."""
+    text = text.strip()
+    if text in ("true", "false"):
+        return text == "true"
+    if _NUMBER_RE.match(text):
+        return _number(text)
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text[1:-1]
+    if text.startswith("[") and text.endswith("]"):
+        items = [_literal(item) for item in text[1:-1].split(",") if item.strip()]
+        return None if None in items else items
+    return None
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Parameter:
+    """One customizer parameter: its default and what it accepts."""
+
+    def __init__(self, name: str, default, annotation: str = ""):
+        self.name = name
+        self.default = default
+        self.choices = None  # value -> display name
+        self.minimum = self.maximum = self.step = None
+        self.suggested_only = name in SUGGESTED_ONLY
+
+        annotation = annotation.strip()
+        if annotation.startswith("[") and annotation.endswith("]"):
+            inner = annotation[1:-1]
+            parts = [part.strip() for part in inner.split(":")]
+            if "," not in inner and all(_NUMBER_RE.match(p) for p in parts):
+                # [max], [min:max] or [min:step:max]
+                bounds = [_number(p) for p in parts]
+                if len(bounds) == 1:
+                    self.minimum, self.maximum = 0, bounds[0]
+                elif len(bounds) == 2:
+                    self.minimum, self.maximum = bounds
+                else:
+                    self.minimum, self.step, self.maximum = bounds[:3]
+            else:
+                self.choices = {}
+                for item in inner.split(","):
+                    value, _, label = item.partition(":")
+                    value = value.strip().strip('"')
+                    if _is_number(default):
+                        value = _number(value)
+                    self.choices[value] = label.strip() or str(value)
+        elif _NUMBER_RE.match(annotation):
+            self.step = _number(annotation)
+
+    @property
+    def values(self) -> list:
+        """The allowed values, in labels.scad's order (None if any)."""
+        return list(self.choices) if self.choices is not None else None
+
+    def check(self, value) -> str | None:
+        """Why ``value`` can't be used for this parameter, or None if it can."""
+        default = self.default
+        if isinstance(default, bool):
+            if not isinstance(value, bool):
+                return f"expected true or false, got {value!r}"
+        elif _is_number(default):
+            if not _is_number(value):
+                return f"expected a number, got {value!r}"
+        elif isinstance(default, str):
+            if not isinstance(value, str):
+                return f"expected a string, got {value!r}"
+        elif isinstance(default, list):
+            if (
+                not isinstance(value, list)
+                or len(value) != len(default)
+                or not all(_is_number(v) for v in value)
+            ):
+                return f"expected a list of {len(default)} numbers, got {value!r}"
+
+        if self.choices is not None and not self.suggested_only:
+            if value not in self.choices:
+                return f"{value!r} is not one of {', '.join(map(str, self.choices))}"
+        if self.minimum is not None and not self.minimum <= value <= self.maximum:
+            return f"{value!r} is outside {self.minimum}–{self.maximum}"
+        return None
+
+
+def parse_schema(source: str) -> dict[str, Parameter]:
+    """The customizer parameters of a .scad source, up to its [Hidden] section."""
+    schema = {}
+    for line in source.splitlines():
+        line = line.strip()
+        section = _SECTION_RE.match(line)
+        if section and section.group(1).strip().lower() == "hidden":
+            break
+        match = _ASSIGNMENT_RE.match(line)
+        if match is None:
+            continue
+        name, default, annotation = match.groups()
+        default = _literal(default)
+        if default is not None:  # computed values aren't parameters
+            schema[name] = Parameter(name, default, annotation or "")
+    return schema
+
+
+@lru_cache(maxsize=None)
+def load_schema(scad_file: Path = SCAD_FILE) -> dict[str, Parameter]:
+    """The schema of ``scad_file`` (labels.scad by default)."""
+    return parse_schema(Path(scad_file).read_text(encoding="utf-8"))
+
+
+def config_parameter(key: str, scad_file: Path = SCAD_FILE) -> Parameter:
+    """The labels.scad parameter behind a config key."""
+    return load_schema(scad_file)[CONFIG_VARIABLES[key]]
+
+
+def check_label_config(label_config: dict, scad_file: Path = SCAD_FILE) -> dict:
+    """
+    Problems with a merged label config, as {config key: message}; empty
+    when OpenSCAD will render it as configured.
+    """
+    schema = load_schema(scad_file)
+    problems = {}
+    for key in REQUIRED_KEYS:
+        if key not in label_config:
+            problems[key] = "missing; set it in defaults or on the label"
+    for key, variable in CONFIG_VARIABLES.items():
+        if key in label_config and variable in schema:
+            problem = schema[variable].check(label_config[key])
+            if problem is not None:
+                problems[key] = problem
+    return problems
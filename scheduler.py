@@ -0,0 +1,178 @@
+"""
+Small DAG scheduler for label render stages.
+
+Each label is a handful of tasks (base render, text render, combine,
+preview) with dependencies between them. Tasks run on named thread pools
+so OpenSCAD concurrency is capped separately from Python-side work, and
+independent stages of a label overlap instead of running back to back.
+"""
+
+import concurrent.futures
+import os
+import queue
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+class Task:
+    """
+    One unit of work. ``fn`` returns (ok, message); a failed task fails
+    every task that depends on it with the same message.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[], tuple[bool, str]],
+        deps: list["Task"] = (),
+        pool: str = "cpu",
+        group: str | None = None,
+        name: str = "",
+    ):
+        self.fn = fn
+        self.deps = list(deps)
+        self.pool = pool
+        self.group = group
+        self.name = name
+        self.done = False
+        self.ok = None
+        self.message = None
+        self._waiting = set()
+        self._dependents = []
+
+    def __repr__(self):
+        return f"<Task {self.group}:{self.name}>"
+
+
+class DagScheduler:
+    """
+    Runs tasks as soon as their dependencies finish.
+
+    ``submit`` and ``results`` must be called from the same thread; that
+    thread owns all bookkeeping, workers only run task functions.
+    """
+
+    def __init__(self, pool_sizes: dict[str, int]):
+        self._executors = {
+            name: concurrent.futures.ThreadPoolExecutor(
+                max_workers=size, thread_name_prefix=f"{name}-pool"
+            )
+            for name, size in pool_sizes.items()
+        }
+        self._completed = queue.Queue()
+        self._outstanding = 0
+        self._groups = {}  # group -> [remaining tasks, first error]
+
+    def submit(self, task: Task) -> None:
+        """Queue a task; its dependencies must have been submitted already."""
+        self._outstanding += 1
+        if task.group is not None:
+            self._groups.setdefault(task.group, [0, None])[0] += 1
+
+        failed = next((d for d in task.deps if d.done and not d.ok), None)
+        if failed is not None:
+            self._finish(task, False, failed.message)
+            return
+
+        task._waiting = {d for d in task.deps if not d.done}
+        for dep in task._waiting:
+            dep._dependents.append(task)
+        if not task._waiting:
+            self._dispatch(task)
+
+    def _dispatch(self, task: Task) -> None:
+        future = self._executors[task.pool].submit(task.fn)
+        future.add_done_callback(lambda f: self._completed.put((task, f)))
+
+    def _finish(self, task: Task, ok: bool, message: str) -> None:
+        # Runs on the owning thread only
+        task.done, task.ok, task.message = True, ok, message
+        self._completed.put((task, None))
+
+    def results(self) -> Iterator[tuple[str, str | None]]:
+        """
+        Drive the DAG until every submitted task has finished, yielding
+        (group, error) as each group completes (error is None on success).
+        More tasks may be submitted between iterations.
+        """
+        while self._outstanding:
+            task, future = self._completed.get()
+            if future is not None:
+                try:
+                    ok, message = future.result()
+                except Exception as e:
+                    ok, message = False, f"Exception: {e}"
+                task.done, task.ok, task.message = True, ok, message
+
+            self._outstanding -= 1
+            for dependent in task._dependents:
+                if dependent.done:
+                    continue
+                if not task.ok:
+                    dependent._waiting.clear()
+                    self._finish(dependent, False, task.message)
+                    continue
+                dependent._waiting.discard(task)
+                if not dependent._waiting:
+                    self._dispatch(dependent)
+
+            if task.group is not None:
+                state = self._groups[task.group]
+                state[0] -= 1
+                if not task.ok and state[1] is None:
+                    state[1] = task.message
+                if state[0] == 0:
+                    del self._groups[task.group]
+                    yield task.group, state[1]
+
+    def shutdown(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+class CpuBudget:
+    """
+    Hands out disjoint CPU sets to concurrent OpenSCAD processes so that
+    each one's worker threads stay within its budget instead of every
+    process spreading over every core.
+    """
+
+    def __init__(self, jobs: int, threads_per_job: int):
+        self.threads_per_job = threads_per_job
+        try:
+            cpus = sorted(os.sched_getaffinity(0))
+        except AttributeError:  # not available on macOS
+            cpus = []
+        self._free = queue.Queue()
+        for slot in range(jobs):
+            if cpus:
+                start = (slot * threads_per_job) % len(cpus)
+                chosen = {
+                    cpus[(start + i) % len(cpus)]
+                    for i in range(min(threads_per_job, len(cpus)))
+                }
+            else:
+                chosen = None
+            self._free.put(chosen)
+
+    @contextmanager
+    def acquire(self):
+        """Yield a CPU set (or None where affinity is unsupported)."""
+        cpus = self._free.get()
+        try:
+            yield cpus
+        finally:
+            self._free.put(cpus)
+
+    def env(self) -> dict:
+        """Environment hints for thread pools that read them."""
+        return {"OMP_NUM_THREADS": str(self.threads_per_job)}
+
+
+def pin_process(pid: int, cpus: set | None) -> None:
+    """Restrict a child process to ``cpus``; best effort."""
+    if not cpus:
+        return
+    try:
+        os.sched_setaffinity(pid, cpus)
+    except (AttributeError, ProcessLookupError, OSError):
+        pass
@@ -0,0 +1,331 @@
+"""
+Streaming helpers for reading and writing 3MF model parts.
+
+OpenSCAD meshes at $fs=0.01 get large, so nothing here builds an XML tree
+of a mesh. ModelReader scans a model stream for <object> and <mesh> tags
+and hands back the raw bytes of each <mesh> element in bounded chunks;
+ModelWriter emits a fresh model around those byte ranges. Memory use is
+bounded by the chunk size, not the mesh size.
+"""
+
+import re
+import shutil
+import zipfile
+from array import array
+from itertools import chain
+from typing import Callable, Iterable, Iterator
+from xml.sax.saxutils import escape, quoteattr
+
+MODEL_PATH = "3D/3dmodel.model"
+THUMBNAIL_PATH = "Metadata/thumbnail.png"
+
+NS_3MF = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+
+CHUNK_SIZE = 1 << 20
+
+# Package parts every 3MF needs besides the model itself
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\n'
+    ' <Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\n'
+    ' <Default Extension="model" '
+    'ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>\n'
+    ' <Default Extension="png" ContentType="image/png"/>\n'
+    "</Types>\n"
+)
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\n'
+    ' <Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>\n'
+    "%s"
+    "</Relationships>\n"
+)
+THUMBNAIL_REL = (
+    f' <Relationship Target="/{THUMBNAIL_PATH}" Id="rel1" '
+    'Type="http://schemas.openxmlformats.org/package/2006/relationships/'
+    'metadata/thumbnail"/>\n'
+)
+PACKAGE_PARTS = {"[Content_Types].xml", "_rels/.rels"}
+
+# Enough lookbehind to never split a tag name across two reads
+_TAIL = 256
+
+_ATTR_RE = re.compile(rb'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_ROOT_RE = re.compile(rb"<((?:[\w.-]+:)?)model[\s>]")
+_TAG_RE = re.compile(rb"<((?:[\w.-]+:)?)(object|mesh)[\s>/]|</(?:[\w.-]+:)?resources>")
+
+
+def parse_attributes(tag: bytes) -> dict:
+    """Attributes of a start tag as a str -> str dict."""
+    return {
+        m.group(1).decode(): (m.group(2) or m.group(3) or b"").decode()
+        for m in _ATTR_RE.finditer(tag)
+    }
+
+
+class ModelReader:
+    """
+    Incremental scanner over a 3D/3dmodel.model stream.
+
+    ``objects()`` yields (object attributes, mesh chunk iterator) per mesh
+    object in resource order. As with itertools.groupby, each chunk
+    iterator must be consumed before advancing to the next object.
+    """
+
+    def __init__(self, fp, chunk_size: int = CHUNK_SIZE):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buf = b""
+        self._eof = False
+        self.root_attributes = {}
+        self.namespaces = {}  # xmlns declarations from the root element
+        self._read_root()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        data = self._fp.read(self._chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf += data
+        return True
+
+    def _search(self, pattern: re.Pattern):
+        while True:
+            m = pattern.search(self._buf)
+            if m:
+                return m
+            # Keep a short tail in case a tag straddles the read boundary
+            self._buf = self._buf[-_TAIL:]
+            if not self._fill():
+                return None
+
+    def _start_tag(self, start: int) -> bytes:
+        while (end := self._buf.find(b">", start)) < 0:
+            if not self._fill():
+                raise ValueError("Truncated 3MF model")
+        tag = self._buf[start : end + 1]
+        self._buf = self._buf[end + 1 :]
+        return tag
+
+    def _read_root(self) -> None:
+        m = self._search(_ROOT_RE)
+        if m is None:
+            raise ValueError("No <model> element in 3MF model")
+        attrs = parse_attributes(self._start_tag(m.start()))
+        self.namespaces = {k: v for k, v in attrs.items() if k.startswith("xmlns")}
+        self.root_attributes = {
+            k: v for k, v in attrs.items() if not k.startswith("xmlns")
+        }
+
+    def objects(self) -> Iterator[tuple[dict, Iterator[bytes]]]:
+        attrs = None
+        while True:
+            m = self._search(_TAG_RE)
+            if m is None or m.group(2) is None:
+                return  # end of stream or </resources>
+            if m.group(2) == b"object":
+                attrs = parse_attributes(self._start_tag(m.start()))
+                continue
+
+            # <mesh>: hand the element through untouched
+            self._buf = self._buf[m.start() :]
+            end_tag = b"</" + m.group(1) + b"mesh>"
+            chunks = self._mesh_chunks(end_tag)
+            yield attrs or {}, chunks
+            for _ in chunks:  # drain if the consumer skipped this mesh
+                pass
+            attrs = None
+
+    def _mesh_chunks(self, end_tag: bytes) -> Iterator[bytes]:
+        keep = len(end_tag) - 1
+        while True:
+            end = self._buf.find(end_tag)
+            if end >= 0:
+                end += len(end_tag)
+                chunk, self._buf = self._buf[:end], self._buf[end:]
+                yield chunk
+                return
+            if len(self._buf) > keep:
+                chunk, self._buf = self._buf[:-keep], self._buf[-keep:]
+                yield chunk
+            if not self._fill():
+                raise ValueError("Truncated <mesh> in 3MF model")
+
+
+class ModelWriter:
+    """
+    Writes a 3MF model part around mesh byte ranges copied from readers.
+
+    Call ``begin_object``, feed raw <mesh> chunks to ``write``, then
+    ``end_object``; ``close`` writes the build section.
+    """
+
+    def __init__(
+        self,
+        fp,
+        namespaces: dict | None = None,
+        metadata: dict | None = None,
+        materials: list[tuple[str, str]] | None = None,
+        unit: str = "millimeter",
+    ):
+        self._fp = fp
+        self._items = []
+
+        declared = {"xmlns": NS_3MF, **(namespaces or {})}
+        decls = "".join(f" {k}={quoteattr(v)}" for k, v in declared.items())
+        out = [
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            f'<model unit={quoteattr(unit)} xml:lang="en-US"{decls}>\n',
+        ]
+        for name, value in (metadata or {}).items():
+            out.append(
+                f" <metadata name={quoteattr(name)}>{escape(value)}</metadata>\n"
+            )
+        out.append(" <resources>\n")
+        if materials:
+            out.append('  <basematerials id="1">\n')
+            for name, color in materials:
+                out.append(
+                    f"   <base name={quoteattr(name)} displaycolor={quoteattr(color)}/>\n"
+                )
+            out.append("  </basematerials>\n")
+        self._fp.write("".join(out).encode("utf-8"))
+
+    def begin_object(self, object_id: int, name: str, pindex: int | None = None):
+        material = f' pid="1" pindex="{pindex}"' if pindex is not None else ""
+        self._fp.write(
+            f'  <object id="{object_id}" name={quoteattr(name)} '
+            f'type="model"{material}>\n'.encode("utf-8")
+        )
+
+    def write(self, chunk: bytes) -> None:
+        self._fp.write(chunk)
+
+    def end_object(self, object_id: int, transform: str | None = None) -> None:
+        self._fp.write(b"\n  </object>\n")
+        self._items.append((object_id, transform))
+
+    def close(self) -> None:
+        out = [" </resources>\n", " <build>\n"]
+        for object_id, transform in self._items:
+            extra = f' transform="{transform}"' if transform else ""
+            out.append(f'  <item objectid="{object_id}"{extra}/>\n')
+        out.append(" </build>\n</model>\n")
+        self._fp.write("".join(out).encode("utf-8"))
+
+
+def copy_entries(
+    zin: zipfile.ZipFile, zout: zipfile.ZipFile, skip: Callable[[str], bool]
+) -> None:
+    """Copy archive entries across without holding them in memory."""
+    for info in zin.infolist():
+        if info.is_dir() or skip(info.filename):
+            continue
+        with zin.open(info) as src, zout.open(info.filename, "w") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+
+def write_package_parts(zout: zipfile.ZipFile, thumbnail: bool = False) -> None:
+    """
+    Write the content types and relationships of a bare 3MF package,
+    optionally pointing at a package thumbnail.
+    """
+    zout.writestr("[Content_Types].xml", CONTENT_TYPES)
+    zout.writestr("_rels/.rels", RELS % (THUMBNAIL_REL if thumbnail else ""))
+
+
+def bambu_model_settings(objects: list[tuple[int, str, int]]) -> str:
+    """Metadata/model_settings.config assigning an extruder to each object."""
+    out = ['<?xml version="1.0" encoding="UTF-8"?>\n<config>\n']
+    for object_id, name, extruder in objects:
+        out.append(
+            f'  <object id="{object_id}">\n'
+            f'    <metadata key="name" value={quoteattr(name)}/>\n'
+            f'    <metadata key="extruder" value="{extruder}"/>\n'
+            "  </object>\n"
+        )
+    out.append("</config>\n")
+    return "".join(out)
+
+
+def bambu_plate_config(object_ids: list[int], plate_id: int = 1) -> str:
+    """Metadata/plate_<n>.config listing the object instances on a plate."""
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n<plate>\n',
+        f'  <metadata key="plater_id" value="{plate_id}"/>\n',
+        '  <metadata key="locked" value="false"/>\n',
+    ]
+    for object_id in object_ids:
+        out.append(
+            "  <model_instance>\n"
+            f'    <metadata key="object_id" value="{object_id}"/>\n'
+            '    <metadata key="instance_id" value="0"/>\n'
+            "  </model_instance>\n"
+        )
+    out.append("</plate>\n")
+    return "".join(out)
+
+
+_VERTEX_RE = re.compile(
+    rb'<(?:[\w.-]+:)?vertex\s+x="([^"]+)"\s+y="([^"]+)"\s+z="([^"]+)"'
+)
+
+
+def tag_blocks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Regroup a stream of chunks so that no block ends inside a tag, for
+    scanning each block with a regex.
+    """
+    carry = b""
+    for chunk in chunks:
+        data = carry + chunk
+        # Leave any tag cut off by the chunk boundary for the next block
+        cut = data.rfind(b"<")
+        if cut <= 0:
+            carry = data
+            continue
+        yield data[:cut]
+        carry = data[cut:]
+    if carry:
+        yield carry
+
+
+def mesh_bounds(chunks) -> tuple[list[float], list[float]]:
+    """
+    Axis-aligned bounds of the vertices in a stream of <mesh> chunks.
+
+    Returns ([min_x, min_y, min_z], [max_x, max_y, max_z]).
+    """
+    lo = [float("inf")] * 3
+    hi = [float("-inf")] * 3
+    for block in tag_blocks(chunks):
+        coords = array("d", map(float, chain.from_iterable(_VERTEX_RE.findall(block))))
+        if not coords:
+            continue
+        for axis in range(3):
+            column = coords[axis::3]
+            lo[axis] = min(lo[axis], min(column))
+            hi[axis] = max(hi[axis], max(column))
+    return lo, hi
+
+
+_ELEMENT_RE = re.compile(rb"<(?:[\w.-]+:)?(vertex|triangle)[\s/>]")
+
+
+def count_elements(chunks: Iterable[bytes], counts: dict) -> Iterator[bytes]:
+    """
+    Pass a stream of <mesh> chunks through unchanged (regrouped by
+    tag_blocks) while adding its vertices and triangles to ``counts``.
+    """
+    counts.setdefault("vertices", 0)
+    counts.setdefault("triangles", 0)
+    for block in tag_blocks(chunks):
+        elements = _ELEMENT_RE.findall(block)
+        triangles = elements.count(b"triangle")
+        counts["triangles"] += triangles
+        counts["vertices"] += len(elements) - triangles
+        yield block
@@ -0,0 +1,163 @@
+"""
+Per-stage spans with Chrome trace-event export.
+
+Every OpenSCAD subprocess, combine, zip write and preview is recorded as
+a span carrying the label name, export mode, worker thread and exit
+status. Span durations are always kept for the end-of-run summary; with
+``--trace`` the spans are also streamed to a JSON file in Chrome
+trace-event format, which opens in Perfetto or chrome://tracing.
+Listeners (such as the cost model) see every finished span as well.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Label the current thread is working on, attached to every span it opens
+current_label = contextvars.ContextVar("current_label", default=None)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Tracer:
+    """Collects spans from any thread; optionally streams them to a file."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = defaultdict(list)
+        self._origin = time.perf_counter()
+        self._out = None
+        self._threads_seen = set()
+        self._listeners = []
+
+    def add_listener(self, listener) -> None:
+        """Call ``listener(name, seconds, info)`` for every finished span."""
+        self._listeners.append(listener)
+
+    def open(self, path) -> None:
+        """Start streaming trace events to ``path``."""
+        self._out = open(path, "w", encoding="utf-8")
+        self._out.write("[\n")
+        self._emit(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "args": {"name": "generate_labels"},
+            },
+            first=True,
+        )
+
+    def close(self) -> None:
+        if self._out is not None:
+            with self._lock:
+                self._out.write("\n]\n")
+                self._out.close()
+                self._out = None
+
+    def _emit(self, event: dict, first: bool = False) -> None:
+        # Caller holds the lock (or is the only thread, for the header)
+        self._out.write(
+            ("" if first else ",\n") + json.dumps(event, ensure_ascii=False)
+        )
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """
+        Time a block. The yielded dict is recorded as the span's args, so
+        callers can add fields such as ``status`` as they learn them.
+        """
+        info = {"label": current_label.get(), **args}
+        start = time.perf_counter()
+        try:
+            yield info
+        except BaseException:
+            info.setdefault("status", "error")
+            raise
+        finally:
+            end = time.perf_counter()
+            self._record(name, start, end, info)
+            for listener in self._listeners:
+                listener(name, end - start, info)
+
+    def _record(self, name: str, start: float, end: float, info: dict) -> None:
+        thread = threading.current_thread()
+        info["worker"] = thread.name
+        with self._lock:
+            self._durations[name].append(end - start)
+            if self._out is None:
+                return
+            tid = thread.ident
+            if tid not in self._threads_seen:
+                self._threads_seen.add(tid)
+                self._emit(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": os.getpid(),
+                        "tid": tid,
+                        "args": {"name": thread.name},
+                    }
+                )
+            self._emit(
+                {
+                    "name": (
+                        name if info["label"] is None else f"{name} {info['label']}"
+                    ),
+                    "cat": name,
+                    "ph": "X",
+                    "ts": round((start - self._origin) * 1e6, 1),
+                    "dur": round((end - start) * 1e6, 1),
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": info,
+                }
+            )
+
+    def totals(self) -> dict[str, float]:
+        """Total seconds spent per span name."""
+        with self._lock:
+            return {name: sum(values) for name, values in self._durations.items()}
+
+    def summary(self) -> list[tuple[str, int, float, float, float]]:
+        """(name, count, p50, p95, max) per span name, slowest total first."""
+        with self._lock:
+            stats = [
+                (
+                    name,
+                    len(values),
+                    percentile(values, 0.50),
+                    percentile(values, 0.95),
+                    max(values),
+                )
+                for name, values in self._durations.items()
+            ]
+        return sorted(stats, key=lambda s: -s[2] * s[1])
+
+
+TRACER = Tracer()
+span = TRACER.span
+
+
+def label_stage(method):
+    """Run a LabelJob stage with its label attached to every span inside."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        token = current_label.set(self.name)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            current_label.reset(token)
+
+    return wrapper
@@ -0,0 +1,371 @@
+"""
+TCP work queue for rendering labels on several machines.
+
+A coordinator (``generate_labels.py --serve``) plans the run as usual,
+but its per-label OpenSCAD exports are queued here instead of run
+locally. Any number of workers (``generate_labels.py --worker``), on
+this host or others, connect, lease one export at a time, render it and
+push the 3MF back; the coordinator then combines it like a local render.
+
+Messages are one JSON header line, followed by ``size`` bytes of payload
+for artifacts. Each worker connection holds its leases: if the worker
+disconnects, or a lease outlives the job's timeout plus a grace period
+(a hung or partitioned host), the job is queued again, up to
+MAX_ATTEMPTS times. Workers must run the same labels.scad and fonts as
+the coordinator, which the opening handshake checks.
+"""
+
+import itertools
+import json
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable
+
+from runner import RUNNER, DeadlineExceeded, RunCancelled
+
+DEFAULT_HOST = "127.0.0.1"
+
+# OpenSCAD exports the coordinator keeps in flight by default
+DEFAULT_IN_FLIGHT = 32
+
+# Attempts per job before its label fails
+MAX_ATTEMPTS = 3
+
+# A lease expires this long after the job's own timeout would have
+LEASE_GRACE = 30.0
+
+# How long a lease request waits for work before the worker asks again
+LEASE_POLL = 1.0
+
+# How long a worker keeps trying to reach a coordinator that isn't up yet
+CONNECT_TIMEOUT = 30.0
+
+
+def parse_address(text: str) -> tuple[str, int]:
+    """Parse "[HOST:]PORT" into (host, port), for argparse."""
+    host, _, port = text.rpartition(":")
+    try:
+        return host or DEFAULT_HOST, int(port)
+    except ValueError:
+        raise ValueError(f"expected [HOST:]PORT, got {text!r}") from None
+
+
+def send(fp, header: dict, payload: bytes = b"") -> None:
+    fp.write(json.dumps({**header, "size": len(payload)}).encode("utf-8") + b"\n")
+    fp.write(payload)
+    fp.flush()
+
+
+def receive(fp) -> tuple[dict | None, bytes]:
+    """The next message, or (None, b"") once the peer has gone."""
+    line = fp.readline()
+    if not line:
+        return None, b""
+    header = json.loads(line)
+    payload = fp.read(header.get("size", 0))
+    if len(payload) != header.get("size", 0):
+        return None, b""
+    return header, payload
+
+
+class _Job:
+    def __init__(self, job_id: int, spec: dict, timeout: float):
+        self.id = job_id
+        self.spec = spec
+        self.timeout = timeout
+        self.attempts = 0
+        self.lease = None  # (worker, expiry) while a worker holds it
+        self.result = None  # (ok, message, payload, seconds, worker)
+        self.done = threading.Event()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        queue = self.server.queue
+        header, _ = receive(self.rfile)
+        if header is None or header.get("op") != "hello":
+            return
+        mismatch = [k for k, v in queue.identity.items() if header.get(k) != v]
+        if mismatch:
+            error = f"{' and '.join(mismatch)} differ from the coordinator's"
+            send(self.wfile, {"op": "error", "error": error})
+            return
+        worker = f"{header.get('worker', '?')}@{self.client_address[0]}"
+        send(self.wfile, {"op": "ok"})
+        queue._connected(worker)
+
+        held = set()
+        try:
+            while True:
+                header, payload = receive(self.rfile)
+                if header is None:
+                    break
+                if header["op"] == "lease":
+                    job = queue._lease(worker)
+                    if job is None:
+                        send(self.wfile, {"op": "done" if queue.closing else "idle"})
+                        continue
+                    held.add(job.id)
+                    send(
+                        self.wfile,
+                        {
+                            "op": "job",
+                            "id": job.id,
+                            "attempt": job.attempts,
+                            "timeout": job.timeout,
+                            "spec": job.spec,
+                        },
+                    )
+                elif header["op"] == "result":
+                    held.discard(header["id"])
+                    queue._complete(header, payload, worker)
+                    send(self.wfile, {"op": "ack"})
+        except (OSError, ValueError):
+            pass  # dropped connection or garbage: treat as a lost worker
+        finally:
+            queue._release(held, worker, "worker disconnected")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class WorkQueue:
+    """
+    The coordinator's side of the queue. ``run`` may be called from any
+    thread and blocks until a worker has rendered the job.
+    """
+
+    def __init__(self, max_attempts: int = MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self.identity = {}
+        self.closing = False
+        self.remote_renders = 0
+        self.retries = 0
+        self.workers = set()
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._server = None
+        self._thread = None
+
+    @property
+    def serving(self) -> bool:
+        return self._server is not None
+
+    def serve(self, host: str, port: int, identity: dict) -> tuple[str, int]:
+        """
+        Listen for workers; returns the bound address (port 0 picks one).
+        Workers must present the same ``identity`` digests.
+        """
+        self.identity = identity
+        self._server = _Server((host, port), _Handler)
+        self._server.queue = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="work-queue", daemon=True
+        )
+        self._thread.start()
+        return self._server.server_address[:2]
+
+    def close(self) -> None:
+        """Tell workers there is nothing more and stop listening."""
+        if self._server is None:
+            return
+        with self._cond:
+            self.closing = True
+            for job in self._jobs.values():
+                job.result = (False, "Cancelled", b"", 0.0, None)
+                job.done.set()
+            self._jobs.clear()
+            self._pending.clear()
+            self._cond.notify_all()
+        # Let idle workers collect their "done" before the sockets go
+        time.sleep(LEASE_POLL)
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+
+    def run(
+        self, spec: dict, output_file: Path, timeout: float
+    ) -> tuple[bool, str, float, str]:
+        """
+        Queue ``spec`` and wait for its artifact, which is written to
+        ``output_file``. Returns (ok, message, render seconds, worker).
+        Raises RunCancelled or DeadlineExceeded like the local runner.
+        """
+        with self._cond:
+            job = _Job(next(self._ids), spec, timeout)
+            self._jobs[job.id] = job
+            self._pending.append(job.id)
+            self._cond.notify()
+        try:
+            while not job.done.wait(0.5):
+                if RUNNER.cancelled:
+                    raise RunCancelled("Cancelled")
+                if RUNNER.deadline is not None and time.monotonic() > RUNNER.deadline:
+                    raise DeadlineExceeded("Run deadline exceeded")
+                with self._cond:
+                    self._expire()
+        finally:
+            with self._cond:
+                self._jobs.pop(job.id, None)
+
+        ok, message, payload, seconds, worker = job.result
+        if ok:
+            output_file.write_bytes(payload)
+        return ok, message, seconds, worker
+
+    # The methods below run on connection threads
+
+    def _connected(self, worker: str) -> None:
+        with self._cond:
+            self.workers.add(worker)
+
+    def _expire(self) -> None:
+        # Caller holds the condition
+        now = time.monotonic()
+        for job in list(self._jobs.values()):
+            if job.lease is not None and job.lease[1] < now:
+                self._retry(job, f"lease expired on {job.lease[0]}")
+
+    def _retry(self, job: _Job, reason: str) -> None:
+        # Caller holds the condition
+        job.lease = None
+        if job.attempts >= self.max_attempts:
+            job.result = (
+                False,
+                f"Gave up after {job.attempts} attempt(s): {reason}",
+                b"",
+                0.0,
+                None,
+            )
+            job.done.set()
+            return
+        self.retries += 1
+        self._pending.appendleft(job.id)
+        self._cond.notify()
+
+    def _lease(self, worker: str) -> _Job | None:
+        give_up = time.monotonic() + LEASE_POLL
+        with self._cond:
+            while not self.closing:
+                self._expire()
+                while self._pending:
+                    job = self._jobs.get(self._pending.popleft())
+                    if job is None or job.done.is_set():
+                        continue  # cancelled while queued
+                    job.attempts += 1
+                    job.lease = (worker, time.monotonic() + job.timeout + LEASE_GRACE)
+                    return job
+                remaining = give_up - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        return None
+
+    def _complete(self, header: dict, payload: bytes, worker: str) -> None:
+        with self._cond:
+            job = self._jobs.get(header["id"])
+            # Ignore results of leases that expired and were handed out again
+            if job is None or job.lease is None or job.attempts != header["attempt"]:
+                return
+            job.lease = None
+            self.remote_renders += 1
+            job.result = (
+                header["ok"],
+                header.get("error"),
+                payload,
+                header.get("seconds", 0.0),
+                worker,
+            )
+            job.done.set()
+
+    def _release(self, held: set, worker: str, reason: str) -> None:
+        with self._cond:
+            for job_id in held:
+                job = self._jobs.get(job_id)
+                if job is not None and job.lease is not None:
+                    if job.lease[0] == worker:
+                        self._retry(job, reason)
+
+
+def _connect(address: tuple[str, int]) -> socket.socket:
+    give_up = time.monotonic() + CONNECT_TIMEOUT
+    while True:
+        try:
+            return socket.create_connection(address)
+        except OSError:
+            if time.monotonic() > give_up:
+                raise
+            time.sleep(0.5)
+
+
+def work(
+    address: tuple[str, int],
+    identity: dict,
+    render: Callable[[dict, Path, float], tuple[bool, str, float | None]],
+    name: str,
+) -> int:
+    """
+    One worker slot: lease, render and return jobs until the coordinator
+    is done. ``render(spec, output_file, timeout)`` produces each
+    artifact and returns (ok, message, render seconds); without the
+    seconds, the whole call is timed. Returns the number of jobs rendered
+    successfully.
+    """
+    rendered = 0
+    with _connect(address) as sock, sock.makefile("rwb") as fp:
+        send(fp, {"op": "hello", "worker": name, **identity})
+        header, _ = receive(fp)
+        if header is None or header["op"] != "ok":
+            raise ConnectionError(
+                header["error"] if header else "Coordinator closed the connection"
+            )
+        while True:
+            send(fp, {"op": "lease"})
+            header, _ = receive(fp)
+            if header is None or header["op"] == "done":
+                return rendered
+            if header["op"] != "job":
+                continue
+            with tempfile.TemporaryDirectory() as tmpdir:
+                output_file = Path(tmpdir) / "output.3mf"
+                start = time.perf_counter()
+                seconds = None
+                try:
+                    ok, message, seconds = render(
+                        header["spec"], output_file, header["timeout"]
+                    )
+                except Exception as e:
+                    ok, message = False, f"Exception: {e}"
+                if seconds is None:
+                    seconds = time.perf_counter() - start
+                payload = output_file.read_bytes() if ok else b""
+            send(
+                fp,
+                {
+                    "op": "result",
+                    "id": header["id"],
+                    "attempt": header["attempt"],
+                    "ok": ok,
+                    "error": message,
+                    "seconds": seconds,
+                },
+                payload,
+            )
+            if ok:
+                rendered += 1
+            if receive(fp)[0] is None:
+                return rendered
+
+
+# The coordinator's queue; main() starts it with --serve
+WORK_QUEUE = WorkQueue()